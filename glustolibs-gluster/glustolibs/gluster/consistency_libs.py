@@ -0,0 +1,274 @@
+#  Copyright (C) 2021 Red Hat, Inc. <http://www.redhat.com>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License along
+#  with this program; if not, write to the Free Software Foundation, Inc.,
+#  51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+"""
+    Description: Module for checking the consistency of the bricks of
+        replicate, arbiter and disperse subvolumes.
+
+    The metadata of every entry of every brick (gfid, type, size, mode,
+    owner, xattrs and optionally a content hash) is collected from all the
+    bricks concurrently by brick_metadata.py. The bricks of each subvol are
+    then compared entry by entry, keyed by gfid, and every divergence is
+    reported.
+"""
+
+import json
+
+from glusto.core import Glusto as g
+from glustolibs.gluster.volume_ops import get_volume_info
+from glustolibs.misc.misc_libs import upload_scripts
+
+BRICK_METADATA_SCRIPT = "/usr/share/glustolibs/scripts/brick_metadata.py"
+
+# Fields expected to be same on all the bricks of a replica subvol
+_REPLICA_FIELDS = ('type', 'size', 'mode', 'uid', 'gid', 'target', 'sha256')
+# Fields which can be compared on an arbiter brick, which has no data
+_ARBITER_FIELDS = ('type', 'mode', 'uid', 'gid', 'target')
+# Fields expected to be same on all the fragments of a disperse subvol.
+# The size of each fragment is compared instead of the logical size.
+_DISPERSE_FIELDS = ('type', 'size', 'mode', 'uid', 'gid', 'target')
+_DISPERSE_XATTRS = ('trusted.ec.size', 'trusted.ec.version',
+                    'trusted.ec.config')
+# xattrs which legitimately differ between the bricks of a subvol
+_IGNORED_XATTR_PREFIXES = ('trusted.afr.', 'trusted.ec.dirty',
+                           'trusted.ec.heal', 'trusted.glusterfs.dht')
+
+
+def collect_bricks_metadata(bricks_list, content_hash=False,
+                            xattr_prefixes=('user.',)):
+    """Collect the metadata of all the entries of the bricks concurrently.
+
+    Args:
+        bricks_list (list): List of bricks of the form 'host:/brick/path'.
+
+    Kwargs:
+        content_hash (bool): If True, the sha256 of every regular file is
+            collected as well. Defaults to False.
+        xattr_prefixes (tuple): Prefixes of the xattrs to collect besides
+            the ones needed to match entries. Defaults to ('user.',).
+
+    Returns:
+        dict: Dict with the brick as key and as value a dict of the records
+            of its entries keyed by gfid (or 'path:<path>' for entries
+            without gfid). Each record is a dict with 'paths' (list of all
+            the hardlinks of the entry), 'type', 'size', 'mode', 'uid',
+            'gid', 'xattrs' and optionally 'target' and 'sha256'.
+        NoneType: None if the metadata could not be collected from a brick.
+
+    Example:
+        collect_bricks_metadata(['abc.com:/bricks/brick0/testvol_brick0'])
+    """
+    nodes = list(set(brick.split(':')[0] for brick in bricks_list))
+    if not upload_scripts(nodes, BRICK_METADATA_SCRIPT,
+                          "/usr/share/glustolibs/scripts/"):
+        g.log.error("Failed to upload %s to %s", BRICK_METADATA_SCRIPT,
+                    nodes)
+        return None
+
+    options = ''.join(" -x '%s'" % prefix for prefix in xattr_prefixes)
+    if content_hash:
+        options += " -c"
+    procs = []
+    for brick in bricks_list:
+        node, brick_path = brick.split(':')
+        cmd = ("/usr/bin/env python %s%s %s"
+               % (BRICK_METADATA_SCRIPT, options, brick_path))
+        procs.append(g.run_async(node, cmd))
+
+    bricks_metadata = {}
+    for brick, proc in zip(bricks_list, procs):
+        ret, out, err = proc.async_communicate()
+        if ret:
+            g.log.error("Failed to collect the metadata of brick %s: %s",
+                        brick, err)
+            return None
+        records = {}
+        for line in out.splitlines():
+            entry = json.loads(line)
+            key = entry['gfid'] or "path:%s" % entry['path']
+            if key in records:
+                records[key]['paths'].append(entry['path'])
+                continue
+            entry['paths'] = [entry.pop('path')]
+            records[key] = entry
+        for record in records.values():
+            record['paths'].sort()
+        bricks_metadata[brick] = records
+        g.log.debug("Collected metadata of %d entries from brick %s",
+                    len(records), brick)
+    return bricks_metadata
+
+
+def _comparable_xattrs(record, skip=()):
+    """Get the xattrs of a record which must match across the subvol."""
+    return dict((name, value) for name, value in record['xattrs'].items()
+                if not name.startswith(_IGNORED_XATTR_PREFIXES) and
+                name != 'trusted.gfid' and name not in skip)
+
+
+def compare_subvol_metadata(subvol_bricks, bricks_metadata,
+                            subvol_type='replicate', arbiter_count=0):
+    """Compare the bricks of a subvol with hash joins keyed by gfid.
+
+    Args:
+        subvol_bricks (list): Bricks of the subvol.
+        bricks_metadata (dict): Metadata of the bricks as returned by
+            collect_bricks_metadata().
+
+    Kwargs:
+        subvol_type (str): 'replicate' or 'disperse'.
+        arbiter_count (int): Number of arbiter bricks at the end of the
+            subvol, on which data is not compared.
+
+    Returns:
+        list: List of divergences, each a dict with 'key' (gfid or path),
+            'paths', 'field' and 'values' (dict of brick to its value).
+            The field is 'presence' for an entry missing on some bricks.
+    """
+    divergences = []
+    data_bricks = subvol_bricks[:len(subvol_bricks) - arbiter_count]
+    all_keys = set()
+    for brick in subvol_bricks:
+        all_keys.update(bricks_metadata[brick])
+
+    for key in sorted(all_keys):
+        records = dict((brick, bricks_metadata[brick].get(key))
+                       for brick in subvol_bricks)
+        present = [brick for brick in subvol_bricks if records[brick]]
+        paths = records[present[0]]['paths']
+        if len(present) != len(subvol_bricks):
+            divergences.append({'key': key, 'paths': paths,
+                                'field': 'presence',
+                                'values': dict((brick, bool(record))
+                                               for brick, record
+                                               in records.items())})
+            continue
+
+        checks = [('paths', subvol_bricks)]
+        if subvol_type == 'disperse':
+            checks += [(field, subvol_bricks) for field in _DISPERSE_FIELDS]
+            checks += [(('xattrs', name), subvol_bricks)
+                       for name in _DISPERSE_XATTRS]
+            xattrs_skip = _DISPERSE_XATTRS
+        else:
+            checks += [(field, data_bricks) for field in _REPLICA_FIELDS
+                       if field not in _ARBITER_FIELDS]
+            checks += [(field, subvol_bricks) for field in _ARBITER_FIELDS]
+            xattrs_skip = ()
+
+        for field, bricks in checks:
+            if isinstance(field, tuple):
+                values = dict((brick, records[brick]['xattrs'].get(field[1]))
+                              for brick in bricks)
+                field = "xattr:%s" % field[1]
+            else:
+                values = dict((brick, records[brick].get(field))
+                              for brick in bricks)
+            if len(set(str(value) for value in values.values())) > 1:
+                divergences.append({'key': key, 'paths': paths,
+                                    'field': field, 'values': values})
+
+        xattrs = dict((brick, _comparable_xattrs(records[brick],
+                                                 xattrs_skip))
+                      for brick in subvol_bricks)
+        names = set()
+        for brick_xattrs in xattrs.values():
+            names.update(brick_xattrs)
+        for name in sorted(names):
+            values = dict((brick, xattrs[brick].get(name))
+                          for brick in subvol_bricks)
+            if len(set(values.values())) > 1:
+                divergences.append({'key': key, 'paths': paths,
+                                    'field': "xattr:%s" % name,
+                                    'values': values})
+    return divergences
+
+
+def check_bricks_consistency(mnode, volname, content_hash=False,
+                             xattr_prefixes=('user.',)):
+    """Check that the bricks of every subvol of the volume are consistent.
+
+    The metadata of all the bricks of all the subvols is collected
+    concurrently and the bricks of each replicate (or arbiter) subvol are
+    compared field by field, including the content hash if requested.
+    For disperse subvols the fragments are compared on their own size and
+    on the ec size, version and config xattrs instead of the content.
+
+    Args:
+        mnode (str): Node on which commands are executed.
+        volname (str): Name of the volume.
+
+    Kwargs:
+        content_hash (bool): If True, compare the sha256 of the content of
+            the files on replicate subvols. Defaults to False.
+        xattr_prefixes (tuple): Prefixes of the xattrs to compare besides
+            the gluster ones. Defaults to ('user.',).
+
+    Returns:
+        tuple: Tuple containing two elements (ret, divergences).
+        The first element 'ret' is of type 'bool', True if all the bricks
+        of every subvol are consistent. False otherwise.
+
+        The second element 'divergences' is a list of the divergent entries
+        as returned by compare_subvol_metadata() with the index of the
+        subvol added as 'subvol'. None if the metadata could not be
+        collected.
+
+    Example:
+        check_bricks_consistency("abc.com", "testvol")
+    """
+    volinfo = get_volume_info(mnode, volname)
+    if volinfo is None:
+        g.log.error("Unable to get the volume info of volume %s", volname)
+        return False, None
+    volinfo = volinfo[volname]
+    bricks = [brick['name'] for brick in volinfo['bricks']['brick']]
+    if int(volinfo.get('disperseCount', 0) or 0):
+        subvol_type = 'disperse'
+        subvol_size = int(volinfo['disperseCount'])
+        arbiter_count = 0
+    else:
+        subvol_type = 'replicate'
+        subvol_size = int(volinfo.get('replicaCount', 1) or 1)
+        arbiter_count = int(volinfo.get('arbiterCount', 0) or 0)
+    subvols = [bricks[i:i + subvol_size]
+               for i in range(0, len(bricks), subvol_size)]
+    if subvol_size < 2:
+        g.log.info("Volume %s has no replicated subvols", volname)
+        return True, []
+
+    bricks_metadata = collect_bricks_metadata(bricks, content_hash,
+                                              xattr_prefixes)
+    if bricks_metadata is None:
+        return False, None
+
+    divergences = []
+    for index, subvol in enumerate(subvols):
+        subvol_divergences = compare_subvol_metadata(
+            subvol, bricks_metadata, subvol_type, arbiter_count)
+        for divergence in subvol_divergences:
+            divergence['subvol'] = index
+            g.log.error("Subvol %d of volume %s diverges on %s of %s: %s",
+                        index, volname, divergence['field'],
+                        divergence['paths'], divergence['values'])
+        divergences += subvol_divergences
+
+    if divergences:
+        g.log.error("Found %d divergent entries in volume %s",
+                    len(divergences), volname)
+        return False, divergences
+    g.log.info("All the subvols of volume %s are consistent", volname)
+    return True, divergences
@@ -28,6 +28,8 @@ from glustolibs.gluster.lib_utils import (add_services_to_firewall,
                                           is_rhel6, list_files)
 from glustolibs.gluster.mount_ops import umount_volume
 from glustolibs.gluster.volume_libs import cleanup_volume
+from glustolibs.gluster.ha_status import (get_ctdb_status_snapshot,
+                                          invalidate_ha_status)
 
 
 def edit_hook_script(mnode, ctdb_volname):
@@ -226,6 +228,7 @@ def start_ctdb_service(servers):
    Returns:
         bool: True if successfully starts ctdb service  else false
     """
+    invalidate_ha_status()
     cmd = "pgrep ctdb || service ctdb start"
     for mnode in servers:
         ret, out, _ = g.run(mnode, cmd)
@@ -251,6 +254,7 @@ def stop_ctdb_service(servers):
    Returns:
         bool: True if successfully stops ctdb service else false
     """
+    invalidate_ha_status()
     cmd = "service ctdb stop"
     for mnode in servers:
         ret, out, _ = g.run(mnode, cmd)
@@ -360,37 +364,40 @@ def ctdb_status(mnode):
     return g.run(mnode, cmd)
 
 
-def is_ctdb_status_healthy(mnode):
+def is_ctdb_status_healthy(mnode, snapshot=None):
     """
     Check if ctdb is up & running
 
     Args:
         mnode(str): primary node out of the servers
 
+    Kwargs:
+        snapshot (dict): Status snapshot as returned by
+            get_ctdb_status_snapshot(), collected if not given.
+
     Returns:
         bool: True if ctdb status healthy  else false
     """
     # Get the ctdb status details
-    status_res = ctdb_status(mnode)
-    if status_res[0]:
+    if snapshot is None:
+        snapshot = get_ctdb_status_snapshot(mnode)
+    if snapshot is None:
         g.log.info("CTDB is not enabled for the cluster")
         return False
-    # Get the ctdb status output
-    output = status_res[1]
-    # Parse the ctdb status output
-    node_status = parse_ctdb_status(output)
-    if not node_status:
+    if not snapshot['nodes']:
         g.log.error("ctdb status return empty list")
         return False
-    for node_ip, status in node_status.iteritems():
+    ret = True
+    for node_ip, node in sorted(snapshot['nodes'].items()):
         # Check if ctdb status is OK or not
-        if node_status[node_ip] != 'OK':
-            g.log.error("CTDB node %s is %s",
-                        str(node_ip), status)
-            return False
-        g.log.info("CTDB node %s is %s",
-                   str(node_ip), status)
-    return True
+        if node['status'] != 'OK':
+            g.log.error("CTDB node %s (pnn %d) is %s",
+                        node_ip, node['pnn'], node['status'])
+            ret = False
+        else:
+            g.log.info("CTDB node %s (pnn %d) is %s",
+                       node_ip, node['pnn'], node['status'])
+    return ret
 
 
 def edit_hookscript_for_teardown(mnode, ctdb_volname):
@@ -18,7 +18,7 @@
    Description: Library for gluster geo-replication operations.
 """
 
-from time import sleep
+from time import sleep, time
 from glusto.core import Glusto as g
 from glustolibs.gluster.gluster_init import restart_glusterd
 from glustolibs.gluster.peer_ops import is_peer_connected
@@ -27,7 +27,8 @@ from glustolibs.gluster.geo_rep_ops import (georep_mountbroker_setup,
                                             georep_create_pem,
                                             georep_create,
                                             georep_set_pem_keys,
-                                            georep_config_set)
+                                            georep_config_set,
+                                            get_georep_status)
 from glustolibs.gluster.shared_storage_ops import (enable_shared_storage,
                                                    is_shared_volume_mounted,
                                                    check_gluster_shared_volume)
@@ -359,3 +360,198 @@ def setup_master_and_slave_volumes(mnode, all_servers_info,
                     "slave volume %s", slave_volume_config['name'])
         return False
     return True
+
+
+class GeorepMonitor(object):
+    """Sample the status of a geo-rep session over time.
+
+    Each call to poll() collects the status detail of all the workers and
+    records a sample with the number of workers in each state, the entry,
+    data and metadata operations still pending, the failures and the
+    checkpoint status. The sync rate is estimated from the decrease of the
+    pending operations between two samples.
+
+    Example:
+        monitor = GeorepMonitor(mnode, mastervol, slaveip, slavevol)
+        monitor.poll()
+        ...
+        monitor.poll()
+        g.log.info(monitor.summary())
+    """
+
+    def __init__(self, mnode, mastervol, slaveip, slavevol, user=None):
+        self.mnode = mnode
+        self.mastervol = mastervol
+        self.slaveip = slaveip
+        self.slavevol = slavevol
+        self.user = user
+        self.samples = []
+
+    def poll(self):
+        """Collect and record a sample of the status of the session.
+
+        Returns:
+            dict: Sample with 'time', 'workers' (as returned by
+                get_georep_status()), 'active', 'passive', 'faulty',
+                'pending' (dict of entry, data and meta), 'total_pending',
+                'failures', 'crawl_status' (list of the crawl status of the
+                active workers), 'checkpoint_time', 'checkpoint_completed'
+                and 'sync_rate' (pending operations synced per second since
+                the previous sample).
+            NoneType: None if the status could not be collected.
+        """
+        workers = get_georep_status(self.mnode, self.mastervol, self.slaveip,
+                                    self.slavevol, self.user)
+        if workers is None:
+            return None
+        active = [worker for worker in workers
+                  if worker.get('status') == 'Active']
+        pending = {}
+        for counter in ('entry', 'data', 'meta'):
+            pending[counter] = sum(worker[counter] or 0 for worker in active)
+        checkpoint_times = set(worker.get('checkpoint_time')
+                               for worker in active)
+        sample = {
+            'time': time(),
+            'workers': workers,
+            'active': len(active),
+            'passive': len([worker for worker in workers
+                            if worker.get('status') == 'Passive']),
+            'faulty': len([worker for worker in workers
+                           if worker.get('status') == 'Faulty']),
+            'pending': pending,
+            'total_pending': sum(pending.values()),
+            'failures': sum(worker['failures'] or 0 for worker in workers),
+            'crawl_status': sorted(set(worker.get('crawl_status')
+                                       for worker in active)),
+            'checkpoint_time': (checkpoint_times.pop()
+                                if len(checkpoint_times) == 1 else None),
+            'checkpoint_completed': bool(active) and all(
+                worker.get('checkpoint_completed') == 'Yes'
+                for worker in active),
+            'sync_rate': None}
+        if self.samples:
+            previous = self.samples[-1]
+            elapsed = sample['time'] - previous['time']
+            if elapsed > 0:
+                sample['sync_rate'] = max(
+                    previous['total_pending'] - sample['total_pending'],
+                    0) / elapsed
+        self.samples.append(sample)
+        return sample
+
+    def summary(self):
+        """Summarize the samples recorded so far.
+
+        Returns:
+            dict: Dict with 'samples', 'duration', 'max_pending',
+                'last_pending', 'avg_sync_rate', 'peak_sync_rate',
+                'max_failures' and 'faulty_samples'.
+        """
+        rates = [sample['sync_rate'] for sample in self.samples
+                 if sample['sync_rate'] is not None]
+        summary = {'samples': len(self.samples), 'duration': 0,
+                   'max_pending': 0, 'last_pending': None,
+                   'avg_sync_rate': None, 'peak_sync_rate': None,
+                   'max_failures': 0, 'faulty_samples': 0}
+        if not self.samples:
+            return summary
+        summary['duration'] = (self.samples[-1]['time'] -
+                               self.samples[0]['time'])
+        summary['max_pending'] = max(sample['total_pending']
+                                     for sample in self.samples)
+        summary['last_pending'] = self.samples[-1]['total_pending']
+        summary['max_failures'] = max(sample['failures']
+                                      for sample in self.samples)
+        summary['faulty_samples'] = len([sample for sample in self.samples
+                                         if sample['faulty']])
+        if summary['duration'] > 0:
+            summary['avg_sync_rate'] = (
+                (self.samples[0]['total_pending'] -
+                 summary['last_pending']) / summary['duration'])
+        if rates:
+            summary['peak_sync_rate'] = max(rates)
+        return summary
+
+
+def wait_for_georep_checkpoint(mnode, mastervol, slaveip, slavevol,
+                               user=None, set_checkpoint=True, timeout=1200,
+                               poll_interval=2, monitor=None):
+    """Wait for the checkpoint of a geo-rep session to complete.
+
+    The status of the session is polled every poll_interval seconds and the
+    function returns as soon as all the active workers report the
+    checkpoint as completed, instead of sleeping for a fixed time before
+    comparing the master and slave volumes.
+
+    Args:
+        mnode (str): Node on which cmd is to be executed
+        mastervol (str): The name of the master volume
+        slaveip (str): SlaveIP
+        slavevol (str): The name of the slave volume
+
+    Kwargs:
+        user (str): If not set, the default is a root-user
+            If specified, non-root user participates in geo-rep
+            session
+        set_checkpoint (bool): If True, set the checkpoint to now before
+            waiting. Otherwise wait for the checkpoint already set.
+            Defaults to True.
+        timeout (int): Time in seconds to wait. Defaults to 1200.
+        poll_interval (int): Time in seconds between two polls of the
+            status. Defaults to 2.
+        monitor (GeorepMonitor): Monitor recording the samples, for the
+            caller to get the throughput numbers. One is created if not
+            given.
+
+    Returns:
+        bool: True if the checkpoint completed within timeout.
+            False otherwise.
+
+    Example:
+        wait_for_georep_checkpoint(mnode, mastervol, slaveip, slavevol)
+    """
+    if monitor is None:
+        monitor = GeorepMonitor(mnode, mastervol, slaveip, slavevol, user)
+
+    previous_checkpoint = None
+    if set_checkpoint:
+        sample = monitor.poll()
+        if sample is not None:
+            previous_checkpoint = sample['checkpoint_time']
+        ret, _, err = georep_config_set(mnode, mastervol, slaveip, slavevol,
+                                        "checkpoint", "now", user)
+        if ret:
+            g.log.error("Failed to set the checkpoint of geo-rep session "
+                        "from %s to %s: %s", mastervol, slavevol, err)
+            return False
+
+    start_time = time()
+    while True:
+        sample = monitor.poll()
+        if sample is not None:
+            g.log.debug("geo-rep %s to %s: %d active, %d faulty, pending "
+                        "%s, crawl %s, checkpoint completed: %s",
+                        mastervol, slavevol, sample['active'],
+                        sample['faulty'], sample['pending'],
+                        sample['crawl_status'],
+                        sample['checkpoint_completed'])
+            if (sample['checkpoint_completed'] and
+                    sample['checkpoint_time'] not in (None, '', 'N/A',
+                                                      previous_checkpoint)):
+                g.log.info("Checkpoint of geo-rep session from %s to %s "
+                           "completed in %.1f seconds: %s", mastervol,
+                           slavevol, time() - start_time, monitor.summary())
+                return True
+            if sample['faulty']:
+                g.log.warning("%d workers of geo-rep session from %s to %s "
+                              "are Faulty", sample['faulty'], mastervol,
+                              slavevol)
+        if time() - start_time > timeout:
+            break
+        sleep(poll_interval)
+
+    g.log.error("Checkpoint of geo-rep session from %s to %s did not "
+                "complete in %s seconds: %s", mastervol, slavevol, timeout,
+                monitor.summary())
+    return False
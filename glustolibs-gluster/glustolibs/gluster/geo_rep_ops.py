@@ -18,8 +18,15 @@
    Description: Library for gluster geo-replication operations
 """
 
+try:
+    import xml.etree.cElementTree as etree
+except ImportError:
+    import xml.etree.ElementTree as etree
 from glusto.core import Glusto as g
 
+# Counters of the geo-rep status detail, converted to int when available
+GEOREP_STATUS_COUNTERS = ('entry', 'data', 'meta', 'failures')
+
 
 def georep_create_pem(mnode):
     """ Creates a common pem pub file on all the nodes in the master and
@@ -194,6 +201,69 @@ def georep_status(mnode, mastervol, slaveip, slavevol, user=None):
     return g.run(mnode, cmd)
 
 
+def get_georep_status(mnode, mastervol, slaveip, slavevol, user=None):
+    """Get the detailed status of the workers of a geo-replication session
+
+    Args:
+        mnode (str): Node on which cmd is to be executed
+        mastervol (str):The name of the master volume
+        slaveip (str): SlaveIP
+        slavevol(str): The name of the slave volume
+    Kwargs:
+        user (str): If not set, the default is a root-user
+            If specified, non-root user participates in geo-rep
+            session
+    Returns:
+        list: List of dicts, one per worker (master brick), with the fields
+            of the xml status detail such as 'master_node', 'master_brick',
+            'slave_node', 'status', 'crawl_status', 'last_synced',
+            'checkpoint_time', 'checkpoint_completed' and
+            'checkpoint_completion_time'. The 'entry', 'data', 'meta' and
+            'failures' counters are int, or None when not available.
+        NoneType: None on failure
+
+    Example:
+        get_georep_status("abc.com", "mastervol", "slave.com", "slavevol")
+        >>> [{'master_node': 'abc.com', 'master_brick':
+        '/bricks/brick0/mastervol_brick0', 'slave_user': 'root',
+        'slave': 'ssh://slave.com::slavevol', 'slave_node': 'slave.com',
+        'status': 'Active', 'crawl_status': 'Changelog Crawl',
+        'entry': 0, 'data': 12, 'meta': 0, 'failures': 0,
+        'checkpoint_completed': 'No', ...}]
+    """
+    if user:
+        cmd = ("gluster volume geo-replication %s %s@%s::%s status detail "
+               "--xml" % (mastervol, user, slaveip, slavevol))
+    else:
+        cmd = ("gluster volume geo-replication %s %s::%s status detail "
+               "--xml" % (mastervol, slaveip, slavevol))
+    ret, out, _ = g.run(mnode, cmd, log_level='DEBUG')
+    if ret != 0:
+        g.log.error("Failed to get the geo-rep status of session %s to "
+                    "%s::%s", mastervol, slaveip, slavevol)
+        return None
+
+    try:
+        root = etree.XML(out)
+    except etree.ParseError:
+        g.log.error("Failed to parse the geo-rep status xml output")
+        return None
+    if root.find("opRet") is None or root.find("opRet").text != "0":
+        g.log.error("geo-rep status of session %s to %s::%s failed: %s",
+                    mastervol, slaveip, slavevol, root.findtext("opErrstr"))
+        return None
+
+    workers = []
+    for pair in root.iter("pair"):
+        worker = dict((child.tag, (child.text or '').strip())
+                      for child in pair)
+        for counter in GEOREP_STATUS_COUNTERS:
+            value = worker.get(counter)
+            worker[counter] = int(value) if value and value.isdigit() else None
+        workers.append(worker)
+    return workers
+
+
 def georep_create(mnode, mastervol, slaveip, slavevol, user=None, force=False):
     """Pushes the keys to all the slave nodes and creates a geo-rep session
     Args:
@@ -24,10 +24,7 @@ from datetime import datetime
 from inspect import isclass
 from os.path import join as path_join
 from random import choice as random_choice
-from socket import (
-    gethostbyname,
-    gaierror,
-)
+from socket import gaierror
 from unittest import TestCase
 from time import sleep
 
@@ -38,8 +35,10 @@ from glustolibs.gluster.exceptions import (
     ExecutionError,
 )
 from glustolibs.gluster.lib_utils import inject_msg_in_logs
-from glustolibs.gluster.mount_ops import create_mount_objs
+from glustolibs.gluster.log_libs import LogPipeline
+from glustolibs.gluster.mount_ops import create_mount_objs, run_mount_op
 from glustolibs.gluster.nfs_libs import export_volume_through_nfs
+from glustolibs.gluster.node_identity import get_node_registry
 from glustolibs.gluster.peer_ops import (
     is_peer_connected,
     peer_probe_servers, peer_status
@@ -63,6 +62,12 @@ from glustolibs.gluster.geo_rep_libs import setup_master_and_slave_volumes
 from glustolibs.gluster.nfs_ganesha_ops import (
     teardown_nfs_ganesha_cluster)
 from glustolibs.misc.misc_libs import kill_process
+from glustolibs.misc.call_profiler import (
+    enable_call_profiling,
+    is_call_profiling_enabled,
+    start_test_profiling,
+    stop_test_profiling,
+)
 
 
 class runs_on(g.CarteTestClass):
@@ -107,6 +112,7 @@ class GlusterBaseClass(TestCase):
     volume_type = None
     mount_type = None
     error_or_failure_exists = False
+    call_profiling = False
 
     @staticmethod
     def get_super_method(obj, method_name):
@@ -180,7 +186,7 @@ class GlusterBaseClass(TestCase):
             nodes = [nodes]
         for node in nodes:
             try:
-                ip = gethostbyname(node)
+                ip = get_node_registry().get_ip(node)
             except gaierror as e:
                 g.log.error("Failed to get the IP of Host: %s : %s", node,
                             e.strerror)
@@ -480,17 +486,20 @@ class GlusterBaseClass(TestCase):
             g.log.info("Mounting volume '%s:%s' on '%s:%s'",
                        mount_obj.server_system, mount_obj.volname,
                        mount_obj.client_system, mount_obj.mountpoint)
-            ret = mount_obj.mount()
-            if not ret:
+        ret, results = run_mount_op(mounts, 'mount')
+        for result in results:
+            mount_obj = result['mount']
+            if not result['ret']:
                 g.log.error("Failed to mount volume '%s:%s' on '%s:%s'",
                             mount_obj.server_system, mount_obj.volname,
                             mount_obj.client_system, mount_obj.mountpoint)
-                return False
             else:
                 g.log.info("Successful in mounting volume '%s:%s' on "
-                           "'%s:%s'", mount_obj.server_system,
+                           "'%s:%s' in %.2f seconds", mount_obj.server_system,
                            mount_obj.volname, mount_obj.client_system,
-                           mount_obj.mountpoint)
+                           mount_obj.mountpoint, result['elapsed'])
+        if not ret:
+            return False
         g.log.info("Successful in mounting all mount objs for the volume %s",
                    cls.volname)
 
@@ -587,23 +596,33 @@ class GlusterBaseClass(TestCase):
             g.log.info("UnMounting volume '%s:%s' on '%s:%s'",
                        mount_obj.server_system, mount_obj.volname,
                        mount_obj.client_system, mount_obj.mountpoint)
-            ret = mount_obj.unmount()
-            if not ret:
+        ret, results = run_mount_op(mounts, 'unmount')
+        for result in results:
+            mount_obj = result['mount']
+            if not result['ret']:
                 g.log.error("Failed to unmount volume '%s:%s' on '%s:%s'",
                             mount_obj.server_system, mount_obj.volname,
                             mount_obj.client_system, mount_obj.mountpoint)
+            else:
+                g.log.info("Successful in unmounting volume '%s:%s' on "
+                           "'%s:%s' in %.2f seconds", mount_obj.server_system,
+                           mount_obj.volname, mount_obj.client_system,
+                           mount_obj.mountpoint, result['elapsed'])
+        if not ret:
+            # Get mounts info
+            g.log.info("Get mounts Info:")
+            log_mounts_info(cls.mounts)
 
-                # Get mounts info
-                g.log.info("Get mounts Info:")
-                log_mounts_info(cls.mounts)
-
-                return False
+            return False
 
-            g.log.info("Starting to delete the directory path used for "
-                       "mounting")
-            cmd = ('rm -rf %s' % mount_obj.mountpoint)
-            ret, _, err = g.run(
-                mount_obj.client_system, cmd, user=mount_obj.user)
+        g.log.info("Starting to delete the directory paths used for "
+                   "mounting")
+        procs = [(mount_obj, g.run_async(mount_obj.client_system,
+                                         'rm -rf %s' % mount_obj.mountpoint,
+                                         user=mount_obj.user))
+                 for mount_obj in mounts]
+        for mount_obj, proc in procs:
+            ret, _, err = proc.async_communicate()
             if ret:
                 g.log.error(
                     "failed to delete the directory path used for "
@@ -758,6 +777,13 @@ class GlusterBaseClass(TestCase):
         # Set mnode : Node on which gluster commands are executed
         cls.mnode = cls.all_servers[0]
 
+        # Resolve all the nodes at once, they are then looked up in the
+        # node registry for the rest of the run
+        get_node_registry().register(cls.all_servers + cls.all_clients)
+        # Map the glusterd peer UUIDs of the pool formed for the run, a
+        # failure only leaves the peers to be matched by name and IP
+        get_node_registry().register_peers(cls.mnode)
+
         # Server IP's
         cls.servers_ips = cls.get_ip_from_hostname(cls.servers)
 
@@ -1062,22 +1088,68 @@ class GlusterBaseClass(TestCase):
                 raise ExecutionError("Failed to setup nfs ganesha")
             g.log.info("Successful in setting up NFS Ganesha Cluster")
 
+        # Logs appended during each test are collected from the offsets
+        # marked in setUp
+        clients = []
+        if cls.mount_type is not None and "glusterfs" in cls.mount_type:
+            clients = cls.clients
+        cls.log_pipeline = LogPipeline(
+            cls.servers, cls.server_gluster_logs_dirs,
+            cls.server_gluster_logs_files, clients,
+            cls.client_gluster_logs_dirs, cls.client_gluster_logs_files)
+        cls.collect_logs = g.config.get('gluster', {}).get('collect_logs',
+                                                           False)
+
         msg = "Setupclass: %s : %s" % (cls.__name__, cls.glustotest_run_id)
         g.log.info(msg)
         cls.inject_msg_in_gluster_logs(msg)
 
+        # Profile the glustolibs calls of the tests if enabled in config
+        cls.call_profiling = is_call_profiling_enabled()
+        if cls.call_profiling:
+            enable_call_profiling()
+
         # Log the baseclass variables for debugging purposes
         g.log.debug("GlusterBaseClass Variables:\n %s", cls.__dict__)
 
     def setUp(self):
         msg = "Starting Test : %s : %s" % (self.id(), self.glustotest_run_id)
         g.log.info(msg)
-        self.inject_msg_in_gluster_logs(msg)
+        # Inject the msg and mark the offsets of the logs in one go
+        if not self.log_pipeline.mark(self.id(), inject=msg):
+            self.inject_msg_in_gluster_logs(msg)
+        if self.call_profiling:
+            start_test_profiling(self.id())
 
     def tearDown(self):
+        if self.collect_logs:
+            index = self.collect_test_logs()
+            g.log.info("Log records of %s during the test: %s", self.id(),
+                       index.counts('level'))
+            for record in index.query(level='C'):
+                g.log.error("Critical log message on %s: %s",
+                            record['node'], record['message'])
         msg = "Ending Test: %s : %s" % (self.id(), self.glustotest_run_id)
         g.log.info(msg)
         self.inject_msg_in_gluster_logs(msg)
+        if self.call_profiling:
+            stop_test_profiling()
+
+    def collect_test_logs(self, levels='WEC'):
+        """Collect the gluster logs appended since the start of the test
+
+        Kwargs:
+            levels (str): Levels of the records to collect.
+                Defaults to 'WEC' for warnings, errors and criticals.
+
+        Returns:
+            LogIndex: Index of the log records of the servers and clients.
+
+        Example:
+            index = self.collect_test_logs(levels='EC')
+            self.assertFalse(index.query(level='E', xlator='management'))
+        """
+        return self.log_pipeline.collect(self.id(), levels=levels)
 
     @classmethod
     def tearDownClass(cls):
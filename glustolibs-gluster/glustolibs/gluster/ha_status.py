@@ -0,0 +1,199 @@
+#  Copyright (C) 2021 Red Hat, Inc. <http://www.redhat.com>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License along
+#  with this program; if not, write to the Free Software Foundation, Inc.,
+#  51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+"""
+    Description: Collector of the status of the NFS-Ganesha HA and CTDB
+        clusters.
+
+    The status command is run once and its output parsed into a snapshot.
+    By default a fresh snapshot is collected on every call. To check several
+    health predicates against the same state, pass them one snapshot, or
+    pass a ttl to reuse the snapshot cached per node. Operations changing the
+    state of a cluster call invalidate_ha_status() so that a cached snapshot
+    is not reused past them.
+"""
+
+import re
+import time
+from glusto.core import Glusto as g
+
+# Default time in seconds for which a status snapshot is reused, 0 to always
+# collect a fresh one
+HA_STATUS_TTL = 0
+
+GANESHA_HA_STATUS_CMD = ("/usr/libexec/ganesha/ganesha-ha.sh --status "
+                         "/run/gluster/shared_storage/nfs-ganesha/")
+CTDB_STATUS_CMD = "ctdb status"
+# Suffix of the VIP resource of each node of the nfs-ganesha cluster
+_CLUSTER_IP_SUFFIX = "-cluster_ip-1"
+
+# Cached snapshots, {(kind, node): (time of collection, snapshot)}
+_HA_STATUS_CACHE = {}
+
+
+def parse_nfs_ganesha_ha_status(output):
+    """Parse the output of 'ganesha-ha.sh --status'.
+
+    Online: [ node1 node2 node3 ]
+
+    node1-cluster_ip-1 node1
+    node2-cluster_ip-1 node3
+    node3-cluster_ip-1 node3
+
+    Cluster HA Status: FAILOVER
+
+    Args:
+        output (str): Output of the status command.
+
+    Returns:
+        dict: Dict with 'status' (HEALTHY, FAILOVER, BAD or None if not
+            found), 'online' (list of online nodes), 'resources' (list of
+            the nodes owning a VIP resource, in the output order) and
+            'placements' (dict of node to the node its VIP is running on).
+    """
+    snapshot = {'status': None, 'online': [], 'resources': [],
+                'placements': {}}
+    for line in output.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith('Online'):
+            match = re.search(r'\[(.*)\]', line)
+            if match:
+                snapshot['online'] = match.group(1).split()
+        elif line.startswith('Cluster HA Status'):
+            snapshot['status'] = line.split(':', 1)[1].strip()
+        else:
+            fields = line.split()
+            node = fields[0]
+            if node.endswith(_CLUSTER_IP_SUFFIX):
+                node = node[:-len(_CLUSTER_IP_SUFFIX)]
+            snapshot['resources'].append(node)
+            snapshot['placements'][node] = (fields[1] if len(fields) > 1
+                                            else None)
+    return snapshot
+
+
+def parse_ctdb_status_snapshot(output):
+    """Parse the output of 'ctdb status'.
+
+    Number of nodes:4
+    pnn:0 10.70.46.1     OK (THIS NODE)
+    pnn:1 10.70.46.2     UNHEALTHY
+    ...
+    Recovery mode:NORMAL (0)
+    Recovery master:0
+
+    Args:
+        output (str): Output of the status command.
+
+    Returns:
+        dict: Dict with 'nodes' (dict of node ip to a dict with 'pnn',
+            'status' and 'this_node'), 'recovery_mode' and
+            'recovery_master' (None if not found).
+    """
+    snapshot = {'nodes': {}, 'recovery_mode': None, 'recovery_master': None}
+    for line in output.splitlines():
+        match = re.match(r'\s*pnn:(\d+)\s+(\S+)\s+(\S+)(.*)', line)
+        if match:
+            snapshot['nodes'][match.group(2)] = {
+                'pnn': int(match.group(1)),
+                'status': match.group(3),
+                'this_node': 'THIS NODE' in match.group(4)}
+            continue
+        match = re.match(r'\s*Recovery mode:\s*(\S+)', line)
+        if match:
+            snapshot['recovery_mode'] = match.group(1)
+            continue
+        match = re.match(r'\s*(?:Recovery master|Leader):\s*(\d+)', line)
+        if match:
+            snapshot['recovery_master'] = int(match.group(1))
+    return snapshot
+
+
+def _get_ha_status(kind, mnode, cmd, parser, ttl, refresh):
+    """Get a status snapshot from the cache or collect it."""
+    key = (kind, mnode)
+    if not refresh and key in _HA_STATUS_CACHE:
+        collected, snapshot = _HA_STATUS_CACHE[key]
+        if time.time() - collected < ttl:
+            return snapshot
+
+    ret, out, err = g.run(mnode, cmd)
+    if ret != 0:
+        g.log.error("Failed to get the %s status on %s: %s", kind, mnode,
+                    err)
+        _HA_STATUS_CACHE.pop(key, None)
+        return None
+    snapshot = parser(out)
+    _HA_STATUS_CACHE[key] = (time.time(), snapshot)
+    return snapshot
+
+
+def get_nfs_ganesha_ha_status(mnode, ttl=HA_STATUS_TTL, refresh=False):
+    """Get the status snapshot of the nfs-ganesha HA cluster.
+
+    Args:
+        mnode (str): Node on which the status command is executed.
+
+    Kwargs:
+        ttl (int): Time in seconds for which a cached snapshot is reused.
+            Defaults to HA_STATUS_TTL, i.e. a fresh snapshot is collected.
+        refresh (bool): If True, always run the status command.
+
+    Returns:
+        dict: Snapshot as returned by parse_nfs_ganesha_ha_status().
+        NoneType: None if the status command failed.
+
+    Example:
+        get_nfs_ganesha_ha_status("abc.com")
+    """
+    return _get_ha_status('nfs-ganesha', mnode, GANESHA_HA_STATUS_CMD,
+                          parse_nfs_ganesha_ha_status, ttl, refresh)
+
+
+def get_ctdb_status_snapshot(mnode, ttl=HA_STATUS_TTL, refresh=False):
+    """Get the status snapshot of the CTDB cluster.
+
+    Args:
+        mnode (str): Node on which the status command is executed.
+
+    Kwargs:
+        ttl (int): Time in seconds for which a cached snapshot is reused.
+            Defaults to HA_STATUS_TTL, i.e. a fresh snapshot is collected.
+        refresh (bool): If True, always run the status command.
+
+    Returns:
+        dict: Snapshot as returned by parse_ctdb_status_snapshot().
+        NoneType: None if the status command failed.
+
+    Example:
+        get_ctdb_status_snapshot("abc.com")
+    """
+    return _get_ha_status('ctdb', mnode, CTDB_STATUS_CMD,
+                          parse_ctdb_status_snapshot, ttl, refresh)
+
+
+def invalidate_ha_status(mnode=None):
+    """Drop the cached status snapshots.
+
+    Kwargs:
+        mnode (str): Node whose snapshots are dropped. Defaults to None, to
+            drop the snapshots of all the nodes.
+    """
+    for key in list(_HA_STATUS_CACHE):
+        if mnode is None or key[1] == mnode:
+            del _HA_STATUS_CACHE[key]
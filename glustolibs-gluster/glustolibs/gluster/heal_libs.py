@@ -173,14 +173,8 @@ def monitor_heal_completion(mnode, volname, timeout_period=1200,
         return False
 
     while time_counter > 0:
-        heal_complete = True
-        for brick in bricks_list:
-            brick_node, brick_path = brick.split(":")
-            cmd = ("ls -1 %s/.glusterfs/indices/xattrop/ | "
-                   "grep -ve \"xattrop-\" | wc -l" % brick_path)
-            ret, out, err = g.run(brick_node, cmd)
-            if out.strip('\n') != "0":
-                heal_complete = False
+        index_counts = get_xattrop_index_counts(bricks_list)
+        heal_complete = all(count == 0 for count in index_counts.values())
         if heal_complete:
             break
         else:
@@ -200,17 +194,58 @@ def monitor_heal_completion(mnode, volname, timeout_period=1200,
             return True
 
     g.log.info("Heal has not yet completed on volume %s" % volname)
-    for brick in bricks_list:
-        brick_node, brick_path = brick.split(":")
-        cmd = ("ls -1 %s/.glusterfs/indices/xattrop/ " % brick_path)
-        g.run(brick_node, cmd)
+    g.log.info("Entries in the xattrop index of the bricks: %s" %
+               get_xattrop_index_counts(bricks_list))
     return False
 
 
+def get_xattrop_index_counts(bricks):
+    """Count the entries to heal in the .glusterfs/indices/xattrop dir of
+        every brick, with one command per node run on all the nodes
+        concurrently.
+
+    Args:
+        bricks (list): List of bricks in the form node:brick_path.
+
+    Returns:
+        dict: dict with the bricks as keys and the number of entries in the
+            xattrop index of each brick as values, None if it could not be
+            counted.
+    """
+    bricks_per_node = {}
+    for brick in bricks:
+        brick_node, brick_path = brick.split(":", 1)
+        bricks_per_node.setdefault(brick_node, []).append(brick_path)
+
+    procs = {}
+    for brick_node, brick_paths in bricks_per_node.items():
+        cmd = ("for b in %s; do d=\"$b/.glusterfs/indices/xattrop\"; "
+               "if [ -d \"$d\" ]; then "
+               "echo \"$(ls -1 \"$d\" | grep -vc '^xattrop-') $b\"; "
+               "else echo \"- $b\"; fi; done"
+               % ' '.join("'%s'" % path for path in brick_paths))
+        procs[brick_node] = g.run_async(brick_node, cmd, log_level='DEBUG')
+
+    index_counts = dict((brick, None) for brick in bricks)
+    for brick_node, proc in procs.items():
+        ret, out, err = proc.async_communicate()
+        if ret != 0:
+            g.log.error("Failed to count the xattrop entries of the bricks "
+                        "on %s: %s" % (brick_node, err))
+            continue
+        for line in out.splitlines():
+            count, _, brick_path = line.partition(" ")
+            brick = "%s:%s" % (brick_node, brick_path)
+            if brick in index_counts and count.isdigit():
+                index_counts[brick] = int(count)
+    return index_counts
+
+
 def is_heal_complete(mnode, volname):
     """Verifies there are no pending heals on the volume.
-        The 'number of entries' in the output of heal info
-        for all the bricks should be 0 for heal to be completed.
+        The number of entries to heal of all the bricks, from heal info
+        summary, should be 0 for heal to be completed. The entries are not
+        listed.
 
     Args:
         mnode : Node on which commands are executed
@@ -219,21 +254,19 @@ def is_heal_complete(mnode, volname):
     Return:
         bool: True if heal is complete. False otherwise
     """
-    from glustolibs.gluster.heal_ops import get_heal_info
-    heal_info_data = get_heal_info(mnode, volname)
-    if heal_info_data is None:
+    from glustolibs.gluster.heal_ops import get_heal_info_counts
+    heal_info_counts = get_heal_info_counts(mnode, volname)
+    if not heal_info_counts:
         g.log.error("Unable to verify whether heal is successful or not on "
                     "volume %s" % volname)
         return False
 
-    heal_complete = True
-    for brick_heal_info_data in heal_info_data:
-        if brick_heal_info_data['numberOfEntries'] != '0':
-            heal_complete = False
-
-    if not heal_complete:
+    pending = dict((brick, counts['total'])
+                   for brick, counts in heal_info_counts.items()
+                   if counts['total'] != 0)
+    if pending:
         g.log.error("Heal is not complete on some of the bricks for the "
-                    "volume %s" % volname)
+                    "volume %s: %s" % (volname, pending))
         return False
     g.log.info("Heal is complete on all the bricks for the volume %s" %
                volname)
@@ -242,29 +275,40 @@ def is_heal_complete(mnode, volname):
 
 def is_volume_in_split_brain(mnode, volname):
     """Verifies there are no split-brain on the volume.
-        The 'number of entries' in the output of heal info split-brain
-        for all the bricks should be 0 for volume not to be in split-brain.
+        The number of entries in split-brain of all the bricks, from heal
+        info summary, should be 0 for volume not to be in split-brain. The
+        entries in split-brain are listed only if the summary is not
+        supported.
 
     Args:
         mnode : Node on which commands are executed
         volname : Name of the volume
 
     Return:
-        bool: True if volume is not in split-brain. False otherwise
+        bool: True if volume is in split-brain. False otherwise
     """
-    from glustolibs.gluster.heal_ops import get_heal_info_split_brain
-    heal_info_split_brain_data = get_heal_info_split_brain(mnode, volname)
-    if heal_info_split_brain_data is None:
-        g.log.error("Unable to verify whether volume %s is not in split-brain "
-                    "or not" % volname)
-        return False
-
-    split_brain = False
-    for brick_heal_info_split_brain_data in heal_info_split_brain_data:
-        if brick_heal_info_split_brain_data['numberOfEntries'] == '-':
-            continue
-        if brick_heal_info_split_brain_data['numberOfEntries'] != '0':
-            split_brain = True
+    from glustolibs.gluster.heal_ops import (get_heal_info_counts,
+                                             get_heal_info_split_brain)
+    heal_info_counts = get_heal_info_counts(mnode, volname) or {}
+    split_brain_counts = [counts['split_brain']
+                          for counts in heal_info_counts.values()
+                          if counts['status'] == 'Connected']
+    if split_brain_counts and None not in split_brain_counts:
+        split_brain = any(split_brain_counts)
+    else:
+        heal_info_split_brain_data = get_heal_info_split_brain(mnode,
+                                                               volname)
+        if heal_info_split_brain_data is None:
+            g.log.error("Unable to verify whether volume %s is not in "
+                        "split-brain or not" % volname)
+            return False
+
+        split_brain = False
+        for brick_heal_info_split_brain_data in heal_info_split_brain_data:
+            if brick_heal_info_split_brain_data['numberOfEntries'] == '-':
+                continue
+            if brick_heal_info_split_brain_data['numberOfEntries'] != '0':
+                split_brain = True
 
     if split_brain:
         g.log.error("Volume %s is in split-brain state." % volname)
@@ -427,3 +427,155 @@ def get_heal_info_split_brain_summary(mnode, volname):
             'numberOfEntries': info_data['numberOfEntries']
         }
     return heal_info_split_brain_summary_data
+
+
+def _to_count(value):
+    """Convert a number of entries of heal info to int, None for '-'."""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def get_heal_info_counts(mnode, volname):
+    """Get the number of entries to heal of each brick, without listing them.
+
+    The counts come from 'gluster volume heal <volname> info summary --xml'.
+    If the summary is not supported, the pending counts come from
+    'gluster volume heal <volname> statistics heal-count' and the
+    split-brain counts are None.
+
+    Args:
+        mnode : Node on which commands are executed
+        volname : Name of the volume
+
+    Returns:
+        NoneType: None if both commands failed.
+        dict: dict of dictionaries. brick names are the keys of the dict with
+            each key having brick's status and its 'total', 'pending',
+            'split_brain' and 'possibly_healing' numbers of entries as int,
+            None when unknown e.g. for an offline brick.
+            Example:
+                heal_info_counts = {
+                    'ijk.lab.eng.xyz.com:/bricks/brick0/testvol_brick0': {
+                        'status': 'Connected',
+                        'total': 11,
+                        'pending': 10,
+                        'split_brain': 1,
+                        'possibly_healing': 0
+                        }
+                    }
+    """
+    cmd = "gluster volume heal %s info summary --xml" % volname
+    ret, out, _ = g.run(mnode, cmd, log_level='DEBUG')
+    if ret == 0:
+        try:
+            root = etree.XML(out)
+        except etree.ParseError:
+            root = None
+        if root is not None and root.find("healInfo/bricks") is not None:
+            heal_info_counts = {}
+            for brick in root.findall("healInfo/bricks/brick"):
+                heal_info_counts[brick.findtext('name')] = {
+                    'status': brick.findtext('status'),
+                    'total': _to_count(
+                        brick.findtext('totalNumberOfEntries')),
+                    'pending': _to_count(
+                        brick.findtext('numberOfEntriesInHealPending')),
+                    'split_brain': _to_count(
+                        brick.findtext('numberOfEntriesInSplitBrain')),
+                    'possibly_healing': _to_count(
+                        brick.findtext('numberOfEntriesPossiblyHealing'))
+                }
+            return heal_info_counts
+
+    g.log.info("Heal info summary not available for the volume %s, "
+               "falling back to heal-count" % volname)
+    cmd = "gluster volume heal %s statistics heal-count" % volname
+    ret, out, _ = g.run(mnode, cmd, log_level='DEBUG')
+    if ret != 0:
+        g.log.error("Failed to get the heal counts of the volume %s" %
+                    volname)
+        return None
+
+    heal_info_counts, brick = {}, None
+    for line in out.splitlines():
+        line = line.strip()
+        if line.startswith("Brick "):
+            brick = line.split(" ", 1)[1]
+            heal_info_counts[brick] = {'status': None, 'total': None,
+                                       'pending': None, 'split_brain': None,
+                                       'possibly_healing': None}
+        elif brick is not None and line.startswith("Number of entries:"):
+            count = _to_count(line.split(":", 1)[1].strip())
+            heal_info_counts[brick]['total'] = count
+            heal_info_counts[brick]['pending'] = count
+        elif brick is not None and line.startswith("Status:"):
+            heal_info_counts[brick]['status'] = line.split(":", 1)[1].strip()
+    return heal_info_counts
+
+
+def get_heal_info_entries(mnode, volname, split_brain=False,
+                          max_entries=1000):
+    """List the entries to heal of each brick, up to max_entries in all.
+
+    The output of heal info is cut on the node once max_entries entries are
+    read, which also stops the enumeration of the remaining entries.
+
+    Args:
+        mnode : Node on which commands are executed
+        volname : Name of the volume
+
+    Kwargs:
+        split_brain (bool): If True, list only the entries in split-brain.
+            Defaults to False.
+        max_entries (int): Maximum number of entries listed. Defaults to
+            1000, None for all.
+
+    Returns:
+        NoneType: None if the heal info command failed.
+        dict: dict with 'bricks', a dict with the brick names as keys and
+            the lists of their entries (paths or '<gfid:...>') as values,
+            and 'truncated', True if entries were left out.
+            Example:
+                heal_info_entries = {
+                    'bricks': {
+                        'ijk.lab.eng.xyz.com:/bricks/brick0/testvol_brick0':
+                            ['/dir/file1', '<gfid:1ed0a8c9-...>']
+                        },
+                    'truncated': False
+                    }
+    """
+    cmd = "gluster volume heal %s info" % volname
+    if split_brain:
+        cmd += " split-brain"
+    if max_entries is not None:
+        # Print a marker and stop reading once max_entries entries are read
+        cmd = ("set -o pipefail; %s | awk -v max=%d '/^Brick /{print; next} "
+               "/^(Status|Number of entries)/ || NF == 0 {print; next} "
+               "++n > max {print \"### truncated\"; exit} {print}'"
+               % (cmd, max_entries))
+    ret, out, _ = g.run(mnode, cmd, log_level='DEBUG')
+    truncated = "### truncated" in out.splitlines()
+    # The heal info command is killed by SIGPIPE when the output is cut
+    if ret != 0 and not truncated:
+        g.log.error("Failed to get the heal info entries of the volume %s" %
+                    volname)
+        return None
+
+    bricks, brick = {}, None
+    for line in out.splitlines():
+        line = line.strip()
+        if line.startswith("Brick "):
+            brick = line.split(" ", 1)[1]
+            bricks[brick] = []
+        elif (brick is None or not line or line == "### truncated" or
+              line.startswith(("Status", "Number of entries"))):
+            continue
+        else:
+            for suffix in (" - Is in split-brain",
+                           " - Possibly undergoing heal"):
+                if line.endswith(suffix):
+                    line = line[:-len(suffix)]
+            bricks[brick].append(line)
+    return {'bricks': bricks, 'truncated': truncated}
@@ -22,6 +22,7 @@
 from glusto.core import Glusto as g
 from glustolibs.gluster.volume_ops import get_volume_info
 from glustolibs.gluster.mount_ops import mount_volume, umount_volume
+import json
 import re
 import time
 from collections import OrderedDict
@@ -767,13 +768,78 @@ def inject_msg_in_logs(nodes, log_msg, list_of_dirs=None, list_of_files=None):
     return _rc
 
 
+CRASH_SCANNER_SCRIPT = "/usr/share/glustolibs/scripts/crash_scanner.py"
+CORE_FILE_PATHS = ('/', '/var/log/core', '/tmp', '/var/crash', '~/')
+
+
+def scan_for_crashes(nodes, since, paths=CORE_FILE_PATHS, backtrace=True):
+    """Scan nodes for the crashes which happened after a given time.
+
+    One run of crash_scanner.py per node, on all the nodes concurrently,
+    looks for core files in the given paths, for the 'time of crash'
+    reports of the gluster logs and for the dumps of systemd-coredump.
+
+    Args:
+        nodes (list|str): Nodes to scan.
+        since (int|str): Epoch time after which crashes are reported, e.g.
+            the start time of the test as returned by 'date +%s'.
+
+    Kwargs:
+        paths (list): Dirs in which core files are looked for.
+            Defaults to CORE_FILE_PATHS.
+        backtrace (bool): If True, get the backtrace of the crashes, with
+            gdb for the core files if it is installed. Defaults to True.
+
+    Returns:
+        dict: Dict with the node as key and as value a list of crash records
+            sorted by time, or None if the node could not be scanned. Each
+            record is a dict with 'source' ('core', 'log' or 'coredumpctl'),
+            'path', 'time' (epoch), 'binary', 'pid', 'signal' and
+            'backtrace' (list of frames), unknown values being None.
+
+    Example:
+        crashes = scan_for_crashes(self.servers, test_timestamp)
+    """
+    # Imported here as misc_libs imports lib_utils
+    from glustolibs.misc.misc_libs import upload_scripts
+
+    if not isinstance(nodes, list):
+        nodes = [nodes]
+    results = dict((node, None) for node in nodes)
+    if not upload_scripts(nodes, CRASH_SCANNER_SCRIPT,
+                          "/usr/share/glustolibs/scripts/"):
+        g.log.error("Failed to upload %s to %s", CRASH_SCANNER_SCRIPT,
+                    nodes)
+        return results
+
+    cmd = "/usr/bin/env python %s -s %s%s%s" % (
+        CRASH_SCANNER_SCRIPT, int(float(str(since).strip())),
+        ''.join(" -p '%s'" % path for path in paths),
+        " -b" if backtrace else "")
+    procs = dict((node, g.run_async(node, cmd, log_level='DEBUG'))
+                 for node in nodes)
+    for node, proc in procs.items():
+        ret, out, err = proc.async_communicate()
+        if ret != 0:
+            g.log.error("Failed to scan %s for crashes: %s", node, err)
+            continue
+        try:
+            results[node] = json.loads(out)
+        except ValueError:
+            g.log.error("Invalid output of the crash scan of %s: %s", node,
+                        out)
+    return results
+
+
 def is_core_file_created(nodes, testrun_timestamp,
-                         paths=['/', '/var/log/core',
-                                '/tmp', '/var/crash', '~/']):
+                         paths=CORE_FILE_PATHS):
     '''
     Listing directories and files in "/", /var/log/core, /tmp,
     "/var/crash", "~/" directory for checking if the core file created or not
 
+    Crash reports in the gluster logs and dumps of systemd-coredump are
+    reported as well, see scan_for_crashes().
+
     Args:
 
     nodes(list):
@@ -788,51 +854,34 @@ def is_core_file_created(nodes, testrun_timestamp,
         "/var/log/core", "/var/crash", "~/"
        If test case need to verify core file in specific path,
        need to pass path from test method
+
+    Returns:
+        bool: True if no crash happened since testrun_timestamp on the
+            nodes which could be scanned. False otherwise. A node which
+            could not be scanned, e.g. on an ssh failure, is logged as an
+            error but does not fail the check, as before the scan.
     '''
+    crashes = scan_for_crashes(nodes, testrun_timestamp, paths)
     count = 0
-    cmd_list = []
-    for path in paths:
-        cmd = ' '.join(['cd', path, '&&', 'ls', 'core*'])
-        cmd_list.append(cmd)
-
-    # Checks for core file in "/", "/var/log/core", "/tmp" "/var/crash",
-    # "~/" directory
-    for node in nodes:
-        ret, logfiles, err = g.run(node, 'grep -r "time of crash" '
-                                         '/var/log/glusterfs/')
-        if ret == 0:
-            g.log.error(" Seems like there was a crash, kindly check "
-                        "the logfiles, even if you don't see a core file")
-            for logfile in logfiles.strip('\n').split('\n'):
-                g.log.error("Core was found in %s " % logfile.split(':')[0])
-        for cmd in cmd_list:
-            ret, out, _ = g.run(node, cmd)
-            g.log.info("storing all files and directory names into list")
-            dir_list = re.split(r'\s+', out)
-
-            # checking for core file created or not in "/"
-            # "/var/log/core", "/tmp" directory
-            g.log.info("checking core file created or not")
-            for file1 in dir_list:
-                if (re.search(r'\bcore\.[\S]+\b', file1)):
-                    file_path_list = re.split(r'[\s]+', cmd)
-                    file_path = file_path_list[1] + '/' + file1
-                    time_cmd = 'stat ' + '-c ' + '%X ' + file_path
-                    ret, file_timestamp, _ = g.run(node, time_cmd)
-                    file_timestamp = file_timestamp.strip()
-                    if(file_timestamp > testrun_timestamp):
-                        count += 1
-                        g.log.error("New core file was created and found  "
-                                    "at %s " % file1)
-                    else:
-                        g.log.info("Old core file Found")
+    for node, records in crashes.items():
+        if records is None:
+            g.log.error("Unable to scan %s for crashes", node)
+            continue
+        for record in records:
+            count += 1
+            g.log.error("Crash of %s (pid %s, signal %s) at %s found on %s "
+                        "in %s", record['binary'], record['pid'],
+                        record['signal'], record['time'], node,
+                        record['path'] or record['source'])
+            if record['backtrace']:
+                g.log.error("Backtrace:\n%s", '\n'.join(record['backtrace']))
+
     # return the status of core file
-    if (count >= 1):
-        g.log.error("Core file created glusterd crashed")
+    if count:
+        g.log.error("Core file created or crash found")
         return False
-    else:
-        g.log.info("No core files found ")
-        return True
+    g.log.info("No core files found ")
+    return True
 
 
 def remove_service_from_firewall(nodes, firewall_service, permanent=False):
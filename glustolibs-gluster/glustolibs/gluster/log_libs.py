@@ -0,0 +1,233 @@
+#  Copyright (C) 2021 Red Hat, Inc. <http://www.redhat.com>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License along
+#  with this program; if not, write to the Free Software Foundation, Inc.,
+#  51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+"""
+    Description: Pipeline collecting the gluster logs of the servers and
+        clients appended since a mark, parsed into records and indexed by
+        level, message id and xlator.
+"""
+
+import json
+import re
+from glusto.core import Glusto as g
+from glustolibs.misc.misc_libs import upload_scripts
+
+LOG_COLLECTOR_SCRIPT = "/usr/share/glustolibs/scripts/log_collector.py"
+
+
+class LogIndex(object):
+    """Searchable index of the gluster log records of a run.
+
+    Records are dicts with 'node', 'file', 'time', 'level', 'msgid',
+    'source', 'xlator' and 'message'. The counts per level, message id and
+    xlator cover all the collected records, including those dropped when a
+    node had more records than the collection limit.
+
+    Example:
+        index = pipeline.collect(self.id(), levels='EC')
+        errors = index.query(level='E', xlator='testvol-replicate-0')
+        g.log.info(index.counts('msgid'))
+    """
+
+    def __init__(self):
+        self.records = []
+        self.truncated = []
+        self._counts = {'level': {}, 'msgid': {}, 'xlator': {}}
+
+    def add(self, node, records, summary=None):
+        """Add the records collected on a node.
+
+        Args:
+            node (str): Node of the records.
+            records (list): Record dicts.
+
+        Kwargs:
+            summary (dict): Counts per 'level', 'msgid' and 'xlator' of all
+                the records of the node, and 'truncated'. Defaults to None
+                to count the given records.
+        """
+        for record in records:
+            record['node'] = node
+        self.records.extend(records)
+        if summary is None:
+            summary = {'level': {}, 'msgid': {}, 'xlator': {}}
+            for record in records:
+                for key in summary:
+                    value = str(record[key])
+                    summary[key][value] = summary[key].get(value, 0) + 1
+        elif summary.get('truncated'):
+            self.truncated.append(node)
+        for key, counts in self._counts.items():
+            for value, count in summary.get(key, {}).items():
+                counts[value] = counts.get(value, 0) + count
+
+    def counts(self, key='level'):
+        """Get the number of records per 'level', 'msgid' or 'xlator'."""
+        return dict(self._counts[key])
+
+    def query(self, level=None, msgid=None, xlator=None, node=None,
+              pattern=None):
+        """Find the records matching all the given criteria.
+
+        Kwargs:
+            level (str): Level(s) of the records, e.g. 'E' or 'EC'.
+            msgid (int): Message id of the records.
+            xlator (str): Xlator of the records, e.g. 'testvol-client-0'.
+            node (str): Node of the records.
+            pattern (str): Regex searched in the message of the records.
+
+        Returns:
+            list: Matching records in the order they were collected.
+        """
+        regex = re.compile(pattern) if pattern else None
+        return [record for record in self.records
+                if (level is None or record['level'] in level) and
+                (msgid is None or record['msgid'] == msgid) and
+                (xlator is None or record['xlator'] == xlator) and
+                (node is None or record['node'] == node) and
+                (regex is None or regex.search(record['message']))]
+
+
+class LogPipeline(object):
+    """Mark and collect the gluster logs of the servers and clients.
+
+    mark() saves on every node the size of each log, optionally after
+    appending a message to it. collect() then fetches only the bytes
+    appended since the mark, parsed on the node by log_collector.py. Both
+    run on all the nodes concurrently.
+
+    Example:
+        pipeline = LogPipeline(servers, ["/var/log/glusterfs"],
+                               clients=clients)
+        pipeline.mark(self.id(), inject="Starting Test")
+        ... run the test ...
+        index = pipeline.collect(self.id(), levels='EC')
+        self.assertFalse(index.query(level='C'))
+    """
+
+    def __init__(self, servers, server_dirs, server_files=None, clients=None,
+                 client_dirs=None, client_files=None):
+        """
+        Args:
+            servers (list): Servers whose logs are collected.
+            server_dirs (list): Dirs whose *.log files are collected on the
+                servers.
+
+        Kwargs:
+            server_files (list): Other log files of the servers.
+            clients (list): Clients whose logs are collected.
+            client_dirs (list): Dirs whose *.log files are collected on the
+                clients. Defaults to the server dirs.
+            client_files (list): Other log files of the clients.
+        """
+        self.nodes = {}
+        for node in servers:
+            self.nodes[node] = (server_dirs, server_files or [])
+        for node in clients or []:
+            dirs, files = self.nodes.get(node, ([], []))
+            self.nodes[node] = (
+                sorted(set(dirs) | set(client_dirs or server_dirs)),
+                sorted(set(files) | set(client_files or [])))
+        self._uploaded = False
+
+    def _run(self, action, name, options=''):
+        """Run log_collector.py on all the nodes, return {node: output}."""
+        if not self._uploaded:
+            if not upload_scripts(list(self.nodes), LOG_COLLECTOR_SCRIPT,
+                                  "/usr/share/glustolibs/scripts/"):
+                g.log.error("Failed to upload %s to %s", LOG_COLLECTOR_SCRIPT,
+                            list(self.nodes))
+                return {}
+            self._uploaded = True
+
+        procs = {}
+        for node, (dirs, files) in self.nodes.items():
+            cmd = ("/usr/bin/env python %s %s '%s'%s%s%s"
+                   % (LOG_COLLECTOR_SCRIPT, action, name,
+                      ''.join(" -d '%s'" % log_dir for log_dir in dirs),
+                      ''.join(" -f '%s'" % log_file for log_file in files),
+                      options))
+            procs[node] = g.run_async(node, cmd, log_level='DEBUG')
+        outputs = {}
+        for node, proc in procs.items():
+            ret, out, err = proc.async_communicate()
+            if ret != 0:
+                g.log.error("Failed to %s the logs of %s: %s", action, node,
+                            err)
+                continue
+            outputs[node] = out
+        return outputs
+
+    def mark(self, name, inject=None):
+        """Mark the current end of the logs of all the nodes.
+
+        Args:
+            name (str): Name of the mark, e.g. the id of the test.
+
+        Kwargs:
+            inject (str): Message appended to every log before the mark.
+                Defaults to None.
+
+        Returns:
+            bool: True if the logs of all the nodes were marked.
+                False otherwise.
+        """
+        options = ''
+        if inject:
+            options = " -i '%s'" % inject.replace("'", "'\\''")
+        return len(self._run('mark', name, options)) == len(self.nodes)
+
+    def collect(self, name, levels=None, max_records=10000, index=None):
+        """Collect the logs of all the nodes appended since a mark.
+
+        Args:
+            name (str): Name of the mark.
+
+        Kwargs:
+            levels (str): Levels of the records to collect, e.g. 'EC' for
+                errors and criticals. Defaults to None for all.
+            max_records (int): Maximum number of records fetched per node.
+                Defaults to 10000.
+            index (LogIndex): Index to add the records to, e.g. to index a
+                whole run. Defaults to None for a new index.
+
+        Returns:
+            LogIndex: Index of the collected records.
+        """
+        options = " -m %d" % max_records
+        if levels:
+            options += " -l %s" % levels
+        if index is None:
+            index = LogIndex()
+        outputs = self._run('collect', name, options)
+        for node, out in outputs.items():
+            records, summary = [], None
+            for line in out.splitlines():
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if 'summary' in record:
+                    summary = record['summary']
+                else:
+                    records.append(record)
+            index.add(node, records, summary)
+            if summary and summary['truncated']:
+                g.log.warning("Collected only %d of the log records of %s",
+                              max_records, node)
+        for node in set(self.nodes) - set(outputs):
+            g.log.error("Logs of %s not collected", node)
+        return index
@@ -22,6 +22,18 @@
 from glusto.core import Glusto as g
 from glustolibs.gluster.windows_libs import powershell
 import copy
+import threading
+import time
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+# Maximum number of mounts mounted or unmounted at once
+MOUNT_MAX_WORKERS = 8
+# Printed by the mount command if the volume is already mounted
+_ALREADY_MOUNTED = "ALREADY_MOUNTED"
 
 
 class GlusterMount():
@@ -296,17 +308,19 @@ def mount_volume(volname, mtype, mpoint, mserver, mclient, options='',
         tuple: Tuple containing three elements (ret, out, err).
             (0, '', '') if already mounted.
             (1, '', '') if setup_samba_service fails in case of smb.
-            (ret, out, err) of mount commnd execution otherwise.
+            (ret, out, err) of mount commnd execution otherwise. ret is
+            not 0 as well if the mountpoint is not mounted after the mount
+            command succeeded.
     """
-    if is_mounted(volname, mpoint, mserver, mclient, mtype, user):
-        g.log.debug("Volume %s is already mounted at %s" %
-                    (volname, mpoint))
-        return (0, '', '')
-
     if options != '':
         options = "-o %s" % options
 
     if mtype == 'smb':
+        if is_mounted(volname, mpoint, mserver, mclient, mtype, user):
+            g.log.debug("Volume %s is already mounted at %s" %
+                        (volname, mpoint))
+            return (0, '', '')
+
         if smbuser is None or smbpasswd is None:
             g.log.error("smbuser and smbpasswd to be passed as parameters "
                         "for cifs mounts")
@@ -365,12 +379,20 @@ def mount_volume(volname, mtype, mpoint, mserver, mclient, options='',
                                                  cifs_options, mserver,
                                                  volname, mpoint))
 
-    # Create mount dir
-    _, _, _ = g.run(mclient, "test -d %s || mkdir -p %s" % (mpoint, mpoint),
-                    user=user)
-
-    # Create mount
-    return g.run(mclient, mcmd, user=user)
+    # Check whether it is already mounted, create the mount dir, mount and
+    # verify the mount in a single command
+    cmd = ("test -d %s || mkdir -p %s; %s && mountpoint -q %s"
+           % (mpoint, mpoint, mcmd, mpoint))
+    if mserver:
+        cmd = ("if mount | egrep '%s | %s' | grep -q \"%s\"; then echo %s; "
+               "exit 0; fi; %s" % (volname, mpoint, mserver,
+                                   _ALREADY_MOUNTED, cmd))
+    ret, out, err = g.run(mclient, cmd, user=user)
+    if ret == 0 and out.strip() == _ALREADY_MOUNTED:
+        g.log.debug("Volume %s is already mounted at %s" %
+                    (volname, mpoint))
+        return (0, '', '')
+    return ret, out, err
 
 
 def umount_volume(mclient, mpoint, mtype='', user='root'):
@@ -475,13 +497,89 @@ def create_mount_objs(mounts):
     return mount_obj_list
 
 
-def create_mounts(mount_objs):
+def _run_mount_op(mount_obj, op):
+    """Run the mount or unmount of a mount object and time it."""
+    start_time = time.time()
+    ret = getattr(mount_obj, op)()
+    return {'mount': mount_obj, 'ret': ret,
+            'elapsed': time.time() - start_time}
+
+
+def run_mount_op(mount_objs, op, max_workers=MOUNT_MAX_WORKERS):
+    """Mount or unmount the mount objects concurrently.
+
+    Args:
+        mount_objs (list): list of mounts objects with each element being
+            the GlusterMount class object
+        op (str): 'mount' or 'unmount'.
+
+    Kwargs:
+        max_workers (int): Maximum number of mounts done at once.
+            Defaults to MOUNT_MAX_WORKERS.
+
+    Returns:
+        tuple: (ret, results) where ret is True if the op is successful for
+            all mount_objs and results a list, in the order of mount_objs,
+            of dicts with 'mount' (the mount object), 'ret' and 'elapsed'
+            (time taken in seconds).
+
+    Example:
+        ret, results = run_mount_op(mount_objs, 'mount', max_workers=4)
+    """
+    pending = queue.Queue()
+    for index, mount_obj in enumerate(mount_objs):
+        pending.put((index, mount_obj))
+    results = [None] * len(mount_objs)
+
+    def worker():
+        while True:
+            try:
+                index, mount_obj = pending.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                results[index] = _run_mount_op(mount_obj, op)
+            except Exception as err:
+                g.log.error("%s of %s:%s raised: %s", op,
+                            mount_obj.client_system, mount_obj.mountpoint,
+                            err)
+                results[index] = {'mount': mount_obj, 'ret': False,
+                                  'elapsed': None}
+
+    threads = [threading.Thread(target=worker)
+               for _ in range(max(1, min(max_workers, len(mount_objs))))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    rc = True
+    for result in results:
+        mount_obj = result['mount']
+        if result['ret']:
+            g.log.debug("%s of %s on %s:%s took %.2f seconds", op,
+                        mount_obj.volname, mount_obj.client_system,
+                        mount_obj.mountpoint, result['elapsed'])
+        else:
+            g.log.error("Failed to %s %s on %s:%s", op, mount_obj.volname,
+                        mount_obj.client_system, mount_obj.mountpoint)
+            rc = False
+    return rc, results
+
+
+def create_mounts(mount_objs, max_workers=MOUNT_MAX_WORKERS):
     """Creates Mounts using the details as specified in the each mount obj
 
+    The mounts are created concurrently, see run_mount_op().
+
     Args:
         mount_objs (list): list of mounts objects with each element being
             the GlusterMount class object
 
+    Kwargs:
+        max_workers (int): Maximum number of mounts created at once.
+            Defaults to MOUNT_MAX_WORKERS.
+
     Returns:
         bool : True if creating the mount for all mount_objs is successful.
             False otherwise.
@@ -489,21 +587,23 @@ def create_mounts(mount_objs):
     Example:
         ret = create_mounts(create_mount_objs(mounts))
     """
-    rc = True
-    for mount_obj in mount_objs:
-        ret = mount_obj.mount()
-        if not ret:
-            rc = False
-    return rc
+    ret, _ = run_mount_op(mount_objs, 'mount', max_workers)
+    return ret
 
 
-def unmount_mounts(mount_objs):
-    """Creates Mounts using the details as specified in the each mount obj
+def unmount_mounts(mount_objs, max_workers=MOUNT_MAX_WORKERS):
+    """Unmounts the mounts specified in the each mount obj
+
+    The mounts are unmounted concurrently, see run_mount_op().
 
     Args:
         mount_objs (list): list of mounts objects with each element being
             the GlusterMount class object
 
+    Kwargs:
+        max_workers (int): Maximum number of mounts unmounted at once.
+            Defaults to MOUNT_MAX_WORKERS.
+
     Returns:
         bool : True if unmounting the mount for all mount_objs is successful.
             False otherwise.
@@ -511,9 +611,5 @@ def unmount_mounts(mount_objs):
     Example:
         ret = unmount_mounts(create_mount_objs(mounts))
     """
-    rc = True
-    for mount_obj in mount_objs:
-        ret = mount_obj.unmount()
-        if not ret:
-            rc = False
-    return rc
+    ret, _ = run_mount_op(mount_objs, 'unmount', max_workers)
+    return ret
@@ -22,7 +22,6 @@
 """
 
 import time
-import socket
 import re
 from glusto.core import Glusto as g
 from glustolibs.gluster.nfs_ganesha_ops import (
@@ -34,6 +33,7 @@ from glustolibs.gluster.nfs_ganesha_ops import (
     ganesha_client_firewall_settings)
 from glustolibs.gluster.volume_libs import is_volume_exported
 from glustolibs.gluster.lib_utils import is_rhel7
+from glustolibs.gluster.node_identity import get_node_registry
 
 
 def setup_nfs_ganesha(cls):
@@ -131,7 +131,7 @@ def setup_nfs_ganesha(cls):
         for client in cls.clients:
             cmd = ("if [ -z \"$(grep -R \"%s\" /etc/hosts)\" ]; then "
                    "echo \"%s %s\" >> /etc/hosts; fi"
-                   % (client, socket.gethostbyname(client), client))
+                   % (client, get_node_registry().get_ip(client), client))
             ret, _, _ = g.run(server, cmd)
             if ret != 0:
                 g.log.error("Failed to add entry of client %s in "
@@ -142,7 +142,7 @@ def setup_nfs_ganesha(cls):
         for server in cls.servers:
             cmd = ("if [ -z \"$(grep -R \"%s\" /etc/hosts)\" ]; then "
                    "echo \"%s %s\" >> /etc/hosts; fi"
-                   % (server, socket.gethostbyname(server), server))
+                   % (server, get_node_registry().get_ip(server), server))
             ret, _, _ = g.run(client, cmd)
             if ret != 0:
                 g.log.error("Failed to add entry of server %s in "
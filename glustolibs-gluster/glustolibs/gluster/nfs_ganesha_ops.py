@@ -29,6 +29,8 @@ from glustolibs.gluster.lib_utils import (add_services_to_firewall,
                                           is_rhel7)
 from glustolibs.gluster.shared_storage_ops import enable_shared_storage
 from glustolibs.gluster.peer_ops import peer_probe_servers
+from glustolibs.gluster.ha_status import (get_nfs_ganesha_ha_status,
+                                          invalidate_ha_status)
 
 GDEPLOY_CONF_DIR = "/usr/share/glustolibs/gdeploy_configs/"
 
@@ -50,6 +52,7 @@ def teardown_nfs_ganesha_cluster(servers, force=False):
     Example:
         teardown_nfs_ganesha_cluster(servers)
     """
+    invalidate_ha_status()
     # Copy ganesha.conf before proceeding to clean up
     for server in servers:
         cmd = "cp /etc/ganesha/ganesha.conf ganesha.conf"
@@ -100,7 +103,7 @@ def add_node_to_nfs_ganesha_cluster(servers, node_to_add, vip):
     Example:
         add_node_to_nfs_ganesha_cluster(servers, node_to_add, vip)
     """
-
+    invalidate_ha_status()
     conf_file = "add_node_to_nfs_ganesha_cluster.jinja"
     gdeploy_config_file = GDEPLOY_CONF_DIR + conf_file
     tmp_gdeploy_config_file = ("/tmp/" + os.path.splitext(conf_file)[0] +
@@ -156,7 +159,7 @@ def delete_node_from_nfs_ganesha_cluster(servers, node_to_delete):
     Example:
         delete_node_from_nfs_ganesha_cluster(servers, node_to_delete)
     """
-
+    invalidate_ha_status()
     conf_file = "delete_node_from_nfs_ganesha_cluster.jinja"
     gdeploy_config_file = GDEPLOY_CONF_DIR + conf_file
     tmp_gdeploy_config_file = ("/tmp/" + os.path.splitext(conf_file)[0] +
@@ -218,6 +221,7 @@ def enable_nfs_ganesha(mnode):
     """
 
     cmd = "gluster nfs-ganesha enable --mode=script"
+    invalidate_ha_status()
     return g.run(mnode, cmd)
 
 
@@ -243,6 +247,7 @@ def disable_nfs_ganesha(mnode):
     """
 
     cmd = "gluster nfs-ganesha disable --mode=script"
+    invalidate_ha_status()
     return g.run(mnode, cmd)
 
 
@@ -352,7 +357,7 @@ def update_volume_export_configuration(mnode, volname, config_to_update):
     return True
 
 
-def is_nfs_ganesha_cluster_in_healthy_state(mnode):
+def is_nfs_ganesha_cluster_in_healthy_state(mnode, snapshot=None):
     """
        Checks whether nfs ganesha cluster is in healthy state.
 
@@ -360,6 +365,10 @@ def is_nfs_ganesha_cluster_in_healthy_state(mnode):
         mnode (str): Node in which cmd command will
             be executed.
 
+    Kwargs:
+        snapshot (dict): Status snapshot as returned by
+            get_nfs_ganesha_ha_status(), collected if not given.
+
     Returns:
         bool : True if nfs ganesha cluster is in healthy state.
             False otherwise
@@ -367,59 +376,31 @@ def is_nfs_ganesha_cluster_in_healthy_state(mnode):
     Example:
         is_nfs_ganesha_cluster_in_healthy_state(mnode)
     """
-
-    cmd = ("/usr/libexec/ganesha/ganesha-ha.sh --status " +
-           "/run/gluster/shared_storage/nfs-ganesha/ | grep " +
-           " 'Cluster HA Status' | cut -d ' ' -f 4 ")
-
-    retcode, stdout, _ = g.run(mnode, cmd)
-    if retcode != 0:
+    if snapshot is None:
+        snapshot = get_nfs_ganesha_ha_status(mnode)
+    if snapshot is None:
         g.log.error("Failed to execute nfs-ganesha status command to check "
                     "if cluster is in healthy state")
         return False
 
-    if stdout.strip('\n') != "HEALTHY":
+    if snapshot['status'] != "HEALTHY":
         g.log.error("nfs-ganesha cluster is not in healthy state. Current "
-                    "cluster state: %s " % stdout)
-        return False
-
-    cmd = ("/usr/libexec/ganesha/ganesha-ha.sh --status " +
-           "/run/gluster/shared_storage/nfs-ganesha/ | grep -v" +
-           " 'Online' | grep -v 'Cluster' | cut -d ' ' -f 1 | " +
-           "sed s/'-cluster_ip-1'//g")
-
-    retcode, stdout, _ = g.run(mnode, cmd)
-    if retcode != 0:
-        g.log.error("Failed to execute nfs-ganesha status command to parse "
-                    "for the cluster resources")
+                    "cluster state: %s ", snapshot['status'])
         return False
 
-    cluster_list = stdout.split("\n")
-    cluster_list = list(filter(None, cluster_list))
-
-    cmd = ("/usr/libexec/ganesha/ganesha-ha.sh --status " +
-           "/run/gluster/shared_storage/nfs-ganesha/ | grep -v" +
-           " 'Online' | grep -v 'Cluster' | cut -d ' ' -f 1 | " +
-           "sed s/'-cluster_ip-1'//g")
-
-    retcode, stdout, _ = g.run(mnode, cmd)
-    if retcode != 0:
-        g.log.error("Failed to execute nfs-ganesha status command to parse "
-                    "for the hostnames in cluster")
-        return False
-
-    host_list = stdout.split("\n")
-    host_list = list(filter(None, host_list))
-
-    if (cluster_list != []) and (cluster_list == host_list):
+    misplaced = [node for node in snapshot['resources']
+                 if snapshot['placements'][node] != node]
+    if snapshot['resources'] and not misplaced:
         g.log.info("nfs ganesha cluster is in HEALTHY state")
         return True
 
-    g.log.error("nfs ganesha cluster is not in HEALTHY state")
+    g.log.error("nfs ganesha cluster is not in HEALTHY state, VIPs of %s "
+                "are not on their nodes", misplaced)
     return False
 
 
-def is_nfs_ganesha_cluster_in_failover_state(mnode, failed_nodes):
+def is_nfs_ganesha_cluster_in_failover_state(mnode, failed_nodes,
+                                             snapshot=None):
     """
        Checks whether nfs ganesha cluster is in failover state.
 
@@ -429,6 +410,10 @@ def is_nfs_ganesha_cluster_in_failover_state(mnode, failed_nodes):
         failed_nodes (list): Nodes in which nfs-ganesha process
             are down.
 
+    Kwargs:
+        snapshot (dict): Status snapshot as returned by
+            get_nfs_ganesha_ha_status(), collected if not given.
+
     Returns:
         bool : True if nfs ganesha cluster is in failover state.
             False otherwise
@@ -436,72 +421,40 @@ def is_nfs_ganesha_cluster_in_failover_state(mnode, failed_nodes):
     Example:
         is_nfs_ganesha_cluster_in_failover_state(mnode, failed_nodes)
     """
-
-    cmd = ("/usr/libexec/ganesha/ganesha-ha.sh --status " +
-           "/run/gluster/shared_storage/nfs-ganesha/ | grep " +
-           " 'Cluster HA Status' | cut -d ' ' -f 4 ")
-
-    retcode, stdout, _ = g.run(mnode, cmd)
-    if retcode != 0:
+    if snapshot is None:
+        snapshot = get_nfs_ganesha_ha_status(mnode)
+    if snapshot is None:
         g.log.error("Failed to execute nfs-ganesha status command to check "
                     "if cluster is in failover state")
         return False
 
-    if stdout.strip('\n') != "FAILOVER":
+    if snapshot['status'] != "FAILOVER":
         g.log.error("nfs-ganesha cluster is not in failover state. Current "
-                    "cluster state: %s " % stdout)
+                    "cluster state: %s ", snapshot['status'])
         return False
 
-    cmd = ("/usr/libexec/ganesha/ganesha-ha.sh --status " +
-           "/run/gluster/shared_storage/nfs-ganesha/ | grep -v" +
-           " 'Online' | grep -v 'Cluster' | cut -d ' ' -f 1 | " +
-           "sed s/'-cluster_ip-1'//g")
-
-    retcode, stdout, _ = g.run(mnode, cmd)
-    if retcode != 0:
-        g.log.error("Failed to execute nfs-ganesha status command to parse "
-                    "for the cluster resources")
-        return False
-
-    cluster_list = stdout.split("\n")
-    cluster_list = list(filter(None, cluster_list))
-
-    cmd = ("/usr/libexec/ganesha/ganesha-ha.sh --status " +
-           "/run/gluster/shared_storage/nfs-ganesha/ | grep -v" +
-           " 'Online' | grep -v 'Cluster' | cut -d ' ' -f 2 | " +
-           "sed s/'-cluster_ip-1'//g")
-
-    retcode, stdout, _ = g.run(mnode, cmd)
-    if retcode != 0:
-        g.log.error("Failed to execute nfs-ganesha status command to parse "
-                    "for the hostnames in cluster")
-        return False
-
-    host_list = stdout.split("\n")
-    host_list = list(filter(None, host_list))
-
     ret = True
-    for cluster_node, host_node in zip(cluster_list, host_list):
+    for cluster_node in snapshot['resources']:
+        host_node = snapshot['placements'][cluster_node]
         if cluster_node in failed_nodes:
             if cluster_node == host_node:
                 g.log.error("failover status: failed node %s isn't taken over"
-                            " by other node in nfs-ganesha cluster" %
+                            " by other node in nfs-ganesha cluster",
                             cluster_node)
                 ret = False
             else:
                 g.log.info("failover status: failed node %s is successfully "
-                           "failovered to node %s" %
-                           (cluster_node, host_node))
+                           "failovered to node %s", cluster_node, host_node)
         else:
             if cluster_node != host_node:
                 g.log.error("Unexpected. Other nodes are in failover state. "
                             "Node %s is takenover by node %s in nfs-ganesha "
-                            "cluster" % (cluster_node, host_node))
+                            "cluster", cluster_node, host_node)
                 ret = False
     return ret
 
 
-def is_nfs_ganesha_cluster_in_bad_state(mnode):
+def is_nfs_ganesha_cluster_in_bad_state(mnode, snapshot=None):
     """
        Checks whether nfs ganesha cluster is in bad state.
 
@@ -509,6 +462,10 @@ def is_nfs_ganesha_cluster_in_bad_state(mnode):
         mnode (str): Node in which cmd command will
             be executed.
 
+    Kwargs:
+        snapshot (dict): Status snapshot as returned by
+            get_nfs_ganesha_ha_status(), collected if not given.
+
     Returns:
         bool : True if nfs ganesha cluster is in bad state.
             False otherwise
@@ -516,24 +473,21 @@ def is_nfs_ganesha_cluster_in_bad_state(mnode):
     Example:
         is_nfs_ganesha_cluster_in_bad_state(mnode)
     """
-
-    cmd = ("/usr/libexec/ganesha/ganesha-ha.sh --status " +
-           "/run/gluster/shared_storage/nfs-ganesha/ | grep " +
-           " 'Cluster HA Status' | cut -d ' ' -f 4 ")
-
-    retcode, stdout, _ = g.run(mnode, cmd)
-    if retcode != 0:
+    if snapshot is None:
+        snapshot = get_nfs_ganesha_ha_status(mnode)
+    if snapshot is None:
         g.log.error("Failed to execute nfs-ganesha status command to check "
                     "if cluster is in bad state")
         return False
 
-    if stdout.strip('\n') != "BAD":
+    if snapshot['status'] != "BAD":
         g.log.error("nfs-ganesha cluster is not in bad state. Current "
-                    "cluster state: %s " % stdout)
+                    "cluster state: %s ", snapshot['status'])
         return False
+    return True
 
 
-def is_nfs_ganesha_cluster_exists(mnode):
+def is_nfs_ganesha_cluster_exists(mnode, snapshot=None):
     """
        Checks whether nfs ganesha cluster exists.
 
@@ -541,6 +495,10 @@ def is_nfs_ganesha_cluster_exists(mnode):
         mnode (str): Node in which cmd command will
             be executed.
 
+    Kwargs:
+        snapshot (dict): Status snapshot as returned by
+            get_nfs_ganesha_ha_status(), collected if not given.
+
     Returns:
         bool : True if nfs ganesha cluster exists.
             False otherwise
@@ -548,22 +506,14 @@ def is_nfs_ganesha_cluster_exists(mnode):
     Example:
         is_nfs_ganesha_cluster_exists(mnode)
     """
-
-    cmd = ("/usr/libexec/ganesha/ganesha-ha.sh --status " +
-           "/run/gluster/shared_storage/nfs-ganesha/ | grep -v" +
-           " 'Online' | grep -v 'Cluster' | cut -d ' ' -f 1 | " +
-           "sed s/'-cluster_ip-1'//g")
-
-    retcode, stdout, _ = g.run(mnode, cmd)
-    if retcode != 0:
+    if snapshot is None:
+        snapshot = get_nfs_ganesha_ha_status(mnode)
+    if snapshot is None:
         g.log.error("Failed to execute nfs-ganesha status command to parse "
                     "for the cluster resources")
         return False
 
-    cluster_list = stdout.split("\n")
-    cluster_list = list(filter(None, cluster_list))
-
-    if cluster_list != []:
+    if snapshot['resources']:
         g.log.info("nfs ganesha cluster exists")
         return True
 
@@ -593,6 +543,7 @@ def stop_nfs_ganesha_service(mnode):
     """
 
     cmd = "systemctl stop nfs-ganesha"
+    invalidate_ha_status()
     return g.run(mnode, cmd)
 
 
@@ -618,6 +569,7 @@ def start_nfs_ganesha_service(mnode):
     """
 
     cmd = "systemctl start nfs-ganesha"
+    invalidate_ha_status()
     return g.run(mnode, cmd)
 
 
@@ -643,6 +595,7 @@ def kill_nfs_ganesha_service(mnode):
     """
 
     cmd = "kill -9 $(pgrep ganesha.nfsd)"
+    invalidate_ha_status()
     return g.run(mnode, cmd)
 
 
@@ -668,6 +621,7 @@ def start_pacemaker_service(mnode):
     """
 
     cmd = "systemctl start pacemaker"
+    invalidate_ha_status()
     return g.run(mnode, cmd)
 
 
@@ -685,6 +639,7 @@ def create_nfs_ganesha_cluster(servers, vips):
     # pylint: disable=too-many-return-statements
     # pylint: disable=too-many-branches
     # pylint: disable=too-many-statements
+    invalidate_ha_status()
     ganesha_mnode = servers[0]
 
     # Configure ports in ganesha servers for RHEL7
@@ -0,0 +1,250 @@
+#  Copyright (C) 2021 Red Hat, Inc. <http://www.redhat.com>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License along
+#  with this program; if not, write to the Free Software Foundation, Inc.,
+#  51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+"""
+    Description: Registry of the identities of the nodes of a run, mapping
+        hostnames, IPs, FQDNs and glusterd peer UUIDs of each node both
+        ways, so that hosts are resolved once per run.
+"""
+
+import re
+import socket
+import threading
+from glusto.core import Glusto as g
+
+_UUID_RE = re.compile(r'^[0-9a-f]{8}(?:-[0-9a-f]{4}){3}-[0-9a-f]{12}$', re.I)
+
+
+class NodeRegistry(object):
+    """Identities of the nodes, resolved once and looked up by any alias.
+
+    Each node is a dict with 'hostname' (as given), 'fqdn', 'ip' (the
+    address gethostbyname() returns), 'ips' (all its addresses) and 'uuid'
+    (its glusterd peer UUID, None until register_peers() is called). Any of
+    those values looks the node up.
+
+    Example:
+        registry = get_node_registry()
+        registry.register(servers + clients)
+        registry.register_peers(mnode)
+        registry.get_ip("server1")
+        registry.same_node("server1", "10.70.46.1")
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._nodes = []
+        self._index = {}
+
+    def _add(self, node):
+        """Index a node by all its aliases, merging it into the node already
+        registered with the same IP if any."""
+        with self._lock:
+            existing = self._index.get(node['ip'])
+            if existing is not None:
+                if node['uuid'] and not existing['uuid']:
+                    existing['uuid'] = node['uuid']
+                if (existing['hostname'] in existing['ips'] and
+                        node['hostname'] not in node['ips']):
+                    # Prefer a name to an IP as the hostname of the node
+                    existing['hostname'] = node['hostname']
+                node, aliases = existing, [node['hostname'], node['fqdn']]
+            else:
+                aliases = []
+                self._nodes.append(node)
+            for alias in ([node['hostname'], node['fqdn'], node['uuid']] +
+                          node['ips'] + aliases):
+                if alias and alias not in self._index:
+                    self._index[alias] = node
+            return node
+
+    @staticmethod
+    def _resolve(host):
+        """Resolve a host into an identity dict, raise socket.error."""
+        ip = socket.gethostbyname(host)
+        try:
+            name, _, ips = socket.gethostbyname_ex(host)
+        except socket.error:
+            name, ips = host, [ip]
+        fqdn = socket.getfqdn(host)
+        if fqdn == ip:
+            # getfqdn() returns the IP it could not reverse resolve
+            fqdn = name if name != ip else None
+        return {'hostname': host, 'fqdn': fqdn, 'ip': ip,
+                'ips': [ip] + [addr for addr in ips if addr != ip],
+                'uuid': None}
+
+    def register(self, hosts):
+        """Resolve hosts concurrently and add them to the registry.
+
+        Args:
+            hosts (str|list): Hostnames, FQDNs or IPs of the nodes.
+
+        Returns:
+            bool: True if all the hosts were resolved. False otherwise.
+        """
+        if not isinstance(hosts, list):
+            hosts = [hosts]
+        errors = {}
+
+        def resolve(host):
+            try:
+                self._add(self._resolve(host))
+            except socket.error as err:
+                errors[host] = err
+
+        threads = [threading.Thread(target=resolve, args=(host,))
+                   for host in set(hosts) if self.lookup(host, False) is None]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for host, err in errors.items():
+            g.log.error("Failed to resolve the host %s: %s", host, err)
+        return not errors
+
+    def register_peers(self, mnode):
+        """Add the glusterd peer UUIDs of the nodes of the pool of mnode.
+
+        Returns:
+            bool: True if the pool list was fetched. False otherwise.
+        """
+        # Imported here as peer_ops looks hosts up in the registry
+        from glustolibs.gluster.peer_ops import get_pool_list
+
+        pool = get_pool_list(mnode)
+        if pool is None:
+            g.log.error("Failed to get the pool list of %s", mnode)
+            return False
+        for peer in pool:
+            # The pool list shows mnode itself as localhost
+            hostname = (mnode if peer['hostname'] == 'localhost'
+                        else peer['hostname'])
+            node = self.lookup(hostname)
+            if node is None:
+                continue
+            with self._lock:
+                node['uuid'] = peer['uuid']
+                self._index[peer['uuid']] = node
+        return True
+
+    def lookup(self, alias, resolve=True):
+        """Get the identity of a node by hostname, FQDN, IP or UUID.
+
+        Args:
+            alias (str): Hostname, FQDN, IP or peer UUID of the node.
+
+        Kwargs:
+            resolve (bool): If True, resolve and register an unknown host.
+                Defaults to True.
+
+        Returns:
+            dict: Identity of the node.
+            NoneType: None if the node is unknown and cannot be resolved.
+        """
+        with self._lock:
+            node = self._index.get(alias)
+        if node is not None or not resolve or _UUID_RE.match(alias):
+            return node
+        try:
+            return self._add(self._resolve(alias))
+        except socket.error:
+            return None
+
+    def get_ip(self, host):
+        """Get the IP of a host as gethostbyname() would, memoized.
+
+        Raises:
+            socket.gaierror: If the host cannot be resolved.
+        """
+        node = self.lookup(host)
+        if node is None:
+            raise socket.gaierror(socket.EAI_NONAME,
+                                  "Unable to resolve %s" % host)
+        return node['ip']
+
+    def get_hostname(self, alias):
+        """Get the name of a node, e.g. of an IP, memoized.
+
+        The hostname the node was registered with is returned, or its FQDN
+        if it was registered by IP.
+
+        Raises:
+            socket.herror: If the node has no known name.
+        """
+        node = self.lookup(alias)
+        name = None
+        if node is not None:
+            name = (node['hostname'] if node['hostname'] not in node['ips']
+                    else node['fqdn'])
+        if not name:
+            raise socket.herror(1, "Unable to resolve %s" % alias)
+        return name
+
+    def get_fqdn(self, alias):
+        """Get the FQDN of a node, None if unknown."""
+        node = self.lookup(alias)
+        return node['fqdn'] if node is not None else None
+
+    def get_uuid(self, alias):
+        """Get the glusterd peer UUID of a node, None if unknown."""
+        node = self.lookup(alias)
+        return node['uuid'] if node is not None else None
+
+    def same_node(self, first, second):
+        """Check whether two hostnames, FQDNs, IPs or UUIDs are one node."""
+        if not first or not second:
+            return False
+        if first == second:
+            return True
+        first_node, second_node = self.lookup(first), self.lookup(second)
+        if first_node is None or second_node is None:
+            return False
+        return (first_node is second_node or
+                bool(set(first_node['ips']) & set(second_node['ips'])))
+
+    def refresh(self, hosts=None, mnode=None):
+        """Drop the registered identities and resolve them again.
+
+        Kwargs:
+            hosts (list): Hosts to register again. Defaults to None for the
+                hosts registered so far.
+            mnode (str): Node whose pool list gives the peer UUIDs.
+                Defaults to None to not fetch them.
+
+        Returns:
+            bool: True if all the hosts were resolved. False otherwise.
+        """
+        with self._lock:
+            if hosts is None:
+                hosts = list(set(
+                    [node['hostname'] for node in self._nodes] +
+                    [alias for alias, node in self._index.items()
+                     if alias not in node['ips'] and alias != node['uuid']]))
+            self._nodes = []
+            self._index = {}
+        ret = self.register(hosts)
+        if mnode is not None:
+            ret = self.register_peers(mnode) and ret
+        return ret
+
+
+_NODE_REGISTRY = NodeRegistry()
+
+
+def get_node_registry():
+    """Get the node registry of the run."""
+    return _NODE_REGISTRY
@@ -21,15 +21,72 @@
 
 
 import re
-import socket
-from time import sleep
+from time import sleep, time
 from glusto.core import Glusto as g
+from glustolibs.gluster.node_identity import get_node_registry
 try:
     import xml.etree.cElementTree as etree
 except ImportError:
     import xml.etree.ElementTree as etree
 
 
+def get_host_ip(host):
+    """Resolve a host to its IP, memoized for the run in the node registry.
+
+    Args:
+        host (str): Hostname or IP.
+
+    Returns:
+        str: IP of the host.
+
+    Raises:
+        socket.gaierror: If the host cannot be resolved.
+    """
+    return get_node_registry().get_ip(host)
+
+
+def get_host_name(ip):
+    """Resolve an IP to its hostname, memoized for the run in the node
+    registry.
+
+    Args:
+        ip (str): IP of the host.
+
+    Returns:
+        str: Hostname of the IP.
+
+    Raises:
+        socket.herror: If the IP cannot be resolved.
+    """
+    return get_node_registry().get_hostname(ip)
+
+
+def clear_host_cache():
+    """Resolve the hosts of the node registry again, e.g. after changing a
+    host IP."""
+    get_node_registry().refresh()
+
+
+def _poll_with_backoff(check, timeout, interval=0.5, max_interval=5):
+    """Call check until it returns True or timeout seconds are spent.
+
+    The interval between two calls starts at interval and doubles up to
+    max_interval.
+
+    Returns:
+        bool: True if check returned True. False otherwise.
+    """
+    end_time = time() + timeout
+    while True:
+        if check():
+            return True
+        remaining = end_time - time()
+        if remaining <= 0:
+            return False
+        sleep(min(interval, remaining))
+        interval = min(interval * 2, max_interval)
+
+
 def peer_probe(mnode, server):
     """Probe the specified server.
 
@@ -122,10 +179,117 @@ def pool_list(mnode):
     return g.run(mnode, cmd)
 
 
+def _run_peer_cmds(mnode, op, servers, force=False):
+    """Run 'gluster peer <op>' for each server in a single ssh call.
+
+    Returns:
+        list: Servers for which the command failed.
+        NoneType: None if the ssh call failed.
+    """
+    cmds = []
+    for server in servers:
+        cmds.append("out=$(gluster peer %s %s %s --mode=script 2>&1); "
+                    "echo \"$? %s $out\""
+                    % (op, server, "force" if force else "", server))
+    ret, out, err = g.run(mnode, "; ".join(cmds))
+    if ret != 0:
+        g.log.error("Failed to run peer %s on %s: %s", op, mnode, err)
+        return None
+
+    results = {}
+    for line in out.splitlines():
+        fields = line.split(' ', 2)
+        if len(fields) == 3 and fields[0].isdigit():
+            results[fields[1]] = (int(fields[0]), fields[2])
+    failed = []
+    for server in servers:
+        retcode, output = results.get(server, (1, ''))
+        if (retcode != 0 or
+                re.search(r'^peer\s%s\:\ssuccess(.*)' % op, output) is None):
+            g.log.error("Failed to peer %s the node '%s': %s", op, server,
+                        output)
+            failed.append(server)
+        else:
+            g.log.info("Successfully peer %s the node '%s'.",
+                       "probed" if op == 'probe' else "detached", server)
+    return failed
+
+
+def _find_peer(mnode, server, peers):
+    """Find the entry of a server in a peer status or pool list of mnode.
+
+    The peers are matched by hostname, IP or UUID through the node
+    registry, so a server probed by another alias is still found.
+
+    Returns:
+        dict: Entry of the server.
+        NoneType: None if the server is not in the list.
+    """
+    registry = get_node_registry()
+    for peer in peers:
+        # The pool list shows mnode itself as localhost
+        hostname = mnode if peer['hostname'] == 'localhost' else \
+            peer['hostname']
+        if (registry.same_node(server, hostname) or
+                registry.same_node(server, peer.get('uuid'))):
+            return peer
+    return None
+
+
+def wait_for_peers_in_pool(mnode, servers, timeout=60, in_pool=True):
+    """Poll the pool list with backoff until the servers are in the pool
+    and connected, or until they are out of it.
+
+    Args:
+        mnode (str): Node on which the pool list is fetched.
+        servers (str|list): A server|List of servers.
+
+    Kwargs:
+        timeout (int): Maximum time in seconds to wait. Defaults to 60.
+        in_pool (bool): True to wait for the servers to be in the pool and
+            connected, False to wait for them to be out of the pool.
+            Defaults to True.
+
+    Returns:
+        bool: True if the servers reached the state in time.
+            False otherwise.
+    """
+    if not isinstance(servers, list):
+        servers = [servers]
+    pending = {}
+
+    def check():
+        pool = get_pool_list(mnode)
+        if pool is None:
+            return False
+        pending.clear()
+        for server in servers:
+            peer = _find_peer(mnode, server, pool)
+            if not in_pool:
+                if peer is not None:
+                    pending[server] = "in pool"
+            elif peer is None:
+                pending[server] = "not in pool"
+            elif peer.get('connected') != '1':
+                pending[server] = "not connected"
+            elif peer.get('stateStr', "Peer in Cluster") != "Peer in Cluster":
+                pending[server] = peer.get('stateStr')
+        return not pending
+
+    if _poll_with_backoff(check, timeout):
+        return True
+    g.log.error("Peers not %s after %s seconds: %s",
+                "connected" if in_pool else "detached", timeout, pending)
+    return False
+
+
 def peer_probe_servers(mnode, servers, validate=True, time_delay=10):
     """Probe specified servers and validate whether probed servers
     are in cluster and connected state if validate is set to True.
 
+    All the probes are run in a single command, after which the pool list
+    is polled with backoff until the servers are connected.
+
     Args:
         mnode (str): Node on which command has to be executed.
         servers (str|list): A server|List of servers to be peer probed.
@@ -133,8 +297,8 @@ def peer_probe_servers(mnode, servers, validate=True, time_delay=10):
     Kwargs:
         validate (bool): True to validate if probed peer is in cluster and
             connected state. False otherwise. Defaults to True.
-        time_delay (int): time delay before validating peer status.
-            Defaults to 10 seconds.
+        time_delay (int): Maximum time to wait for the probed peers to be
+            connected. Defaults to 10 seconds.
 
     Returns:
         bool: True on success and False on failure.
@@ -154,20 +318,16 @@ def peer_probe_servers(mnode, servers, validate=True, time_delay=10):
                     "Failing peer probe.")
         return False
 
-    for server in servers:
-        if server not in nodes_in_pool_list:
-            ret, out, _ = peer_probe(mnode, server)
-            if (ret != 0 or
-                    re.search(r'^peer\sprobe\:\ssuccess(.*)', out) is None):
-                g.log.error("Failed to peer probe the node '%s'.", server)
-                return False
-            else:
-                g.log.info("Successfully peer probed the node '%s'.", server)
+    to_probe = [server for server in servers
+                if server not in nodes_in_pool_list]
+    if to_probe:
+        failed = _run_peer_cmds(mnode, 'probe', to_probe)
+        if failed is None or failed:
+            return False
 
     # Validating whether peer is in connected state after peer probe
     if validate:
-        sleep(time_delay)
-        if not is_peer_connected(mnode, servers):
+        if not wait_for_peers_in_pool(mnode, servers, time_delay):
             g.log.error("Validation after peer probe failed.")
             return False
         else:
@@ -180,6 +340,9 @@ def peer_detach_servers(mnode, servers, force=False, validate=True,
                         time_delay=10):
     """Detach peers and validate status of peer if validate is set to True.
 
+    All the detaches are run in a single command, after which the pool
+    list is polled with backoff until the servers are out of the pool.
+
     Args:
         mnode (str): Node on which command has to be executed.
         servers (str|list): A server|List of servers to be peer probed.
@@ -189,8 +352,8 @@ def peer_detach_servers(mnode, servers, force=False, validate=True,
             Defaults to False.
         validate (bool): True if status of the peer needs to be validated,
             False otherwise. Defaults to True.
-        time_delay (int): time delay before executing validating peer.
-            status. Defaults to 10 seconds.
+        time_delay (int): Maximum time to wait for the peers to be out of
+            the pool. Defaults to 10 seconds.
 
     Returns:
         bool: True on success and False on failure.
@@ -203,26 +366,18 @@ def peer_detach_servers(mnode, servers, force=False, validate=True,
     if mnode in servers:
         servers.remove(mnode)
 
-    for server in servers:
-        ret, out, _ = peer_detach(mnode, server, force)
-        if (ret != 0 or
-                re.search(r'^peer\sdetach\:\ssuccess(.*)', out) is None):
-            g.log.error("Failed to peer detach the node '%s'.", server)
+    if servers:
+        failed = _run_peer_cmds(mnode, 'detach', servers, force)
+        if failed is None or failed:
             return False
 
     # Validating whether peer detach is successful
     if validate:
-        sleep(time_delay)
-        nodes_in_pool = nodes_from_pool_list(mnode)
-        rc = True
-        for server in servers:
-            if server in nodes_in_pool:
-                g.log.error("Peer '%s' still in pool" % server)
-                rc = False
-        if not rc:
+        if not wait_for_peers_in_pool(mnode, servers, time_delay,
+                                      in_pool=False):
             g.log.error("Validation after peer detach failed.")
-        else:
-            g.log.info("Validation after peer detach is successful")
+            return False
+        g.log.info("Validation after peer detach is successful")
 
     return True
 
@@ -372,8 +527,9 @@ def is_peer_connected(mnode, servers):
     else:
         servers = servers[:]
 
-    if mnode in servers:
-        servers.remove(mnode)
+    registry = get_node_registry()
+    servers = [server for server in servers
+               if not registry.same_node(server, mnode)]
 
     peer_status_list = get_peer_status(mnode)
     if peer_status_list is None:
@@ -385,35 +541,28 @@ def is_peer_connected(mnode, servers):
                     "connected.")
         return False
 
-    # Convert all hostnames to ip's
-    server_ips = []
-    for server in servers:
-        server_ips.append(socket.gethostbyname(server))
-
     is_connected = True
-    for peer_stat in peer_status_list:
-        if socket.gethostbyname(peer_stat['hostname']) in server_ips:
-            if (re.match(r'([0-9a-f]{8})(?:-[0-9a-f]{4}){3}-[0-9a-f]{12}',
-                         peer_stat['uuid'], re.I) is None):
-                g.log.error("Invalid UUID for the node '%s'",
-                            peer_stat['hostname'])
-                is_connected = False
-            if (peer_stat['stateStr'] != "Peer in Cluster" or
-                    peer_stat['connected'] != '1'):
-                g.log.error("Peer '%s' not in connected state",
-                            peer_stat['hostname'])
-                is_connected = False
+    servers_not_in_pool = []
+    for server in servers:
+        peer_stat = _find_peer(mnode, server, peer_status_list)
+        if peer_stat is None:
+            servers_not_in_pool.append(server)
+            continue
+        if (re.match(r'([0-9a-f]{8})(?:-[0-9a-f]{4}){3}-[0-9a-f]{12}',
+                     peer_stat['uuid'], re.I) is None):
+            g.log.error("Invalid UUID for the node '%s'",
+                        peer_stat['hostname'])
+            is_connected = False
+        if (peer_stat['stateStr'] != "Peer in Cluster" or
+                peer_stat['connected'] != '1'):
+            g.log.error("Peer '%s' not in connected state",
+                        peer_stat['hostname'])
+            is_connected = False
 
     if not is_connected:
         return False
 
-    peer_ips = [socket.gethostbyname(peer_stat['hostname']) for
-                peer_stat in peer_status_list]
-    if not (set(server_ips).issubset(peer_ips)):
-        servers_not_in_pool = list(set(server_ips).difference(peer_ips))
-        for index, server in enumerate(servers_not_in_pool):
-            if not (server in servers):
-                servers_not_in_pool[index] = socket.gethostbyaddr(server)[0]
+    if servers_not_in_pool:
         g.log.error("Servers: '%s' not yet added to the pool.",
                     servers_not_in_pool)
         return False
@@ -440,13 +589,9 @@ def wait_for_peers_to_connect(mnode, servers, wait_timeout=30):
     if not isinstance(servers, list):
         servers = [servers]
 
-    count = 0
-    while count <= wait_timeout:
-        ret = is_peer_connected(mnode, servers)
-        if ret:
-            g.log.info("peers in connected state: %s", servers)
-            return True
-        sleep(1)
-        count += 1
+    if _poll_with_backoff(lambda: is_peer_connected(mnode, servers),
+                          wait_timeout):
+        g.log.info("peers in connected state: %s", servers)
+        return True
     g.log.error("Peers are not in connected state: %s", servers)
     return False
@@ -0,0 +1,342 @@
+#  Copyright (C) 2021 Red Hat, Inc. <http://www.redhat.com>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License along
+#  with this program; if not, write to the Free Software Foundation, Inc.,
+#  51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+"""
+    Description: Volume profiling sessions sampling 'profile info
+        incremental' into a per-brick, per-FOP time series, with export to
+        csv/npz and statistical comparison of two sessions.
+"""
+
+import csv
+import math
+import threading
+import time
+
+import numpy as np
+from glusto.core import Glusto as g
+from glustolibs.gluster.profile_ops import (profile_start, profile_stop,
+                                            get_profile_info)
+
+# Columns of the time series, latencies are in microseconds
+PROFILE_DTYPE = np.dtype([('time', 'f8'), ('brick', 'u2'), ('fop', 'u2'),
+                          ('duration', 'f8'), ('hits', 'i8'),
+                          ('min_latency', 'f8'), ('avg_latency', 'f8'),
+                          ('max_latency', 'f8')])
+
+
+class ProfileSession(object):
+    """Sample the incremental profile info of a volume on an interval.
+
+    Every sample adds one row per brick and FOP with the call count and the
+    min, avg and max latency of the interval. Brick and FOP names are
+    stored once and referenced by index, so the series is a compact numpy
+    structured array, see PROFILE_DTYPE.
+
+    Example:
+        session = ProfileSession(mnode, volname, interval=5)
+        session.start()
+        ... run IO ...
+        session.stop()
+        session.to_csv("/tmp/profile.csv")
+        report = compare_profile_sessions(baseline, session)
+    """
+
+    def __init__(self, mnode, volname, interval=10):
+        """
+        Args:
+            mnode (str): Node on which commands are executed.
+            volname (str): Name of the volume to profile.
+
+        Kwargs:
+            interval (float): Time in seconds between two samples.
+                Defaults to 10.
+        """
+        self.mnode = mnode
+        self.volname = volname
+        self.interval = interval
+        self.bricks = []
+        self.fops = []
+        self._rows = []
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def _index(self, names, name):
+        if name not in names:
+            names.append(name)
+        return names.index(name)
+
+    def sample(self):
+        """Take one sample of the incremental profile info.
+
+        Returns:
+            int: Number of rows added.
+            NoneType: None if the profile info could not be fetched.
+        """
+        info = get_profile_info(self.mnode, self.volname, 'incremental')
+        if info is None:
+            return None
+        now = time.time()
+        rows = []
+        for key, brick in info.get(self.volname, {}).items():
+            stats = brick.get('intervalStats', {})
+            brick_index = self._index(self.bricks,
+                                      brick.get('brickName', key))
+            duration = float(stats.get('duration') or 0)
+            for fop in stats.get('fopStats', {}).values():
+                rows.append((now, brick_index,
+                             self._index(self.fops, fop['name']), duration,
+                             int(fop.get('hits') or 0),
+                             float(fop.get('minLatency') or 0),
+                             float(fop.get('avgLatency') or 0),
+                             float(fop.get('maxLatency') or 0)))
+        with self._lock:
+            self._rows.extend(rows)
+        return len(rows)
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            if self.sample() is None:
+                g.log.warning("Failed to sample the profile info of volume "
+                              "%s", self.volname)
+
+    def start(self):
+        """Start profiling the volume and sampling it in the background.
+
+        Returns:
+            bool: True if profiling was started. False otherwise.
+        """
+        ret, _, err = profile_start(self.mnode, self.volname)
+        if ret and 'already started' not in err:
+            g.log.error("Failed to start profile on volume %s: %s",
+                        self.volname, err)
+            return False
+        # Reset the interval stats, the first sample covers the session
+        get_profile_info(self.mnode, self.volname, 'incremental')
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+        g.log.info("Started profile session of volume %s, sampling every "
+                   "%s seconds", self.volname, self.interval)
+        return True
+
+    def stop(self, stop_profile=True):
+        """Take a last sample and stop the session.
+
+        Kwargs:
+            stop_profile (bool): If True, stop profiling the volume.
+                Defaults to True.
+
+        Returns:
+            bool: True on success. False otherwise.
+        """
+        if self._thread is not None:
+            self._stop_event.set()
+            self._thread.join()
+            self._thread = None
+        ret = self.sample() is not None
+        if stop_profile:
+            rcode, _, err = profile_stop(self.mnode, self.volname)
+            if rcode:
+                g.log.error("Failed to stop profile on volume %s: %s",
+                            self.volname, err)
+                ret = False
+        return ret
+
+    def as_array(self):
+        """Get the time series as a numpy structured array."""
+        with self._lock:
+            return np.array(self._rows, dtype=PROFILE_DTYPE)
+
+    def latency_samples(self, fop):
+        """Get the avg latencies of a FOP over all the intervals and bricks.
+
+        Args:
+            fop (str): Name of the FOP, e.g. 'WRITE'.
+
+        Returns:
+            numpy.ndarray: The avg latency of every interval with hits.
+        """
+        data = self.as_array()
+        if fop not in self.fops:
+            return np.array([], dtype='f8')
+        mask = (data['fop'] == self.fops.index(fop)) & (data['hits'] > 0)
+        return data['avg_latency'][mask]
+
+    def fop_summary(self):
+        """Summarize the session per FOP.
+
+        Returns:
+            dict: Dict with the FOP as key and as value a dict with 'hits',
+                'avg_latency' (weighted by the hits), 'min_latency',
+                'max_latency', 'p50_latency' and 'p95_latency' (of the avg
+                latency of the intervals) in microseconds.
+        """
+        data = self.as_array()
+        summary = {}
+        for index, fop in enumerate(self.fops):
+            rows = data[(data['fop'] == index) & (data['hits'] > 0)]
+            if not rows.size:
+                continue
+            summary[fop] = {
+                'hits': int(rows['hits'].sum()),
+                'avg_latency': float(np.average(rows['avg_latency'],
+                                                weights=rows['hits'])),
+                'min_latency': float(rows['min_latency'].min()),
+                'max_latency': float(rows['max_latency'].max()),
+                'p50_latency': float(np.percentile(rows['avg_latency'], 50)),
+                'p95_latency': float(np.percentile(rows['avg_latency'], 95))}
+        return summary
+
+    def to_csv(self, path):
+        """Export the time series to a csv file.
+
+        Args:
+            path (str): Path of the csv file, which gets one row per brick
+                and FOP of every sample, with the brick and FOP names.
+        """
+        data = self.as_array()
+        with open(path, 'w') as csv_file:
+            writer = csv.writer(csv_file)
+            writer.writerow(['time', 'brick', 'fop', 'duration', 'hits',
+                             'min_latency', 'avg_latency', 'max_latency'])
+            for row in data:
+                writer.writerow([row['time'], self.bricks[row['brick']],
+                                 self.fops[row['fop']], row['duration'],
+                                 row['hits'], row['min_latency'],
+                                 row['avg_latency'], row['max_latency']])
+
+    def to_npz(self, path):
+        """Export the time series to a compressed npz file.
+
+        Args:
+            path (str): Path of the npz file, which gets one array per
+                column. It can be loaded back with from_npz().
+        """
+        data = self.as_array()
+        columns = dict((name, data[name]) for name in PROFILE_DTYPE.names)
+        np.savez_compressed(path, bricks=np.array(self.bricks),
+                            fops=np.array(self.fops),
+                            volname=np.array(self.volname), **columns)
+
+    @classmethod
+    def from_npz(cls, path):
+        """Load a session exported by to_npz().
+
+        Args:
+            path (str): Path of the npz file.
+
+        Returns:
+            ProfileSession: Session with the loaded time series, e.g. to be
+                used as the baseline of compare_profile_sessions().
+        """
+        files = np.load(path)
+        session = cls(None, str(files['volname']))
+        session.bricks = [str(brick) for brick in files['bricks']]
+        session.fops = [str(fop) for fop in files['fops']]
+        data = np.zeros(len(files['time']), dtype=PROFILE_DTYPE)
+        for name in PROFILE_DTYPE.names:
+            data[name] = files[name]
+        session._rows = [tuple(row) for row in data.tolist()]
+        return session
+
+
+def _mann_whitney_u(baseline, candidate):
+    """Two sided Mann-Whitney U test with the normal approximation.
+
+    Returns:
+        tuple: (u, p_value) where u is the statistic of the candidate.
+    """
+    n1, n2 = len(baseline), len(candidate)
+    values = np.concatenate([baseline, candidate])
+    order = values.argsort(kind='mergesort')
+    ranks = np.empty(len(values), dtype='f8')
+    ranks[order] = np.arange(1, len(values) + 1)
+    # Average the ranks of the ties
+    _, inverse, counts = np.unique(values, return_inverse=True,
+                                   return_counts=True)
+    sums = np.bincount(inverse, weights=ranks)
+    ranks = sums[inverse] / counts[inverse]
+
+    u_value = ranks[n1:].sum() - n2 * (n2 + 1) / 2.0
+    tie_term = (counts ** 3 - counts).sum() / float((n1 + n2) *
+                                                    (n1 + n2 - 1))
+    sigma = math.sqrt(n1 * n2 / 12.0 * ((n1 + n2 + 1) - tie_term))
+    if sigma == 0:
+        return u_value, 1.0
+    z_value = (u_value - n1 * n2 / 2.0) / sigma
+    return u_value, math.erfc(abs(z_value) / math.sqrt(2))
+
+
+def compare_profile_sessions(baseline, candidate, alpha=0.05, min_samples=5,
+                             min_change=0.05):
+    """Compare the per-FOP latency of two profile sessions.
+
+    The avg latencies of the intervals of each FOP are compared with a
+    Mann-Whitney U test, which does not assume the latencies to be normally
+    distributed. A FOP regressed if its median latency grew by more than
+    min_change with a p-value below alpha.
+
+    Args:
+        baseline (ProfileSession): Session of the baseline build.
+        candidate (ProfileSession): Session of the candidate build.
+
+    Kwargs:
+        alpha (float): Significance level. Defaults to 0.05.
+        min_samples (int): Minimum number of intervals with hits in both
+            sessions to compare a FOP. Defaults to 5.
+        min_change (float): Minimum relative change of the median latency
+            to report. Defaults to 0.05.
+
+    Returns:
+        dict: Dict with the FOP as key and as value a dict with
+            'baseline_median', 'candidate_median', 'change' (relative),
+            'p_value' and 'verdict' ('regression', 'improvement',
+            'unchanged' or 'insufficient data').
+
+    Example:
+        report = compare_profile_sessions(
+            ProfileSession.from_npz("baseline.npz"), session)
+        regressed = [fop for fop, result in report.items()
+                     if result['verdict'] == 'regression']
+    """
+    report = {}
+    for fop in sorted(set(baseline.fops) | set(candidate.fops)):
+        base = baseline.latency_samples(fop)
+        cand = candidate.latency_samples(fop)
+        result = {'baseline_median': None, 'candidate_median': None,
+                  'change': None, 'p_value': None,
+                  'verdict': 'insufficient data'}
+        report[fop] = result
+        if len(base) < min_samples or len(cand) < min_samples:
+            continue
+        result['baseline_median'] = float(np.median(base))
+        result['candidate_median'] = float(np.median(cand))
+        if result['baseline_median']:
+            result['change'] = (result['candidate_median'] /
+                                result['baseline_median'] - 1)
+        _, result['p_value'] = _mann_whitney_u(base, cand)
+        if (result['p_value'] < alpha and result['change'] is not None and
+                abs(result['change']) >= min_change):
+            result['verdict'] = ('regression' if result['change'] > 0
+                                 else 'improvement')
+        else:
+            result['verdict'] = 'unchanged'
+        if result['verdict'] == 'regression':
+            g.log.warning("Latency of %s regressed by %.1f%% (p=%.4f)", fop,
+                          result['change'] * 100, result['p_value'])
+    return report
@@ -16,12 +16,12 @@
 
 """ Description: Module for gluster quota related helper functions. """
 
-
+import time
 from glusto.core import Glusto as g
 from glustolibs.gluster.quota_ops import (quota_fetch_list)
 
 
-def quota_validate(mnode, volname, path, **kwargs):
+def quota_validate(mnode, volname, path, quota_list=None, **kwargs):
     """ Validate if the hard limit, soft limit, usage match the expected values.
         If any of the arguments are None, they are not verified.
 
@@ -29,6 +29,10 @@ def quota_validate(mnode, volname, path, **kwargs):
         mnode (str)             : Node on which command has to be executed.
         volname (str)           : volume name.
         path (str)              : Path to be verified.
+        quota_list (dict)       : quota list as returned by quota_fetch_list
+                                  for the whole volume, to validate many
+                                  paths against a single fetch. Fetched for
+                                  the path if not given.
         kwargs
         hard_limit(int)         : hard limit is verified with this value.
         soft_limit_percent(int) : soft limit (in %) is verified with this value
@@ -45,7 +49,12 @@ def quota_validate(mnode, volname, path, **kwargs):
         g.log.error("No arguments given for validation")
         return False
 
-    quotalist = quota_fetch_list(mnode, volname, path)
+    quotalist = quota_list
+    if quotalist is None:
+        quotalist = quota_fetch_list(mnode, volname, path)
+    if quotalist is None:
+        g.log.error("Failed to get the quota list of volume %s", volname)
+        return False
 
     if path not in quotalist:
         g.log.error("Path not found (script issue) path: %s", path)
@@ -63,6 +72,93 @@ def quota_validate(mnode, volname, path, **kwargs):
     return ret
 
 
+def quota_validate_paths(mnode, volname, expected):
+    """Validate the quota of many paths against a single quota list.
+
+    Args:
+        mnode (str): Node on which command has to be executed.
+        volname (str): volume name.
+        expected (dict): Dict with the path as key and as value a dict of
+            the expected values, with the same keys as the kwargs of
+            quota_validate.
+
+    Returns:
+        bool: True if the quota of all the paths match the expected
+            values. False otherwise.
+
+    Example:
+        quota_validate_paths("abc.com", "testvol",
+                             {"/dir1": {"hard_limit": 1073741824},
+                              "/dir2": {"hard_limit": 2147483648,
+                                        "sl_exceeded": False}})
+    """
+    quotalist = quota_fetch_list(mnode, volname)
+    if quotalist is None:
+        g.log.error("Failed to get the quota list of volume %s", volname)
+        return False
+
+    ret = True
+    for path, values in expected.items():
+        if not quota_validate(mnode, volname, path, quota_list=quotalist,
+                              **values):
+            ret = False
+    return ret
+
+
+def wait_for_quota_usage(mnode, volname, expected, tolerance=0, timeout=120,
+                         interval=2):
+    """Wait for the quota usage of paths to reach the expected values.
+
+    Quota accounting is updated asynchronously by the marker, so the usage
+    shown by quota list lags the IO. The quota list of the volume is
+    fetched once per poll for all the paths, and the function returns as
+    soon as the usage of every path is within tolerance of its expected
+    value.
+
+    Args:
+        mnode (str): Node on which command has to be executed.
+        volname (str): volume name.
+        expected (dict): Dict with the path as key and the expected
+            used_space in bytes as value.
+
+    Kwargs:
+        tolerance (int): Difference in bytes allowed between the usage and
+            the expected value. Defaults to 0.
+        timeout (int): Time in seconds to wait. Defaults to 120.
+        interval (int): Time in seconds between two polls. Defaults to 2.
+
+    Returns:
+        bool: True if the usage of all the paths converged within timeout.
+            False otherwise.
+
+    Example:
+        wait_for_quota_usage("abc.com", "testvol", {"/dir1": 10485760},
+                             tolerance=4096)
+    """
+    start_time = time.time()
+    while True:
+        pending = {}
+        quotalist = quota_fetch_list(mnode, volname)
+        for path, used_space in expected.items():
+            usage = (quotalist or {}).get(path, {}).get('used_space')
+            if usage in (None, 'N/A') or abs(usage - used_space) > tolerance:
+                pending[path] = usage
+        if not pending:
+            g.log.info("Quota usage of %s on volume %s converged in %.1f "
+                       "seconds", list(expected), volname,
+                       time.time() - start_time)
+            return True
+        if time.time() - start_time > timeout:
+            break
+        time.sleep(interval)
+
+    for path, usage in pending.items():
+        g.log.error("Quota usage of %s on volume %s is %s, expected %s "
+                    "(tolerance %s)", path, volname, usage, expected[path],
+                    tolerance)
+    return False
+
+
 def quota_fetch_daemon_pid(nodes):
     """
     Checks if quota daemon process is running and
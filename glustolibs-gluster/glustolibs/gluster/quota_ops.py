@@ -276,6 +276,85 @@ def quota_limit_objects(mnode, volname, path='/', limit='10',
     return g.run(mnode, cmd)
 
 
+def _quota_limit_bulk(mnode, volname, op, limits):
+    """Run a quota limit command for each path in a single ssh call."""
+    cmds = []
+    for limit in limits:
+        path, value = limit[0], limit[1]
+        soft_limit = limit[2] if len(limit) > 2 else ''
+        cmds.append("gluster volume quota %s %s '%s' %s %s --mode=script "
+                    ">/dev/null 2>&1; echo \"$? %s\""
+                    % (volname, op, path, value, soft_limit, path))
+    if not cmds:
+        return True, {}
+
+    ret, out, err = g.run(mnode, "; ".join(cmds))
+    if ret != 0:
+        g.log.error("Failed to run quota %s on volume %s: %s", op, volname,
+                    err)
+        return False, {}
+
+    results = {}
+    for line in out.splitlines():
+        retcode, _, path = line.partition(' ')
+        if retcode.isdigit():
+            results[path] = int(retcode)
+    failed = [limit[0] for limit in limits if results.get(limit[0]) != 0]
+    if failed:
+        g.log.error("Failed to set quota %s on volume %s for paths %s", op,
+                    volname, failed)
+        return False, results
+    g.log.info("Successfully set quota %s on volume %s for %d paths", op,
+               volname, len(limits))
+    return True, results
+
+
+def quota_limit_usage_bulk(mnode, volname, limits):
+    """Sets limit-usage on many paths of the volume in a single ssh call
+
+    glusterd still sets the limits one by one, but the round trip and the
+    start of a remote shell are paid once for all the paths.
+
+    Args:
+        mnode (str): Node on which cmd has to be executed.
+        volname (str): volume name
+        limits (list): List of (path, limit) or (path, limit, soft_limit)
+            tuples.
+
+    Returns:
+        tuple: Tuple containing two elements (ret, results).
+        The first element 'ret' is of type 'bool', True if the limit was
+        set on all the paths. False otherwise.
+
+        The second element 'results' is a dict with the path as key and
+        the return value of its limit command as value.
+
+    Examples:
+        >>> quota_limit_usage_bulk("abc.com", "testvol",
+                                   [("/dir1", "1GB"), ("/dir2", "2GB", "70")])
+    """
+    return _quota_limit_bulk(mnode, volname, "limit-usage", limits)
+
+
+def quota_limit_objects_bulk(mnode, volname, limits):
+    """Sets limit-objects on many paths of the volume in a single ssh call
+
+    Args:
+        mnode (str): Node on which cmd has to be executed.
+        volname (str): volume name
+        limits (list): List of (path, limit) or (path, limit, soft_limit)
+            tuples.
+
+    Returns:
+        tuple: Same as quota_limit_usage_bulk().
+
+    Examples:
+        >>> quota_limit_objects_bulk("abc.com", "testvol",
+                                     [("/dir1", "10"), ("/dir2", "20")])
+    """
+    return _quota_limit_bulk(mnode, volname, "limit-objects", limits)
+
+
 def quota_fetch_list_objects(mnode, volname, path=None):
     """Parse the output of 'gluster quota list-objects' command.
 
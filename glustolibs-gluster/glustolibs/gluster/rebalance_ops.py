@@ -280,26 +280,17 @@ def wait_for_fix_layout_to_complete(mnode, volname, timeout=300):
     Examples:
         >>> wait_for_fix_layout_to_complete("abc.com", "testvol")
     """
-
-    count = 0
-    while count < timeout:
-        status_info = get_rebalance_status(mnode, volname)
-        if status_info is None:
-            return False
-
-        status = status_info['aggregate']['statusStr']
-        if status == 'fix-layout completed':
-            g.log.info("Fix-layout is successfully completed")
-            return True
-        if status == 'fix-layout failed':
-            g.log.error("Fix-layout failed on one or more nodes."
-                        "Check rebalance status for more details")
-            return False
-
-        time.sleep(10)
-        count = count + 10
-    g.log.error("Fix layout has not completed. Wait timeout.")
-    return False
+    tracker = RebalanceProgressTracker(mnode, volname)
+    ret = tracker.wait(timeout, 'fix-layout completed', 'fix-layout failed')
+    if ret:
+        g.log.info("Fix-layout is successfully completed")
+    elif (tracker.samples and
+          tracker.samples[-1]['status'] == 'fix-layout failed'):
+        g.log.error("Fix-layout failed on one or more nodes."
+                    "Check rebalance status for more details")
+    else:
+        g.log.error("Fix layout has not completed. Wait timeout.")
+    return bool(ret)
 
 
 def wait_for_rebalance_to_complete(mnode, volname, timeout=300):
@@ -319,26 +310,16 @@ def wait_for_rebalance_to_complete(mnode, volname, timeout=300):
     Examples:
         >>> wait_for_rebalance_to_complete("abc.com", "testvol")
     """
-
-    count = 0
-    while count < timeout:
-        status_info = get_rebalance_status(mnode, volname)
-        if status_info is None:
-            return False
-
-        status = status_info['aggregate']['statusStr']
-        if status == 'completed':
-            g.log.info("Rebalance is successfully completed")
-            return True
-        if status == 'failed':
-            g.log.error(" Rebalance failed on one or more nodes."
-                        "Check rebalance status for more details")
-            return False
-
-        time.sleep(10)
-        count = count + 10
-    g.log.error("Rebalance operation has not completed. Wait timeout.")
-    return False
+    tracker = RebalanceProgressTracker(mnode, volname)
+    ret = tracker.wait(timeout)
+    if ret:
+        g.log.info("Rebalance is successfully completed")
+    elif tracker.samples and tracker.samples[-1]['status'] == 'failed':
+        g.log.error(" Rebalance failed on one or more nodes."
+                    "Check rebalance status for more details")
+    else:
+        g.log.error("Rebalance operation has not completed. Wait timeout.")
+    return bool(ret)
 
 
 def get_remove_brick_status(mnode, volname, bricks_list):
@@ -423,27 +404,224 @@ def wait_for_remove_brick_to_complete(mnode, volname, bricks_list,
     Examples:
         >>> wait_for_remove_brick_to_complete("abc.com", "testvol")
     """
+    tracker = RebalanceProgressTracker(mnode, volname, bricks_list)
+    ret = tracker.wait(timeout)
+    if ret:
+        g.log.info("Remove brick is successfully completed in %d sec",
+                   tracker.summary()['duration'])
+    elif tracker.samples and tracker.samples[-1]['status'] == 'failed':
+        g.log.error(" Remove brick failed on one or more nodes. "
+                    "Check remove brick status for more details")
+    else:
+        g.log.error("Remove brick operation has not completed. "
+                    "Wait timeout is %s", timeout)
+    return bool(ret)
+
+
+# Counters of the rebalance status of each node, converted to numbers
+_REBALANCE_COUNTERS = ('files', 'size', 'lookups', 'failures', 'skipped',
+                       'runtime')
+
+
+class RebalanceProgressTracker(object):
+    """Track the progress of a rebalance or remove-brick over time.
+
+    Every poll records the status and the files, size, lookups, failures,
+    skipped and runtime counters of every node. From them the tracker
+    computes the migration throughput of each node and of the volume, the
+    skew between the nodes and a prediction of the completion time, which
+    is used to adapt the poll interval while waiting.
 
-    count = 0
-    while count < timeout:
-        status_info = get_remove_brick_status(mnode, volname, bricks_list)
-        if status_info is None:
-            return False
-        status = status_info['aggregate']['statusStr']
-        if status == 'completed':
-            g.log.info("Remove brick is successfully completed in %s sec",
-                       count)
-            return True
-        elif status == 'failed':
-            g.log.error(" Remove brick failed on one or more nodes. "
-                        "Check remove brick status for more details")
-            return False
+    Example:
+        tracker = RebalanceProgressTracker(mnode, volname)
+        ret = tracker.wait(timeout=1800)
+        g.log.info(tracker.summary())
+    """
+
+    def __init__(self, mnode, volname, bricks_list=None, total_files=None):
+        """
+        Args:
+            mnode (str): Node on which command has to be executed.
+            volname (str): volume name
+
+        Kwargs:
+            bricks_list (list): Bricks being removed, to track the
+                remove-brick instead of the rebalance.
+            total_files (int): Number of files expected to be looked up,
+                used to predict the completion when glusterd does not
+                report the time left.
+        """
+        self.mnode = mnode
+        self.volname = volname
+        self.bricks_list = bricks_list
+        self.total_files = total_files
+        self.samples = []
+
+    def poll(self):
+        """Get the status and record a sample of it.
+
+        Returns:
+            dict: Sample with 'time', 'status' (aggregate statusStr) and
+                'nodes', a dict of node name to its 'status', counters as
+                numbers and 'time_left' (None if not reported).
+            NoneType: None if the status could not be fetched.
+        """
+        if self.bricks_list:
+            status_info = get_remove_brick_status(self.mnode, self.volname,
+                                                  self.bricks_list)
         else:
-            time.sleep(10)
-            count += 10
-            g.log.error("Remove brick operation has not completed. "
-                        "Wait timeout is %s" % count)
-    return False
+            status_info = get_rebalance_status(self.mnode, self.volname)
+        if status_info is None:
+            return None
+
+        nodes = {}
+        for node in status_info.get('node', []):
+            record = {'status': node.get('statusStr'), 'time_left': None}
+            for counter in _REBALANCE_COUNTERS:
+                try:
+                    record[counter] = float(node.get(counter) or 0)
+                except ValueError:
+                    record[counter] = 0.0
+            if node.get('timeLeft') not in (None, ''):
+                try:
+                    record['time_left'] = float(node['timeLeft'])
+                except ValueError:
+                    pass
+            nodes[node.get('nodeName')] = record
+        sample = {'time': time.time(),
+                  'status': status_info.get('aggregate', {}).get('statusStr'),
+                  'nodes': nodes}
+        self.samples.append(sample)
+        return sample
+
+    def eta(self):
+        """Predict the time left in seconds for the operation to complete.
+
+        The time left reported by glusterd is used when available,
+        otherwise it is computed from the lookup rate and total_files.
+        glusterd reports a time left of 0 both for the nodes which did not
+        estimate it yet and for the completed nodes, so only the positive
+        values of the nodes not completed are used.
+
+        Returns:
+            float: Predicted time left in seconds.
+            NoneType: None if it can not be predicted yet.
+        """
+        if not self.samples:
+            return None
+        nodes = self.samples[-1]['nodes'].values()
+        reported = [node['time_left'] for node in nodes
+                    if node['time_left'] is not None and
+                    node['time_left'] > 0 and node['status'] != 'completed']
+        if reported:
+            return max(reported)
+        if not self.total_files or len(self.samples) < 2:
+            return None
+        first, last = self.samples[0], self.samples[-1]
+        elapsed = last['time'] - first['time']
+        looked_up = (sum(node['lookups'] for node in last['nodes'].values())
+                     - sum(node['lookups']
+                           for node in first['nodes'].values()))
+        if elapsed <= 0 or looked_up <= 0:
+            return None
+        remaining = self.total_files - sum(node['lookups'] for node in nodes)
+        return max(remaining, 0) / (looked_up / elapsed)
+
+    def summary(self):
+        """Summarize the progress recorded so far.
+
+        Returns:
+            dict: Dict with 'status', 'duration' (seconds tracked),
+                'files', 'size', 'lookups', 'failures', 'skipped' (totals
+                of the nodes), 'files_per_sec', 'bytes_per_sec' (of the
+                volume, over the longest node runtime), 'files_skew' and
+                'size_skew' (max over mean of the nodes, 1.0 when even)
+                and 'nodes', the per node counters, 'files_per_sec' and
+                'bytes_per_sec'.
+        """
+        summary = {'status': None, 'duration': 0, 'files': 0, 'size': 0,
+                   'lookups': 0, 'failures': 0, 'skipped': 0,
+                   'files_per_sec': 0.0, 'bytes_per_sec': 0.0,
+                   'files_skew': None, 'size_skew': None, 'nodes': {}}
+        if not self.samples:
+            return summary
+        last = self.samples[-1]
+        summary['status'] = last['status']
+        summary['duration'] = last['time'] - self.samples[0]['time']
+        runtime = 0.0
+        for name, node in last['nodes'].items():
+            node_summary = dict(node)
+            node_summary['files_per_sec'] = (node['files'] / node['runtime']
+                                             if node['runtime'] else 0.0)
+            node_summary['bytes_per_sec'] = (node['size'] / node['runtime']
+                                             if node['runtime'] else 0.0)
+            summary['nodes'][name] = node_summary
+            for counter in ('files', 'size', 'lookups', 'failures',
+                            'skipped'):
+                summary[counter] += node[counter]
+            runtime = max(runtime, node['runtime'])
+        if runtime:
+            summary['files_per_sec'] = summary['files'] / runtime
+            summary['bytes_per_sec'] = summary['size'] / runtime
+        nodes = list(last['nodes'].values())
+        for counter in ('files', 'size'):
+            mean = sum(node[counter] for node in nodes) / max(len(nodes), 1)
+            if mean:
+                summary['%s_skew' % counter] = (
+                    max(node[counter] for node in nodes) / mean)
+        return summary
+
+    def wait(self, timeout, completed='completed', failed='failed',
+             min_interval=1, max_interval=10):
+        """Wait for the operation to complete, polling adaptively.
+
+        The poll interval is half of the predicted time left, bounded by
+        min_interval and max_interval. Without a prediction it starts at
+        min_interval and grows by half at every poll.
+
+        Args:
+            timeout (int): Time in seconds to wait.
+
+        Kwargs:
+            completed (str): Aggregate status of a completed operation.
+            failed (str): Aggregate status of a failed operation.
+            min_interval (float): Minimum poll interval in seconds.
+            max_interval (float): Maximum poll interval in seconds.
+
+        Returns:
+            bool: True if the operation completed within timeout, False if
+                it failed, timed out or its status could not be fetched.
+        """
+        start_time = time.time()
+        interval = min_interval
+        while True:
+            sample = self.poll()
+            if sample is None:
+                return False
+            if sample['status'] in (completed, failed):
+                summary = self.summary()
+                g.log.info("%s of volume %s is %s after %.1f seconds: %d "
+                           "files, %d bytes, %.1f files/s, %.1f bytes/s, "
+                           "skew %s", "Remove-brick" if self.bricks_list
+                           else "Rebalance", self.volname, sample['status'],
+                           summary['duration'], summary['files'],
+                           summary['size'], summary['files_per_sec'],
+                           summary['bytes_per_sec'], summary['files_skew'])
+                return sample['status'] == completed
+            elapsed = time.time() - start_time
+            if elapsed >= timeout:
+                return False
+
+            eta = self.eta()
+            if eta is not None:
+                interval = eta / 2
+            elif len(self.samples) > 1:
+                interval *= 1.5
+            interval = min(max(interval, min_interval), max_interval,
+                           timeout - elapsed)
+            g.log.debug("Status %s, predicted time left %s, next poll in "
+                        "%.1f seconds", sample['status'], eta, interval)
+            time.sleep(interval)
 
 
 def set_rebalance_throttle(mnode, volname, throttle_type='normal'):
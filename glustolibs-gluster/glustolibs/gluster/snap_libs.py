@@ -0,0 +1,301 @@
+#  Copyright (C) 2021 Red Hat, Inc. <http://www.redhat.com>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License along
+#  with this program; if not, write to the Free Software Foundation, Inc.,
+#  51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+"""
+    Description: Snapshot manager with indexed lookups, bulk operations and
+        per-operation timing.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from glusto.core import Glusto as g
+from glustolibs.gluster.snap_ops import (snap_create, snap_delete,
+                                         snap_activate, snap_deactivate,
+                                         snap_restore, snap_clone,
+                                         get_snap_info, get_snap_status)
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+# Errors of glusterd on which a snapshot operation is retried, as another
+# operation holds the lock of the volume
+_LOCK_ERRORS = ("Another transaction is in progress", "Locking failed")
+
+
+class SnapshotManager(object):
+    """Manage the snapshots of a cluster from one node.
+
+    The output of 'snapshot info' and 'snapshot status' is fetched once and
+    indexed by snapshot name and by origin volume, so looking up many
+    snapshots costs a single command instead of one per lookup. The indexes
+    are dropped by every operation done through the manager, operations
+    done outside of it require a call to invalidate().
+
+    Every operation is timed, see timings and timing_summary().
+
+    Example:
+        manager = SnapshotManager(mnode)
+        ret, _ = manager.bulk_create(volname, ["snap%d" % i
+                                               for i in range(256)])
+        info = manager.get_info("snap10")
+        g.log.info(manager.timing_summary('create'))
+    """
+
+    def __init__(self, mnode, retries=5):
+        """
+        Args:
+            mnode (str): Node on which the snapshot commands are executed.
+
+        Kwargs:
+            retries (int): Number of times an operation failing on the
+                volume lock held by another operation is retried.
+                Defaults to 5.
+        """
+        self.mnode = mnode
+        self.retries = retries
+        self.timings = []
+        self._lock = threading.Lock()
+        self._info = None
+        self._by_volume = None
+        self._status = None
+
+    def invalidate(self):
+        """Drop the indexes, to be refetched on the next lookup."""
+        with self._lock:
+            self._info = None
+            self._by_volume = None
+            self._status = None
+
+    def _load_info(self):
+        with self._lock:
+            if self._info is not None:
+                return True
+        snap_info_list = get_snap_info(self.mnode)
+        if snap_info_list is None:
+            return False
+        # glusterd lists the snapshots in creation order, kept by the index
+        info, by_volume = OrderedDict(), {}
+        for snap in snap_info_list:
+            info[snap['name']] = snap
+            volname = (snap.get('snapVolume', {}).get('originVolume', {})
+                       .get('name'))
+            by_volume.setdefault(volname, []).append(snap['name'])
+        with self._lock:
+            self._info, self._by_volume = info, by_volume
+        return True
+
+    def _load_status(self):
+        with self._lock:
+            if self._status is not None:
+                return True
+        snap_status_list = get_snap_status(self.mnode)
+        if snap_status_list is None:
+            return False
+        status = dict((snap['name'], snap) for snap in snap_status_list)
+        with self._lock:
+            self._status = status
+        return True
+
+    def get_info(self, snapname):
+        """Get the info of a snapshot.
+
+        Returns:
+            dict: Info of the snapshot as returned by
+                snap_ops.get_snap_info_by_snapname().
+            NoneType: None if the snapshot does not exist or on failure.
+        """
+        if not self._load_info():
+            return None
+        return self._info.get(snapname)
+
+    def get_status(self, snapname):
+        """Get the status of a snapshot.
+
+        Returns:
+            dict: Status of the snapshot as returned by
+                snap_ops.get_snap_status_by_snapname().
+            NoneType: None if the snapshot does not exist or on failure.
+        """
+        if not self._load_status():
+            return None
+        return self._status.get(snapname)
+
+    def list_snaps(self, volname=None):
+        """List the snapshots, of all the volumes or of one.
+
+        Returns:
+            list: Names of the snapshots in creation order.
+            NoneType: None on failure.
+        """
+        if not self._load_info():
+            return None
+        if volname is None:
+            return list(self._info)
+        return list(self._by_volume.get(volname, []))
+
+    def exists(self, snapname):
+        """Check whether a snapshot exists."""
+        return self.get_info(snapname) is not None
+
+    def _run(self, op, snapname, func, *args, **kwargs):
+        """Run a snapshot operation, retrying it on lock contention."""
+        start_time = time.time()
+        for attempt in range(self.retries + 1):
+            ret, out, err = func(self.mnode, *args, **kwargs)
+            if ret == 0 or not any(error in (err or '')
+                                   for error in _LOCK_ERRORS):
+                break
+            time.sleep(0.5 * (attempt + 1))
+        elapsed = time.time() - start_time
+        self.invalidate()
+        with self._lock:
+            self.timings.append({'op': op, 'snapname': snapname,
+                                 'elapsed': elapsed, 'ret': ret,
+                                 'attempts': attempt + 1})
+        if ret:
+            g.log.error("Snapshot %s of %s failed: %s", op, snapname, err)
+        return ret, out, err
+
+    def create(self, volname, snapname, **kwargs):
+        """Create a snapshot, kwargs are passed to snap_ops.snap_create()."""
+        return self._run('create', snapname, snap_create, volname, snapname,
+                         **kwargs)
+
+    def delete(self, snapname):
+        """Delete a snapshot."""
+        return self._run('delete', snapname, snap_delete, snapname)
+
+    def activate(self, snapname, force=False):
+        """Activate a snapshot."""
+        return self._run('activate', snapname, snap_activate, snapname,
+                         force)
+
+    def deactivate(self, snapname):
+        """Deactivate a snapshot."""
+        return self._run('deactivate', snapname, snap_deactivate, snapname)
+
+    def restore(self, snapname):
+        """Restore a snapshot, the volume must be stopped."""
+        return self._run('restore', snapname, snap_restore, snapname)
+
+    def clone(self, snapname, clonename):
+        """Clone a snapshot."""
+        return self._run('clone', snapname, snap_clone, snapname, clonename)
+
+    def _bulk(self, op, snapnames, max_workers, func):
+        """Run func on every snapshot with at most max_workers at once."""
+        pending = queue.Queue()
+        for snapname in snapnames:
+            pending.put(snapname)
+        results = {}
+
+        def worker():
+            while True:
+                try:
+                    snapname = pending.get_nowait()
+                except queue.Empty:
+                    return
+                ret, _, _ = func(snapname)
+                results[snapname] = ret
+
+        threads = [threading.Thread(target=worker)
+                   for _ in range(max(1, min(max_workers, len(snapnames))))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        failed = [snapname for snapname in snapnames if results.get(snapname)]
+        if failed:
+            g.log.error("Snapshot %s failed for %s", op, failed)
+        else:
+            g.log.info("Snapshot %s successful for %d snapshots: %s", op,
+                       len(snapnames), self.timing_summary(op))
+        return not failed, results
+
+    def bulk_create(self, volname, snapnames, max_workers=1, **kwargs):
+        """Create snapshots of a volume.
+
+        Args:
+            volname (str): Name of the volume.
+            snapnames (list): Names of the snapshots.
+
+        Kwargs:
+            max_workers (int): Number of snapshots created at once. glusterd
+                serializes the snapshots of a volume, so more workers only
+                help across volumes. Defaults to 1.
+            kwargs: Passed to snap_ops.snap_create().
+
+        Returns:
+            tuple: (ret, results) where ret is True if all the snapshots were
+                created and results a dict of snapname to the return code of
+                its creation.
+        """
+        return self._bulk('create', snapnames, max_workers,
+                          lambda snapname: self.create(volname, snapname,
+                                                       **kwargs))
+
+    def bulk_activate(self, snapnames, max_workers=4, force=False):
+        """Activate snapshots, see bulk_create() for the return value."""
+        return self._bulk('activate', snapnames, max_workers,
+                          lambda snapname: self.activate(snapname, force))
+
+    def bulk_deactivate(self, snapnames, max_workers=4):
+        """Deactivate snapshots, see bulk_create() for the return value."""
+        return self._bulk('deactivate', snapnames, max_workers,
+                          self.deactivate)
+
+    def bulk_delete(self, snapnames, max_workers=4):
+        """Delete snapshots, see bulk_create() for the return value."""
+        return self._bulk('delete', snapnames, max_workers, self.delete)
+
+    def timing_summary(self, op=None):
+        """Summarize the time taken by the operations.
+
+        Kwargs:
+            op (str): Operation to summarize, e.g. 'create'. Defaults to
+                None for all of them.
+
+        Returns:
+            dict: Dict with 'count', 'failed', 'min', 'max', 'avg', 'p50',
+                'p95' in seconds and 'first' and 'last', the average time
+                of the first and last tenth of the operations, to see how
+                the latency grows with the number of snapshots.
+        """
+        with self._lock:
+            timings = [timing for timing in self.timings
+                       if op is None or timing['op'] == op]
+        summary = {'count': len(timings),
+                   'failed': len([timing for timing in timings
+                                  if timing['ret']])}
+        if not timings:
+            return summary
+        elapsed = [timing['elapsed'] for timing in timings]
+        ordered = sorted(elapsed)
+        tenth = max(1, len(elapsed) // 10)
+        summary.update({
+            'min': ordered[0],
+            'max': ordered[-1],
+            'avg': sum(elapsed) / len(elapsed),
+            'p50': ordered[len(ordered) // 2],
+            'p95': ordered[min(len(ordered) - 1,
+                               int(len(ordered) * 0.95))],
+            'first': sum(elapsed[:tenth]) / tenth,
+            'last': sum(elapsed[-tenth:]) / tenth})
+        return summary
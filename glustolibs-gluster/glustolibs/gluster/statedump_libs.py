@@ -0,0 +1,286 @@
+#  Copyright (C) 2021 Red Hat, Inc. <http://www.redhat.com>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License along
+#  with this program; if not, write to the Free Software Foundation, Inc.,
+#  51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+"""
+    Description: Library to take statedumps of the bricks, self-heal
+        daemons and FUSE clients of a volume and to diff successive dumps,
+        to find which xlator and mem-type leaks memory.
+"""
+
+import json
+from glusto.core import Glusto as g
+from glustolibs.gluster.volume_ops import get_volume_status
+from glustolibs.misc.misc_libs import upload_scripts
+
+STATEDUMP_SCRIPT = "/usr/share/glustolibs/scripts/statedump.py"
+STATEDUMP_DIR = "/var/run/gluster"
+
+# Keys of the inode and fd tables which are diffed
+_ITABLE_KEYS = ('active_size', 'lru_size', 'purge_size')
+_FDTABLE_KEYS = ('refcount', 'open_fds')
+
+
+def get_statedump_targets(mnode, volname, mounts=None, shd=True):
+    """Get the processes of a volume to take statedumps of.
+
+    Args:
+        mnode (str): Node on which the volume status is fetched.
+        volname (str): Name of the volume.
+
+    Kwargs:
+        mounts (list): GlusterMount objects whose FUSE client processes
+            are dumped. Mounts of other types are ignored. Defaults to None.
+        shd (bool): If True, dump the self-heal daemons. Defaults to True.
+
+    Returns:
+        list: Dicts with 'name' (e.g. 'brick:host1:/bricks/brick0',
+            'shd:host1' or 'client:host2:/mnt/glusterfs'), 'node' and 'pid'.
+        NoneType: None on failure.
+    """
+    vol_status = get_volume_status(mnode, volname)
+    if vol_status is None:
+        g.log.error("Failed to get the status of volume %s", volname)
+        return None
+
+    targets = []
+    for node, processes in vol_status.get(volname, {}).items():
+        for process, status in processes.items():
+            pid = status.get('pid')
+            if not pid or pid in ('N/A', '-1') or status.get('status') != '1':
+                continue
+            if process.startswith('/'):
+                name = "brick:%s:%s" % (node, process)
+            elif process == 'Self-heal Daemon' and shd:
+                name = "shd:%s" % node
+            else:
+                continue
+            targets.append({'name': name, 'node': node, 'pid': int(pid)})
+
+    for mount_obj in mounts or []:
+        if mount_obj.mounttype != 'glusterfs':
+            continue
+        cmd = ("pgrep -f 'glusterfs.*volfile-id=/?%s .*%s$'"
+               % (mount_obj.volname, mount_obj.mountpoint.rstrip('/')))
+        ret, out, _ = g.run(mount_obj.client_system, cmd)
+        if ret != 0 or not out.split():
+            g.log.error("Failed to find the client process of %s:%s",
+                        mount_obj.client_system, mount_obj.mountpoint)
+            return None
+        targets.append({'name': "client:%s:%s" % (mount_obj.client_system,
+                                                  mount_obj.mountpoint),
+                        'node': mount_obj.client_system,
+                        'pid': int(out.split()[0])})
+    return targets
+
+
+def take_statedumps(targets, dump_dir=STATEDUMP_DIR, timeout=60,
+                    remove=True):
+    """Take statedumps of processes concurrently and parse them.
+
+    All the processes of a node are dumped by one run of statedump.py,
+    which sends them SIGUSR1 and parses the dumps on the node, and all the
+    nodes are run in parallel.
+
+    Args:
+        targets (list): Dicts with 'name', 'node' and 'pid', as returned by
+            get_statedump_targets().
+
+    Kwargs:
+        dump_dir (str): Dir in which the processes write the statedumps,
+            i.e. the server.statedump-path of the volume.
+            Defaults to STATEDUMP_DIR.
+        timeout (int): Time in seconds to wait for the dumps.
+            Defaults to 60.
+        remove (bool): If True, remove the dump files once parsed.
+            Defaults to True.
+
+    Returns:
+        dict: Dict with the target name as key and as value the parsed dump
+            (see parse_statedump() in statedump.py) with 'memory',
+            'itables', 'fdtables', 'callpool' and 'mallinfo', or None if
+            the dump of the target failed.
+
+    Example:
+        targets = get_statedump_targets(mnode, volname, self.mounts)
+        dumps = take_statedumps(targets)
+    """
+    by_node = {}
+    for target in targets:
+        by_node.setdefault(target['node'], []).append(target)
+    results = dict((target['name'], None) for target in targets)
+    if not by_node:
+        return results
+    if not upload_scripts(list(by_node), STATEDUMP_SCRIPT,
+                          "/usr/share/glustolibs/scripts/"):
+        g.log.error("Failed to upload %s to %s", STATEDUMP_SCRIPT,
+                    list(by_node))
+        return results
+
+    procs = {}
+    for node, node_targets in by_node.items():
+        cmd = ("/usr/bin/env python %s -d '%s' -t %d %s %s"
+               % (STATEDUMP_SCRIPT, dump_dir, timeout,
+                  "-r" if remove else "",
+                  ' '.join(str(target['pid']) for target in node_targets)))
+        procs[node] = g.run_async(node, cmd)
+
+    for node, proc in procs.items():
+        _, out, err = proc.async_communicate()
+        names = dict((target['pid'], target['name'])
+                     for target in by_node[node])
+        for line in out.splitlines():
+            try:
+                dump = json.loads(line)
+            except ValueError:
+                continue
+            name = names.get(dump.get('pid'))
+            if name is None:
+                continue
+            if 'error' in dump:
+                g.log.error("Failed to take the statedump of %s: %s", name,
+                            dump['error'])
+                continue
+            if not dump.get('complete'):
+                g.log.warning("Statedump of %s is incomplete", name)
+            results[name] = dump
+        if err:
+            g.log.error("statedump.py failed on %s: %s", node, err)
+    return results
+
+
+def take_volume_statedumps(mnode, volname, mounts=None, shd=True, **kwargs):
+    """Take statedumps of the bricks, shds and FUSE clients of a volume.
+
+    Args:
+        mnode (str): Node on which the volume status is fetched.
+        volname (str): Name of the volume.
+
+    Kwargs:
+        mounts (list): GlusterMount objects of the clients to dump.
+        shd (bool): If True, dump the self-heal daemons. Defaults to True.
+        kwargs: Passed to take_statedumps().
+
+    Returns:
+        dict: As returned by take_statedumps().
+        NoneType: None if the processes of the volume could not be found.
+    """
+    targets = get_statedump_targets(mnode, volname, mounts, shd)
+    if targets is None:
+        return None
+    dumps = take_statedumps(targets, **kwargs)
+    g.log.info("Took statedumps of %d out of %d processes of volume %s",
+               len([dump for dump in dumps.values() if dump]), len(dumps),
+               volname)
+    return dumps
+
+
+def _diff_tables(old, new, keys):
+    """Diff the given keys of the tables present in both dumps."""
+    deltas = {}
+    for section, table in new.items():
+        if section not in old:
+            continue
+        delta = dict((key, table.get(key, 0) - old[section].get(key, 0))
+                     for key in keys if key in table)
+        if any(delta.values()):
+            deltas[section] = delta
+    return deltas
+
+
+def diff_statedumps(old, new):
+    """Diff two statedumps of the same process.
+
+    Args:
+        old (dict): Earlier parsed statedump.
+        new (dict): Later parsed statedump.
+
+    Returns:
+        dict: Dict with
+            'memory': list of dicts with 'xlator', 'type', 'size' and
+                'num_allocs' (the growth of both), for the mem-types whose
+                size or num_allocs changed, sorted by decreasing size growth.
+            'itables': {section: {'active_size', 'lru_size', 'purge_size'}}
+                growth of the inode tables which changed.
+            'fdtables': {section: {'refcount', 'open_fds'}} growth of the fd
+                tables which changed.
+            'callpool': growth of the call-pool depth.
+    """
+    memory = []
+    for xlator, types in new.get('memory', {}).items():
+        old_types = old.get('memory', {}).get(xlator, {})
+        for mem_type, usage in types.items():
+            old_usage = old_types.get(mem_type, {})
+            size = usage.get('size', 0) - old_usage.get('size', 0)
+            num_allocs = (usage.get('num_allocs', 0) -
+                          old_usage.get('num_allocs', 0))
+            if size or num_allocs:
+                memory.append({'xlator': xlator, 'type': mem_type,
+                               'size': size, 'num_allocs': num_allocs})
+    memory.sort(key=lambda entry: (-entry['size'], -entry['num_allocs']))
+    return {
+        'memory': memory,
+        'itables': _diff_tables(old.get('itables', {}),
+                                new.get('itables', {}), _ITABLE_KEYS),
+        'fdtables': _diff_tables(old.get('fdtables', {}),
+                                 new.get('fdtables', {}), _FDTABLE_KEYS),
+        'callpool': (new.get('callpool', {}).get('count', 0) -
+                     old.get('callpool', {}).get('count', 0))}
+
+
+def find_statedump_growth(dumps, min_size=0, min_allocs=1):
+    """Find the mem-types growing in every one of successive statedumps.
+
+    A mem-type whose num_allocs grows between each pair of successive dumps
+    of a process taken while the same workload runs is likely leaking.
+
+    Args:
+        dumps (list): Parsed statedumps of the same process, in the order in
+            which they were taken. At least two.
+
+    Kwargs:
+        min_size (int): Minimum total size growth in bytes to report.
+            Defaults to 0.
+        min_allocs (int): Minimum growth of num_allocs between every two
+            successive dumps. Defaults to 1.
+
+    Returns:
+        list: Dicts with 'xlator', 'type', 'size' and 'num_allocs', the
+            growth from the first to the last dump, sorted by decreasing
+            size growth.
+
+    Example:
+        series = [take_volume_statedumps(mnode, volname, self.mounts)
+                  for _ in range(3)]
+        leaks = find_statedump_growth(
+            [dumps["shd:host1"] for dumps in series])
+    """
+    if len(dumps) < 2:
+        return []
+    growing = None
+    for old, new in zip(dumps, dumps[1:]):
+        keys = set((entry['xlator'], entry['type'])
+                   for entry in diff_statedumps(old, new)['memory']
+                   if entry['num_allocs'] >= min_allocs)
+        growing = keys if growing is None else growing & keys
+    growth = [entry for entry in diff_statedumps(dumps[0],
+                                                 dumps[-1])['memory']
+              if (entry['xlator'], entry['type']) in growing and
+              entry['size'] >= min_size]
+    for entry in growth:
+        g.log.warning("%s %s grew by %d allocs, %d bytes over %d "
+                      "statedumps", entry['xlator'], entry['type'],
+                      entry['num_allocs'], entry['size'], len(dumps))
+    return growth
@@ -0,0 +1,343 @@
+#  Copyright (C) 2021 Red Hat, Inc. <http://www.redhat.com>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License along
+#  with this program; if not, write to the Free Software Foundation, Inc.,
+#  51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+"""
+    Description: Graph model of the volfiles, with fetching of all the
+        volfiles of a volume from many nodes, caching by checksum and
+        diffing of two graphs.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from fnmatch import fnmatch
+from glusto.core import Glusto as g
+
+GLUSTERD_VOLS_DIR = "/var/lib/glusterd/vols"
+# Maximum number of graphs kept in the cache of the parsed volfiles
+VOLFILE_GRAPH_CACHE_SIZE = 256
+
+# Parsed graphs, least recently used first, {md5 of the volfile: graph}
+_VOLFILE_GRAPH_CACHE = OrderedDict()
+# Graph last fetched for each volfile of each node, {(node, path): graph}
+_LAST_VOLFILE_GRAPHS = {}
+_CACHE_LOCK = threading.Lock()
+# Marker of the header line of each volfile in the fetch output
+_VOLFILE_MARKER = "### volfile"
+
+
+class VolfileGraph(object):
+    """Graph of the xlators of a volfile.
+
+    Each xlator is a dict with 'name', 'type', 'options' (dict of option
+    to value) and 'subvolumes' (list of the names of its children), kept in
+    the order of the volfile, whose last xlator is the top of the graph.
+
+    Example:
+        graph = VolfileGraph.parse(contents)
+        graph.find(xlator_type='protocol/client')
+        graph.get_option('testvol-client-0', 'remote-host')
+        graph.parents('testvol-client-0')
+    """
+
+    def __init__(self, xlators=None, checksum=None):
+        self.xlators = xlators if xlators is not None else OrderedDict()
+        self.checksum = checksum
+
+    @classmethod
+    def parse(cls, contents):
+        """Parse the contents of a volfile.
+
+        Args:
+            contents (str): Contents of the volfile.
+
+        Returns:
+            VolfileGraph: Graph of the volfile.
+        """
+        xlators = OrderedDict()
+        xlator = None
+        for line in contents.splitlines():
+            fields = line.split()
+            if not fields:
+                continue
+            if fields[0] == 'volume' and len(fields) > 1:
+                xlator = {'name': fields[1], 'type': None, 'options': {},
+                          'subvolumes': []}
+            elif xlator is None:
+                continue
+            elif fields[0] == 'end-volume':
+                xlators[xlator['name']] = xlator
+                xlator = None
+            elif fields[0] == 'type' and len(fields) > 1:
+                xlator['type'] = fields[1]
+            elif fields[0] == 'option' and len(fields) > 1:
+                xlator['options'][fields[1]] = ' '.join(fields[2:])
+            elif fields[0] == 'subvolumes':
+                xlator['subvolumes'] = fields[1:]
+        checksum = hashlib.md5(contents.encode('utf-8')).hexdigest()
+        return cls(xlators, checksum)
+
+    @property
+    def top(self):
+        """Name of the top xlator of the graph, None if it is empty."""
+        children = set()
+        for xlator in self.xlators.values():
+            children.update(xlator['subvolumes'])
+        tops = [name for name in self.xlators if name not in children]
+        return tops[-1] if tops else None
+
+    def get_xlator(self, name):
+        """Get an xlator by name, None if it is not in the graph."""
+        return self.xlators.get(name)
+
+    def find(self, xlator_type=None, option=None):
+        """Find the xlators of a type and/or having an option.
+
+        Kwargs:
+            xlator_type (str): Type of the xlators, e.g. 'protocol/client'.
+            option (str): Option the xlators must have.
+
+        Returns:
+            list: Matching xlator dicts in the order of the volfile.
+        """
+        return [xlator for xlator in self.xlators.values()
+                if (xlator_type is None or xlator['type'] == xlator_type) and
+                (option is None or option in xlator['options'])]
+
+    def get_option(self, name, option):
+        """Get the value of an option of an xlator, None if not set."""
+        xlator = self.xlators.get(name)
+        if xlator is None:
+            return None
+        return xlator['options'].get(option)
+
+    def option_values(self, option, xlator_type=None):
+        """Get the value of an option on all the xlators setting it.
+
+        Returns:
+            dict: Dict with the xlator name as key and the value as value.
+        """
+        return dict((xlator['name'], xlator['options'][option])
+                    for xlator in self.find(xlator_type, option))
+
+    def parents(self, name):
+        """Get the names of the xlators having the xlator as subvolume."""
+        return [xlator['name'] for xlator in self.xlators.values()
+                if name in xlator['subvolumes']]
+
+    def to_dict(self):
+        """Get the graph in the format returned by parse_vol_file()."""
+        vol_dict = {}
+        for name, xlator in self.xlators.items():
+            data = {}
+            if xlator['type'] is not None:
+                data['type'] = xlator['type']
+            if xlator['options']:
+                data['option'] = dict(xlator['options'])
+            if xlator['subvolumes']:
+                data['subvolumes'] = list(xlator['subvolumes'])
+            vol_dict[name] = data
+        return vol_dict
+
+
+def _cache_graph(checksum, graph=None):
+    """Get a graph from the cache or add it, evicting the least recently
+    used graphs beyond VOLFILE_GRAPH_CACHE_SIZE. Must hold _CACHE_LOCK."""
+    if checksum in _VOLFILE_GRAPH_CACHE:
+        graph = _VOLFILE_GRAPH_CACHE.pop(checksum)
+    if graph is not None:
+        _VOLFILE_GRAPH_CACHE[checksum] = graph
+        while len(_VOLFILE_GRAPH_CACHE) > VOLFILE_GRAPH_CACHE_SIZE:
+            _VOLFILE_GRAPH_CACHE.popitem(last=False)
+    return graph
+
+
+def get_volfile_graph(contents):
+    """Parse the contents of a volfile, reusing the graph of an identical
+    volfile parsed before.
+
+    Args:
+        contents (str): Contents of the volfile.
+
+    Returns:
+        VolfileGraph: Graph of the volfile. It is shared with the other
+            callers, it must not be modified.
+    """
+    checksum = hashlib.md5(contents.encode('utf-8')).hexdigest()
+    with _CACHE_LOCK:
+        graph = _cache_graph(checksum)
+    if graph is None:
+        graph = VolfileGraph.parse(contents)
+        with _CACHE_LOCK:
+            graph = _cache_graph(checksum, graph)
+    return graph
+
+
+def clear_volfile_graph_cache(volname=None):
+    """Drop the cached graphs, e.g. once a volume is deleted.
+
+    Kwargs:
+        volname (str): Volume whose volfiles are dropped. Defaults to None
+            to drop the graphs of all the volumes.
+    """
+    with _CACHE_LOCK:
+        if volname is None:
+            _VOLFILE_GRAPH_CACHE.clear()
+            _LAST_VOLFILE_GRAPHS.clear()
+            return
+        vol_dir = "%s/%s/" % (GLUSTERD_VOLS_DIR, volname)
+        for key, graph in list(_LAST_VOLFILE_GRAPHS.items()):
+            if key[1].startswith(vol_dir):
+                del _LAST_VOLFILE_GRAPHS[key]
+                _VOLFILE_GRAPH_CACHE.pop(graph.checksum, None)
+
+
+def _known_graphs(node, paths):
+    """Get the graphs last fetched from node for the volfiles matching
+    paths, {checksum: graph}."""
+    with _CACHE_LOCK:
+        return dict((graph.checksum, graph)
+                    for (graph_node, path), graph in
+                    _LAST_VOLFILE_GRAPHS.items()
+                    if graph_node == node and
+                    any(fnmatch(path, pattern) for pattern in paths))
+
+
+def _fetch_volfiles_cmd(paths, known):
+    """Command printing a header with the md5 of each volfile, followed by
+    the contents of the volfiles whose md5 is not in known."""
+    return ("for f in %s; do [ -f \"$f\" ] || continue; "
+            "sum=$(md5sum < \"$f\" | cut -d' ' -f1); "
+            "echo \"%s $sum $f\"; "
+            "case ' %s ' in *\" $sum \"*) ;; *) cat \"$f\"; echo;; esac; done"
+            % (' '.join(paths), _VOLFILE_MARKER, ' '.join(known)))
+
+
+def _parse_fetch_output(node, out, known):
+    """Parse the output of _fetch_volfiles_cmd() into {path: graph}."""
+    graphs, volfiles = {}, []
+    for line in out.splitlines():
+        if line.startswith(_VOLFILE_MARKER + ' '):
+            _, _, checksum, path = line.split(' ', 3)
+            volfiles.append((path, checksum, []))
+        elif volfiles:
+            volfiles[-1][2].append(line)
+    for path, checksum, lines in volfiles:
+        graph = known.get(checksum)
+        if graph is None:
+            with _CACHE_LOCK:
+                graph = _cache_graph(checksum)
+        if graph is None:
+            graph = VolfileGraph.parse('\n'.join(lines))
+            graph.checksum = checksum
+        with _CACHE_LOCK:
+            graphs[path] = _cache_graph(checksum, graph)
+            _LAST_VOLFILE_GRAPHS[(node, path)] = graph
+    return graphs
+
+
+def get_volfile_graphs(nodes, volname, paths=None):
+    """Fetch and parse all the volfiles of a volume from nodes.
+
+    One command per node, run on all the nodes concurrently, prints the md5
+    of each volfile and the contents of only those which changed since
+    they were last fetched from that node.
+
+    Args:
+        nodes (str|list): Nodes from which the volfiles are fetched.
+        volname (str): Name of the volume.
+
+    Kwargs:
+        paths (list): Paths or globs of the volfiles. Defaults to None for
+            all the *.vol files of the volume in the glusterd working dir.
+
+    Returns:
+        dict: Dict with the node as key and as value a dict of the volfile
+            path to its VolfileGraph, or None if fetching failed on the
+            node.
+
+    Example:
+        graphs = get_volfile_graphs(self.servers, self.volname)
+        fuse = graphs[self.mnode][
+            "/var/lib/glusterd/vols/testvol/testvol.tcp-fuse.vol"]
+    """
+    if not isinstance(nodes, list):
+        nodes = [nodes]
+    if paths is None:
+        paths = ["%s/%s/*.vol" % (GLUSTERD_VOLS_DIR, volname)]
+    procs, known = {}, {}
+    for node in nodes:
+        known[node] = _known_graphs(node, paths)
+        procs[node] = g.run_async(node,
+                                  _fetch_volfiles_cmd(paths, known[node]),
+                                  log_level='DEBUG')
+    results = {}
+    for node, proc in procs.items():
+        ret, out, err = proc.async_communicate()
+        if ret != 0:
+            g.log.error("Failed to fetch the volfiles of %s from %s: %s",
+                        volname, node, err)
+            results[node] = None
+            continue
+        results[node] = _parse_fetch_output(node, out, known[node])
+    return results
+
+
+def diff_volfile_graphs(old, new):
+    """Diff two volfile graphs.
+
+    Args:
+        old (VolfileGraph): Graph before the change.
+        new (VolfileGraph): Graph after the change.
+
+    Returns:
+        dict: Dict with 'added' and 'removed' (names of the xlators), and
+            'changed', a dict of the name of each xlator present in both
+            graphs which changed to a dict with 'type' and 'subvolumes'
+            ((old, new) tuples, if changed) and 'options' (dict of option
+            to (old, new) tuple, a missing option being None).
+
+    Example:
+        diff = diff_volfile_graphs(before, after)
+        diff['changed']['testvol-client-0']['options']['ping-timeout']
+        >>> ('42', '30')
+    """
+    diff = {'added': [name for name in new.xlators
+                      if name not in old.xlators],
+            'removed': [name for name in old.xlators
+                        if name not in new.xlators],
+            'changed': {}}
+    if old.checksum is not None and old.checksum == new.checksum:
+        return diff
+    for name, xlator in new.xlators.items():
+        old_xlator = old.xlators.get(name)
+        if old_xlator is None:
+            continue
+        changes = {}
+        for key in ('type', 'subvolumes'):
+            if old_xlator[key] != xlator[key]:
+                changes[key] = (old_xlator[key], xlator[key])
+        options = {}
+        for option in set(old_xlator['options']) | set(xlator['options']):
+            old_value = old_xlator['options'].get(option)
+            value = xlator['options'].get(option)
+            if old_value != value:
+                options[option] = (old_value, value)
+        if options:
+            changes['options'] = options
+        if changes:
+            diff['changed'][name] = changes
+    return diff
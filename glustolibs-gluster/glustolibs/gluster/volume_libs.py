@@ -16,6 +16,7 @@
 
 """ Description: Module for gluster volume related helper functions. """
 
+import json
 import time
 import random
 try:
@@ -39,6 +40,12 @@ from glustolibs.gluster.heal_libs import (
     are_all_self_heal_daemons_are_online,
     wait_for_self_heal_daemons_to_be_online)
 from glustolibs.gluster.brick_ops import add_brick, remove_brick, replace_brick
+from glustolibs.gluster.volfile_libs import (clear_volfile_graph_cache,
+                                             get_volfile_graph)
+from glustolibs.misc.misc_libs import upload_scripts
+
+BRICK_INVENTORY_SCRIPT = "/usr/share/glustolibs/scripts/brick_inventory.py"
+BRICK_INVENTORY_SNAPSHOT_DIR = "/var/tmp/glustolibs_brick_inventory"
 
 
 def volume_exists(mnode, volname):
@@ -470,6 +477,7 @@ def cleanup_volume(mnode, volname):
     if not ret:
         g.log.error("Unable to cleanup the volume %s", volname)
         return False
+    clear_volfile_graph_cache(volname)
     return True
 
 
@@ -1619,11 +1627,46 @@ def wait_for_volume_process_to_be_online(mnode, volname, timeout=300):
     return True
 
 
+def _run_brick_inventory(brick_node, brick_path, dirs, files, skip,
+                         snapshot=None):
+    """Run brick_inventory.py on a brick and return (ret, out, err)."""
+    if not (dirs or files):
+        raise RuntimeError("Not specified object type to find dir/files")
+    if not upload_scripts(brick_node, BRICK_INVENTORY_SCRIPT,
+                          "/usr/share/glustolibs/scripts/"):
+        g.log.error("Failed to upload %s to %s", BRICK_INVENTORY_SCRIPT,
+                    brick_node)
+        return 1, '', ''
+
+    if skip is None:
+        skip = []
+    elif not isinstance(skip, list):
+        skip = [skip]
+    cmd = "/usr/bin/env python %s" % BRICK_INVENTORY_SCRIPT
+    if not dirs:
+        cmd += " --no-dirs"
+    if not files:
+        cmd += " --no-files"
+    cmd += ''.join(" -s '%s'" % item for item in skip)
+    if snapshot:
+        cmd += " --snapshot '%s'" % snapshot
+    return g.run(brick_node, "%s %s" % (cmd, brick_path), log_level='DEBUG')
+
+
+def _get_brick_inventory_snapshot(brick_path, name):
+    """Get the path of a brick inventory snapshot on the brick node."""
+    return "%s/%s.%s.json" % (BRICK_INVENTORY_SNAPSHOT_DIR,
+                              brick_path.strip('/').replace('/', '_'), name)
+
+
 def get_files_and_dirs_from_brick(brick_node, brick_path,
                                   dirs=True, files=True,
                                   skip=None):
     """ Get all the files and drectories from a brick
 
+    The '.glusterfs' and '.trashcan' dirs and the DHT linkto files are
+    skipped.
+
     Args:
         brick_node (str), brick_path (str) : brick node and path where you
         would want to list the files and directories.
@@ -1632,46 +1675,105 @@ def get_files_and_dirs_from_brick(brick_node, brick_path,
         dirs (boolean): If this value is set to True(Default), this
         function will get only directories from all bricks.
         files (boolean): If this value is set to True(Default), this
-        function will get only files from all bricks.
-        If both dirs and files are set to True, it will get both files
-        and directories.
-        skip (list): List of directories to skip
+        function will get only regular files from all bricks.
+        If both dirs and files are set to True, it will get all the
+        entries, directories, files, symlinks and special files.
+        skip (list): List of names of files and directories to skip
 
     Returns:
-        list: List of files and directories from all bricks.
+        list: Sorted list of files and directories from the brick.
         NoneType: None on failure
     """
-    if not (dirs or files):
-        raise RuntimeError("Not specified object type to find dir/files")
-
-    skip_items = ["'.glusterfs'", "'.trashcan'"]
-    if not isinstance(skip, list):
-        skip_items.append("'%s'" % skip)
-
-    exclude_pattern = ' '.join([' | grep -ve {}'.format(item)
-                                for item in skip_items])
-    result = []
-    if dirs and files:
-        cmd = 'find %s ! -perm 1000 %s' % (brick_path, exclude_pattern)
-    elif dirs and not files:
-        cmd = 'find %s -type d %s' % (brick_path, exclude_pattern)
-    elif files and not dirs:
-        cmd = 'find %s -type f ! -perm 1000 %s' % (brick_path, exclude_pattern)
-
-    ret, out, err = g.run(brick_node, cmd)
-    if out == '' and err == '':
+    ret, out, err = _run_brick_inventory(brick_node, brick_path, dirs,
+                                         files, skip)
+    if ret != 0:
+        g.log.error("Failed to get files/directories from %s:%s : %s",
+                    brick_node, brick_path, err)
+        return None
+    result = out.splitlines()
+    if not result:
         g.log.info("No files/directories are present on %s:%s ",
                    brick_node, brick_path)
-    elif ret != 0:
-        g.log.error("Failed to get files/directories from %s:%s ",
-                    brick_node, brick_path)
     else:
-        g.log.info("Successfully got files/directories from %s:%s ",
-                   brick_node, brick_path)
-        result.extend(out.splitlines())
+        g.log.info("Successfully got %d files/directories from %s:%s ",
+                   len(result), brick_node, brick_path)
     return result
 
 
+def get_brick_inventory_delta(brick_node, brick_path, name='default',
+                              dirs=True, files=True, skip=None):
+    """Get the files and dirs changed on a brick since the previous call.
+
+    The listing of the brick is saved as a snapshot on the brick node and
+    only the paths added, removed or changed (mode, size or mtime) since
+    the previous snapshot of the same name are sent back, so that checks
+    repeated during rebalance or remove-brick do not transfer and compare
+    the whole listing each time. The first call returns all the entries
+    as added.
+
+    Args:
+        brick_node (str): Node of the brick.
+        brick_path (str): Path of the brick.
+
+    Kwargs:
+        name (str): Name of the snapshot, to track several deltas of the
+            same brick independently. Defaults to 'default'.
+        dirs (bool): Include the dirs. Defaults to True.
+        files (bool): Include the files. Defaults to True.
+        skip (list): List of names of files and directories to skip.
+
+    Returns:
+        dict: Dict with 'added', 'removed' and 'changed' sorted lists of
+            paths, 'total' the number of entries on the brick and 'first'
+            True if there was no previous snapshot.
+        NoneType: None on failure
+
+    Example:
+        get_brick_inventory_delta("abc.com", "/bricks/brick0/testvol_brick0")
+        # ... rebalance ...
+        delta = get_brick_inventory_delta("abc.com",
+                                          "/bricks/brick0/testvol_brick0")
+    """
+    snapshot = _get_brick_inventory_snapshot(brick_path, name)
+    ret, out, err = _run_brick_inventory(brick_node, brick_path, dirs,
+                                         files, skip, snapshot)
+    if ret != 0:
+        g.log.error("Failed to get the inventory delta of %s:%s : %s",
+                    brick_node, brick_path, err)
+        return None
+    delta = json.loads(out)
+    g.log.info("Brick %s:%s has %d entries, %d added, %d removed and %d "
+               "changed", brick_node, brick_path, delta['total'],
+               len(delta['added']), len(delta['removed']),
+               len(delta['changed']))
+    return delta
+
+
+def clear_brick_inventory_snapshots(brick_node, brick_path=None):
+    """Remove the inventory snapshots saved on a brick node.
+
+    Args:
+        brick_node (str): Node of the brick.
+
+    Kwargs:
+        brick_path (str): Path of the brick whose snapshots are removed.
+            Defaults to None, to remove the snapshots of all the bricks.
+
+    Returns:
+        bool: True if the snapshots were removed. False otherwise.
+    """
+    if brick_path:
+        pattern = _get_brick_inventory_snapshot(brick_path, '*')
+    else:
+        pattern = "%s/*.json" % BRICK_INVENTORY_SNAPSHOT_DIR
+    ret, _, err = g.run(brick_node, "rm -f %s" % pattern)
+    if ret != 0:
+        g.log.error("Failed to remove the inventory snapshots on %s: %s",
+                    brick_node, err)
+        return False
+    return True
+
+
 def get_volume_type(brickdir_path):
     """Checks for the type of volume under test.
 
@@ -1734,17 +1836,6 @@ def parse_vol_file(mnode, vol_file):
           '/gluster/bricks/brick1/testvol_distributed_brick0',
            'remote-host': 'xx.xx.xx.xx', 'ping-timeout': '42'}}}
     """
-    vol_dict, data, key = {}, {}, None
-
-    def _create_dict_from_list(cur_dict, keys, value):
-        """Creates dynamic dictionary from a given list of keys and values"""
-        if len(keys) == 1:
-            cur_dict[keys[0]] = value
-            return
-        if keys[0] not in cur_dict:
-            cur_dict[keys[0]] = {}
-        _create_dict_from_list(cur_dict[keys[0]], keys[1:], value)
-
     ret, file_contents, err = g.run(mnode, "cat {}".format(vol_file))
     if ret:
         g.log.error("Failed to read the .vol file : %s", err)
@@ -1752,18 +1843,4 @@ def parse_vol_file(mnode, vol_file):
     if not file_contents:
         g.log.error("The given .vol file is empty")
         return None
-    for line in file_contents.split("\n"):
-        if line:
-            line = line.strip()
-            if line.startswith('end-volume'):
-                vol_dict[key] = data
-                data = {}
-            elif line.startswith("volume "):
-                key = line.split(" ")[-1]
-            elif line.startswith("subvolumes "):
-                key_list = line.split(" ")[0]
-                _create_dict_from_list(data, [key_list], line.split(" ")[1:])
-            else:
-                key_list = line.split(" ")[:-1]
-                _create_dict_from_list(data, key_list, line.split(" ")[-1])
-    return vol_dict
+    return get_volfile_graph(file_contents).to_dict()
@@ -0,0 +1,144 @@
+#  Copyright (C) 2021 Red Hat, Inc. <http://www.redhat.com>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License along
+#  with this program; if not, write to the Free Software Foundation, Inc.,
+#  51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+"""
+    Description: Lists the files and dirs of a brick, skipping the gluster
+        internal dirs and the DHT linkto files. The listing can be saved as
+        a snapshot on the node, in which case only the paths added, removed
+        or changed since the previous snapshot are printed, as json.
+"""
+
+from __future__ import print_function
+import argparse
+import json
+import os
+import stat
+import sys
+
+SKIP_NAMES = ('.glusterfs', '.trashcan')
+# Mode of the DHT linkto files, which are not real files
+LINKTO_MODE = 0o1000
+
+
+def _scan_dir(path):
+    """List a dir as (path, lstat) tuples without following symlinks."""
+    if hasattr(os, 'scandir'):
+        return [(entry.path, entry.stat(follow_symlinks=False))
+                for entry in os.scandir(path)]
+    return [(os.path.join(path, name), os.lstat(os.path.join(path, name)))
+            for name in os.listdir(path)]
+
+
+def _state(st):
+    """Get the state of an entry compared between two snapshots."""
+    mtime = getattr(st, 'st_mtime_ns', None) or int(st.st_mtime * 1e9)
+    return "%o:%d:%d" % (st.st_mode, st.st_size, mtime)
+
+
+def scan_brick(brick_path, dirs=True, files=True, skip=()):
+    """Scan the brick and get the state of its entries.
+
+    Args:
+        brick_path (str): Path of the brick.
+
+    Kwargs:
+        dirs (bool): Include the dirs, the brick path included.
+        files (bool): Include everything which is not a dir if dirs is
+            set, as find without -type does, and only the regular files
+            otherwise, as find -type f does.
+        skip (tuple): Names of the entries to skip besides SKIP_NAMES.
+
+    Returns:
+        dict: Dict with the path of each entry as key and its state as
+            value.
+    """
+    skip_names = set(SKIP_NAMES) | set(skip)
+    entries = {}
+    if dirs:
+        entries[brick_path] = _state(os.lstat(brick_path))
+    pending = [brick_path]
+    while pending:
+        for path, st in _scan_dir(pending.pop()):
+            if os.path.basename(path) in skip_names:
+                continue
+            if stat.S_ISDIR(st.st_mode):
+                pending.append(path)
+                if dirs:
+                    entries[path] = _state(st)
+            elif (files and stat.S_IMODE(st.st_mode) != LINKTO_MODE and
+                  (dirs or stat.S_ISREG(st.st_mode))):
+                entries[path] = _state(st)
+    return entries
+
+
+def get_delta(previous, current):
+    """Get the paths added, removed and changed between two snapshots."""
+    return {'added': sorted(set(current) - set(previous)),
+            'removed': sorted(set(previous) - set(current)),
+            'changed': sorted(path for path, state in current.items()
+                              if path in previous and
+                              previous[path] != state)}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="List the files and dirs of a brick.")
+    parser.add_argument('--no-dirs', action='store_false', dest='dirs',
+                        help="Do not list the dirs.")
+    parser.add_argument('--no-files', action='store_false', dest='files',
+                        help="Do not list the files.")
+    parser.add_argument('-s', '--skip', action='append', default=[],
+                        help="Name of the entries to skip.")
+    parser.add_argument('--snapshot', default=None,
+                        help="File in which the listing is saved. The paths "
+                        "changed since the listing previously saved in it "
+                        "are printed as json instead of the listing.")
+    parser.add_argument('brick_path', help="Path of the brick.")
+    args = parser.parse_args()
+
+    brick_path = os.path.abspath(args.brick_path)
+    try:
+        entries = scan_brick(brick_path, args.dirs, args.files, args.skip)
+    except OSError as err:
+        print("Failed to scan %s: %s" % (brick_path, err), file=sys.stderr)
+        return 1
+
+    if args.snapshot is None:
+        for path in sorted(entries):
+            print(path)
+        return 0
+
+    previous = None
+    if os.path.isfile(args.snapshot):
+        with open(args.snapshot) as snapshot_fd:
+            previous = json.load(snapshot_fd)
+    delta = get_delta(previous or {}, entries)
+    delta['total'] = len(entries)
+    delta['first'] = previous is None
+
+    snapshot_dir = os.path.dirname(os.path.abspath(args.snapshot))
+    if not os.path.isdir(snapshot_dir):
+        os.makedirs(snapshot_dir)
+    tmp_path = "%s.tmp" % args.snapshot
+    with open(tmp_path, 'w') as snapshot_fd:
+        json.dump(entries, snapshot_fd)
+    os.rename(tmp_path, args.snapshot)
+    print(json.dumps(delta))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+#  Copyright (C) 2021 Red Hat, Inc. <http://www.redhat.com>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License along
+#  with this program; if not, write to the Free Software Foundation, Inc.,
+#  51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+"""
+    Description: Prints one json record per entry of a brick with its gfid,
+        type, size, mode, owner, selected xattrs and optionally the sha256
+        of its content. Gluster internal dirs are skipped.
+"""
+
+from __future__ import print_function
+import argparse
+import hashlib
+import json
+import os
+import stat
+import subprocess
+import sys
+
+SKIP_DIRS = ('.glusterfs', '.landfill', '.trashcan')
+# xattrs always collected as they are needed to match or check entries
+KEY_XATTRS = ('trusted.gfid', 'trusted.ec.size', 'trusted.ec.version',
+              'trusted.ec.config', 'trusted.glusterfs.dht.linkto')
+
+
+def get_xattrs(path):
+    """Get all the xattrs of path, hex encoded, without following links."""
+    xattrs = {}
+    if hasattr(os, 'listxattr'):
+        for name in os.listxattr(path, follow_symlinks=False):
+            try:
+                value = os.getxattr(path, name, follow_symlinks=False)
+            except OSError:
+                continue
+            xattrs[name] = '0x' + bytearray(value).hex()
+        return xattrs
+
+    # Python 2 has no xattr support, use getfattr
+    proc = subprocess.Popen(['getfattr', '-h', '-d', '-m', '.', '-e', 'hex',
+                             '--absolute-names', path],
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    out, _ = proc.communicate()
+    for line in out.decode('utf-8', 'replace').splitlines():
+        if '=' in line and not line.startswith('#'):
+            name, value = line.split('=', 1)
+            xattrs[name] = value
+    return xattrs
+
+
+def get_sha256(path):
+    """Get the sha256 of the content of a file."""
+    sha = hashlib.sha256()
+    with open(path, 'rb') as file_fd:
+        for chunk in iter(lambda: file_fd.read(1024 * 1024), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def get_record(brick_path, path, prefixes, content_hash):
+    """Get the metadata record of path."""
+    st = os.lstat(path)
+    if stat.S_ISDIR(st.st_mode):
+        entry_type = 'd'
+    elif stat.S_ISLNK(st.st_mode):
+        entry_type = 'l'
+    else:
+        entry_type = 'f'
+    xattrs = get_xattrs(path)
+    record = {
+        'path': os.path.relpath(path, brick_path),
+        'type': entry_type,
+        'gfid': xattrs.get('trusted.gfid'),
+        'size': st.st_size if entry_type != 'd' else None,
+        'mode': st.st_mode,
+        'uid': st.st_uid,
+        'gid': st.st_gid,
+        'xattrs': dict((name, value) for name, value in xattrs.items()
+                       if name in KEY_XATTRS or name.startswith(prefixes)),
+    }
+    if entry_type == 'l':
+        record['target'] = os.readlink(path)
+    if content_hash and entry_type == 'f':
+        record['sha256'] = get_sha256(path)
+    return record
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Print the metadata of all the entries of a brick.")
+    parser.add_argument('-x', '--xattr-prefix', action='append',
+                        dest='prefixes', default=[],
+                        help="Collect xattrs starting with this prefix.")
+    parser.add_argument('-c', '--content-hash', action='store_true',
+                        dest='content_hash',
+                        help="Collect the sha256 of the regular files.")
+    parser.add_argument('brick_path', help="Path of the brick.")
+    args = parser.parse_args()
+
+    brick_path = os.path.abspath(args.brick_path)
+    prefixes = tuple(args.prefixes)
+    rc = 0
+    for dirpath, dirnames, filenames in os.walk(brick_path):
+        if dirpath == brick_path:
+            dirnames[:] = [name for name in dirnames
+                           if name not in SKIP_DIRS]
+        for name in sorted(dirnames) + sorted(filenames):
+            path = os.path.join(dirpath, name)
+            try:
+                record = get_record(brick_path, path, prefixes,
+                                    args.content_hash)
+            except (IOError, OSError) as err:
+                print("Failed to get metadata of %s: %s" % (path, err),
+                      file=sys.stderr)
+                rc = 1
+                continue
+            print(json.dumps(record, sort_keys=True))
+    return rc
+
+
+if __name__ == "__main__":
+    sys.exit(main())
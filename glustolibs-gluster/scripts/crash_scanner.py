@@ -0,0 +1,206 @@
+#  Copyright (C) 2021 Red Hat, Inc. <http://www.redhat.com>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License along
+#  with this program; if not, write to the Free Software Foundation, Inc.,
+#  51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+"""
+    Description: Scans a node for crashes since a given time and prints
+        them as a json list. Crashes are looked for in the core files of
+        the given dirs, in the 'time of crash' reports of the gluster logs
+        and in the dumps recorded by systemd-coredump.
+"""
+
+from __future__ import print_function
+import argparse
+import calendar
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+
+LOG_DIR = '/var/log/glusterfs'
+_CORE_NAME_RE = re.compile(r'^core(\.|$)')
+_SIGNAL_RE = re.compile(r'terminated with signal (SIG\w+|\d+)')
+
+
+def _run(cmd):
+    """Run a command, returning its output or None if it failed."""
+    try:
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE,
+                                stderr=subprocess.PIPE,
+                                universal_newlines=True)
+    except OSError:
+        return None
+    out, _ = proc.communicate()
+    if proc.returncode != 0:
+        return None
+    return out
+
+
+def _core_binary(path):
+    """Get the binary which dumped a core file from the output of file."""
+    out = _run(['file', path])
+    if not out:
+        return None
+    for pattern in (r"execfn: '([^']+)'", r"from '(\S+)"):
+        match = re.search(pattern, out)
+        if match:
+            return match.group(1)
+    return None
+
+
+def _gdb_backtrace(binary, core):
+    """Get the signal and the backtrace of a core file with gdb."""
+    out = _run(['gdb', '-batch', '-nx', '-ex', 'bt', binary, core])
+    if out is None:
+        return None, None
+    match = _SIGNAL_RE.search(out)
+    backtrace = [line for line in out.splitlines() if line.startswith('#')]
+    return (match.group(1) if match else None), backtrace or None
+
+
+def scan_core_files(paths, since, backtrace):
+    """Find the core files created in the paths after since."""
+    records = []
+    for path in paths:
+        path = os.path.expanduser(path)
+        if not os.path.isdir(path):
+            continue
+        for name in os.listdir(path):
+            core = os.path.join(path, name)
+            if not _CORE_NAME_RE.match(name) or not os.path.isfile(core):
+                continue
+            mtime = os.path.getmtime(core)
+            if mtime <= since:
+                continue
+            pids = [int(field) for field in name.split('.')[1:]
+                    if field.isdigit()]
+            record = {'source': 'core', 'path': core, 'time': int(mtime),
+                      'binary': _core_binary(core),
+                      'pid': pids[0] if pids else None,
+                      'signal': None, 'backtrace': None}
+            if backtrace and record['binary']:
+                record['signal'], record['backtrace'] = _gdb_backtrace(
+                    record['binary'], core)
+            records.append(record)
+    return records
+
+
+def scan_logs(log_dir, since):
+    """Find the crash reports written in the gluster logs after since.
+
+    A crash report looks like:
+
+    signal received: 11
+    time of crash:
+    2021-01-11 10:52:12
+    configuration details:
+    ...
+    /lib64/libglusterfs.so.0(+0x2a1e4)[0x7f4a8a0e01e4]
+    ---------
+    """
+    records = []
+    for root, _, names in os.walk(log_dir):
+        for name in names:
+            path = os.path.join(root, name)
+            if (not name.endswith('.log') or
+                    os.path.getmtime(path) <= since):
+                continue
+            with open(path) as log_file:
+                lines = [line.strip() for line in log_file]
+            for index, line in enumerate(lines):
+                if line != 'time of crash:' or index + 1 >= len(lines):
+                    continue
+                try:
+                    # The gluster logs are in UTC
+                    crash_time = calendar.timegm(time.strptime(
+                        lines[index + 1][:19], '%Y-%m-%d %H:%M:%S'))
+                except ValueError:
+                    continue
+                if crash_time <= since:
+                    continue
+                signal = None
+                if index and lines[index - 1].startswith('signal received'):
+                    signal = lines[index - 1].split(':', 1)[1].strip()
+                backtrace = []
+                for frame in lines[index + 2:]:
+                    if frame.startswith('---------'):
+                        break
+                    if '+0x' in frame or frame.startswith('/'):
+                        backtrace.append(frame)
+                records.append({'source': 'log', 'path': path,
+                                'time': crash_time,
+                                'binary': name[:-len('.log')], 'pid': None,
+                                'signal': signal,
+                                'backtrace': backtrace or None})
+    return records
+
+
+def scan_coredumpctl(since, backtrace):
+    """Find the dumps recorded by systemd-coredump after since.
+
+    coredumpctl list prints one dump per line:
+
+    Mon 2021-01-11 10:52:12 UTC  4242  0  0  11 present /usr/sbin/glusterfsd
+    """
+    out = _run(['coredumpctl', 'list', '--no-pager', '--no-legend'])
+    records = []
+    for line in (out or '').splitlines():
+        fields = line.split()
+        if len(fields) < 9 or not fields[4].isdigit():
+            continue
+        try:
+            crash_time = int(time.mktime(time.strptime(
+                ' '.join(fields[1:3]), '%Y-%m-%d %H:%M:%S')))
+        except ValueError:
+            continue
+        if crash_time <= since:
+            continue
+        record = {'source': 'coredumpctl', 'path': None, 'time': crash_time,
+                  'binary': fields[-1], 'pid': int(fields[4]),
+                  'signal': fields[7], 'backtrace': None}
+        if backtrace:
+            info = _run(['coredumpctl', 'info', '--no-pager', fields[4]])
+            frames = [frame.strip() for frame in (info or '').splitlines()
+                      if frame.strip().startswith('#')]
+            record['backtrace'] = frames or None
+        records.append(record)
+    return records
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Scan a node for crashes since a given time.")
+    parser.add_argument('-s', '--since', type=float, required=True,
+                        help="Epoch time after which crashes are reported.")
+    parser.add_argument('-p', '--path', action='append', default=[],
+                        help="Dir in which core files are looked for.")
+    parser.add_argument('-l', '--log-dir', default=LOG_DIR,
+                        help="Dir of the gluster logs.")
+    parser.add_argument('-b', '--backtrace', action='store_true',
+                        help="Get the backtrace of the core files, with "
+                        "gdb if it is installed.")
+    args = parser.parse_args()
+
+    records = (scan_core_files(args.path, args.since, args.backtrace) +
+               scan_logs(args.log_dir, args.since) +
+               scan_coredumpctl(args.since, args.backtrace))
+    print(json.dumps(sorted(records, key=lambda record: record['time'])))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
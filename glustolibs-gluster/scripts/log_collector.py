@@ -0,0 +1,157 @@
+#  Copyright (C) 2021 Red Hat, Inc. <http://www.redhat.com>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License along
+#  with this program; if not, write to the Free Software Foundation, Inc.,
+#  51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+"""
+    Description: Marks the current end of the gluster logs of a node and
+        collects what was appended to them since a mark.
+
+        'mark' optionally appends a message to every log, then saves the
+        size of every log under the name of the mark. 'collect' reads only
+        the bytes appended since the mark, parses the gluster log lines and
+        prints one json record per line followed by a json summary with the
+        counts per level, message id and xlator.
+"""
+
+from __future__ import print_function
+import argparse
+import json
+import os
+import re
+import sys
+
+STATE_DIR = '/var/tmp/glustolibs_logs'
+# [2021-01-11 10:52:12.123456 +0000] E [MSGID: 106061]
+# [glusterd-utils.c:123:glusterd_func] 0-management: message
+_LOG_LINE_RE = re.compile(
+    r'^\[(?P<time>\d{4}-\d\d-\d\d \d\d:\d\d:\d\d(?:\.\d+)?)(?: [+-]\d{4})?\]'
+    r' (?P<level>[TDINWECA]) (?:\[MSGID: (?P<msgid>\d+)\] )?'
+    r'\[(?P<source>[^\]]*)\] (?:\d+-)?(?P<xlator>[^:\s]*): (?P<message>.*)$')
+
+
+def list_logs(dirs, files):
+    """List the log files of the given dirs and the given files."""
+    logs = set()
+    for log_dir in dirs:
+        for root, _, names in os.walk(log_dir):
+            logs.update(os.path.join(root, name) for name in names
+                        if name.endswith('.log'))
+    logs.update(path for path in files if os.path.isfile(path))
+    return sorted(logs)
+
+
+def _state_path(state_dir, name):
+    return os.path.join(state_dir, "%s.json" % re.sub(r'[^\w.-]', '_', name))
+
+
+def mark(args):
+    logs = list_logs(args.dir, args.file)
+    if args.inject:
+        for path in logs:
+            with open(path, 'a') as log_file:
+                log_file.write("%s\n" % args.inject)
+    offsets = {}
+    for path in logs:
+        st = os.stat(path)
+        offsets[path] = [st.st_ino, st.st_size]
+    if not os.path.isdir(args.state_dir):
+        os.makedirs(args.state_dir)
+    with open(_state_path(args.state_dir, args.name), 'w') as state_file:
+        json.dump(offsets, state_file)
+    print(json.dumps({'files': len(offsets)}))
+    return 0
+
+
+def parse_line(line):
+    """Parse a gluster log line into a dict, None if it is not one."""
+    match = _LOG_LINE_RE.match(line)
+    if not match:
+        return None
+    record = match.groupdict()
+    if record['msgid'] is not None:
+        record['msgid'] = int(record['msgid'])
+    return record
+
+
+def collect(args):
+    path = _state_path(args.state_dir, args.name)
+    if not os.path.isfile(path):
+        print("No mark named %s" % args.name, file=sys.stderr)
+        return 1
+    with open(path) as state_file:
+        offsets = json.load(state_file)
+
+    summary = {'files': 0, 'bytes': 0, 'records': 0, 'truncated': False,
+               'level': {}, 'msgid': {}, 'xlator': {}}
+    for log in list_logs(args.dir, args.file):
+        st = os.stat(log)
+        ino, offset = offsets.get(log, (st.st_ino, 0))
+        # A rotated or truncated log is read from its start
+        if ino != st.st_ino or offset > st.st_size:
+            offset = 0
+        if offset == st.st_size:
+            continue
+        summary['files'] += 1
+        summary['bytes'] += st.st_size - offset
+        with open(log, 'rb') as fd:
+            fd.seek(offset)
+            for line in fd:
+                record = parse_line(line.decode('utf-8', 'replace').rstrip())
+                if record is None or record['level'] not in args.levels:
+                    continue
+                for key in ('level', 'msgid', 'xlator'):
+                    value = str(record[key])
+                    summary[key][value] = summary[key].get(value, 0) + 1
+                if summary['records'] >= args.max_records:
+                    summary['truncated'] = True
+                    continue
+                summary['records'] += 1
+                record['file'] = log
+                print(json.dumps(record))
+    print(json.dumps({'summary': summary}))
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Mark and collect the gluster logs of a node.")
+    parser.add_argument('action', choices=('mark', 'collect'))
+    parser.add_argument('name', help="Name of the mark.")
+    parser.add_argument('-d', '--dir', action='append', default=[],
+                        help="Dir whose *.log files are collected.")
+    parser.add_argument('-f', '--file', action='append', default=[],
+                        help="Log file to collect.")
+    parser.add_argument('-i', '--inject', default=None,
+                        help="Message appended to every log by mark.")
+    parser.add_argument('-l', '--levels', default='TDINWECA',
+                        help="Levels of the records to collect, e.g. 'EC'.")
+    parser.add_argument('-m', '--max-records', type=int, default=10000,
+                        help="Maximum number of records printed, the "
+                        "summary counts all of them.")
+    parser.add_argument('-s', '--state-dir', default=STATE_DIR,
+                        help="Dir in which the marks are saved.")
+    args = parser.parse_args()
+    try:
+        if args.action == 'mark':
+            return mark(args)
+        return collect(args)
+    except (IOError, OSError) as err:
+        print("Failed to %s the logs: %s" % (args.action, err),
+              file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
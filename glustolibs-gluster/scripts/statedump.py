@@ -0,0 +1,179 @@
+#  Copyright (C) 2021 Red Hat, Inc. <http://www.redhat.com>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License along
+#  with this program; if not, write to the Free Software Foundation, Inc.,
+#  51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+"""
+    Description: Takes statedumps of gluster processes by sending them
+        SIGUSR1, waits for the dumps to be written and prints for each
+        process one json line with the memory accounting per xlator and
+        mem-type, the inode and fd table sizes and the call-pool depth.
+        Parsing is done on the node so that only the summary is sent back.
+"""
+
+from __future__ import print_function
+import argparse
+import glob
+import json
+import os
+import re
+import signal
+import sys
+import time
+
+_MEMUSAGE_RE = re.compile(r'^(?P<xlator>.+) - usage-type (?P<type>\S+) '
+                          r'memusage$')
+_FDENTRY_RE = re.compile(r'^(?P<fdtable>.+\.fdtable)\.fdentry\[\d+\]$')
+
+
+def _to_number(value):
+    try:
+        return int(value)
+    except ValueError:
+        try:
+            return float(value)
+        except ValueError:
+            return value
+
+
+def parse_statedump(lines):
+    """Parse the lines of a statedump.
+
+    Args:
+        lines (iterable): Lines of the statedump file.
+
+    Returns:
+        dict: Dict with 'memory' ({xlator: {mem-type: {'size',
+            'num_allocs', 'max_size', 'max_num_allocs', 'total_allocs'}}}),
+            'itables' ({section: {'active_size', 'lru_size',
+            'purge_size', ...}}), 'fdtables' ({section: {'refcount',
+            'maxfds', 'open_fds'}}), 'callpool' ({'count'}), 'mallinfo'
+            and 'complete' (True if the dump end marker was found).
+    """
+    dump = {'memory': {}, 'itables': {}, 'fdtables': {},
+            'callpool': {'count': 0}, 'mallinfo': {}, 'complete': False}
+    section, target = None, None
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith('DUMP-END-TIME'):
+            dump['complete'] = True
+            continue
+        if line.startswith('[') and line.endswith(']'):
+            section = line[1:-1]
+            target = None
+            match = _MEMUSAGE_RE.match(section)
+            if match:
+                target = dump['memory'].setdefault(
+                    match.group('xlator'), {}).setdefault(
+                        match.group('type'), {})
+            elif section.endswith('.itable'):
+                target = dump['itables'].setdefault(section, {})
+            elif section.endswith('.fdtable'):
+                target = dump['fdtables'].setdefault(section,
+                                                     {'open_fds': 0})
+            elif section == 'mallinfo':
+                target = dump['mallinfo']
+            elif section.startswith('global.callpool.stack.'):
+                dump['callpool']['stacks'] = (
+                    dump['callpool'].get('stacks', 0) + 1)
+            elif section == 'global.callpool':
+                target = dump['callpool']
+            else:
+                match = _FDENTRY_RE.match(section)
+                if match:
+                    fdtable = dump['fdtables'].setdefault(
+                        match.group('fdtable'), {'open_fds': 0})
+                    fdtable['open_fds'] += 1
+            continue
+        if target is None or '=' not in line:
+            continue
+        key, value = line.split('=', 1)
+        # Keys of tables are prefixed by the section name
+        key = key.rsplit('.', 1)[-1]
+        if target is dump['callpool']:
+            if key == 'cnt':
+                target['count'] = _to_number(value)
+            continue
+        target[key] = _to_number(value)
+    return dump
+
+
+def _find_dump(dump_dir, pid, since):
+    """Find the complete dump of pid written after since."""
+    for path in sorted(glob.glob(os.path.join(dump_dir,
+                                              "*.%d.dump.*" % pid)),
+                       key=os.path.getmtime, reverse=True):
+        if os.path.getmtime(path) < since:
+            break
+        with open(path) as dump_file:
+            if 'DUMP-END-TIME' in dump_file.read():
+                return path
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Take and parse statedumps of gluster processes.")
+    parser.add_argument('-d', '--dump-dir', default='/var/run/gluster',
+                        help="Dir in which the statedumps are written.")
+    parser.add_argument('-t', '--timeout', type=int, default=60,
+                        help="Time in seconds to wait for the dumps.")
+    parser.add_argument('-r', '--remove', action='store_true',
+                        help="Remove the dump files once parsed.")
+    parser.add_argument('pids', metavar='PID', type=int, nargs='+',
+                        help="Pids of the processes to dump.")
+    args = parser.parse_args()
+
+    # Dump times are in seconds, allow for the granularity of mtime
+    since = time.time() - 1
+    rc = 0
+    pending = []
+    for pid in args.pids:
+        try:
+            os.kill(pid, signal.SIGUSR1)
+            pending.append(pid)
+        except OSError as err:
+            print(json.dumps({'pid': pid, 'error': str(err)}))
+            rc = 1
+
+    # All the processes dump concurrently, wait for all of them
+    start_time = time.time()
+    while pending:
+        for pid in list(pending):
+            path = _find_dump(args.dump_dir, pid, since)
+            if path is None:
+                continue
+            pending.remove(pid)
+            with open(path) as dump_file:
+                dump = parse_statedump(dump_file)
+            dump.update({'pid': pid, 'path': path})
+            if args.remove:
+                os.remove(path)
+            print(json.dumps(dump, sort_keys=True))
+        if pending and time.time() - start_time > args.timeout:
+            for pid in pending:
+                print(json.dumps({'pid': pid,
+                                  'error': "statedump not written in %d "
+                                           "seconds" % args.timeout}))
+            rc = 1
+            break
+        if pending:
+            time.sleep(0.5)
+    return rc
+
+
+if __name__ == "__main__":
+    sys.exit(main())
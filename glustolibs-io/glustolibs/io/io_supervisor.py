@@ -0,0 +1,248 @@
+#  Copyright (C) 2021 Red Hat, Inc. <http://www.redhat.com>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License along
+#  with this program; if not, write to the Free Software Foundation, Inc.,
+#  51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+"""
+    Description: Supervisor watching the IO processes started with
+        g.run_async on all the mounts concurrently.
+"""
+
+from collections import deque
+import errno
+import os
+import re
+import select
+import time
+
+from glusto.core import Glusto as g
+
+# Number of output lines of a process kept in memory for error reporting
+TAIL_LINES = 20
+
+
+class _WatchedProc(object):
+    """State of one IO process watched by the IOSupervisor."""
+
+    def __init__(self, proc, name, log_path):
+        self.proc = proc
+        self.name = name
+        self.log_path = log_path
+        self.log_fd = open(log_path, 'ab') if log_path else None
+        self.fds = {}
+        for stream in (proc.stdout, proc.stderr):
+            if stream is not None and not stream.closed:
+                self.fds[stream.fileno()] = b''
+        self.tail = deque(maxlen=TAIL_LINES)
+        self.bytes = 0
+        self.lines = 0
+        self.ops = 0
+        self.start_time = time.time()
+        self.end_time = None
+        self.returncode = None
+
+
+class IOSupervisor(object):
+    """Watch IO processes concurrently, failing fast on the first error.
+
+    The stdout and stderr of all the processes are read as they are
+    produced, streamed to a log file per process if log_dir is given and
+    otherwise dropped except for the last lines, so that huge outputs do
+    not accumulate in memory. A failure is reported as soon as the process
+    exits, whatever its position in the list.
+
+    Example:
+        supervisor = IOSupervisor(all_mounts_procs, mounts,
+                                  kill_on_failure=True)
+        ret = supervisor.wait()
+        g.log.info(supervisor.progress())
+
+    Note:
+        Killing a process kills the local ssh session of g.run_async, the
+        remote command is not guaranteed to stop with it.
+    """
+
+    def __init__(self, procs, mounts=None, log_dir=None,
+                 progress_pattern=None, kill_on_failure=False):
+        """
+        Args:
+            procs (list): Processes returned by g.run_async.
+
+        Kwargs:
+            mounts (list): GlusterMount objs on which the processes were
+                started, used to name the processes.
+            log_dir (str): Local dir in which the output of each process is
+                streamed to '<index>_<client>.log'. Defaults to None.
+            progress_pattern (str): Regex matching the output lines which
+                count as one operation. Defaults to every line.
+            kill_on_failure (bool): If True, kill all the other processes
+                as soon as one fails. Defaults to False.
+        """
+        if not isinstance(procs, list):
+            procs = [procs]
+        if mounts is not None and not isinstance(mounts, list):
+            mounts = [mounts]
+        self.progress_regex = (re.compile(progress_pattern)
+                               if progress_pattern else None)
+        self.kill_on_failure = kill_on_failure
+        if log_dir and not os.path.isdir(log_dir):
+            os.makedirs(log_dir)
+
+        self.watched = []
+        for index, proc in enumerate(procs):
+            if mounts and index < len(mounts):
+                name = "%s:%s" % (mounts[index].client_system,
+                                  mounts[index].mountpoint)
+                host = mounts[index].client_system
+            else:
+                name = host = "proc%d" % index
+            log_path = (os.path.join(log_dir, "%d_%s.log" % (index, host))
+                        if log_dir else None)
+            self.watched.append(_WatchedProc(proc, name, log_path))
+        self.failed = []
+
+    def _handle_output(self, watched, data):
+        """Account and stream a chunk of the output of a process."""
+        watched.bytes += len(data)
+        if watched.log_fd:
+            watched.log_fd.write(data)
+        lines = data.split(b'\n')
+        for line in lines[:-1]:
+            line = line.decode('utf-8', 'replace')
+            watched.lines += 1
+            watched.tail.append(line)
+            if (self.progress_regex is None or
+                    self.progress_regex.search(line)):
+                watched.ops += 1
+
+    def _read(self, timeout):
+        """Read the available output of all the processes."""
+        fd_map = {}
+        for watched in self.watched:
+            for fd in watched.fds:
+                fd_map[fd] = watched
+        if not fd_map:
+            time.sleep(timeout)
+            return
+        try:
+            readable, _, _ = select.select(list(fd_map), [], [], timeout)
+        except select.error as err:
+            if err.args[0] == errno.EINTR:
+                return
+            raise
+        for fd in readable:
+            watched = fd_map[fd]
+            data = os.read(fd, 65536)
+            if not data:
+                # EOF, flush the partial last line
+                if watched.fds[fd]:
+                    self._handle_output(watched, watched.fds[fd] + b'\n')
+                del watched.fds[fd]
+                continue
+            data = watched.fds[fd] + data
+            last_newline = data.rfind(b'\n') + 1
+            watched.fds[fd] = data[last_newline:]
+            self._handle_output(watched, data[:last_newline])
+
+    def _reap(self):
+        """Collect the exit status of the processes which are done."""
+        for watched in self.watched:
+            if watched.returncode is not None or watched.fds:
+                continue
+            returncode = watched.proc.poll()
+            if returncode is None:
+                continue
+            watched.returncode = returncode
+            watched.end_time = time.time()
+            if watched.log_fd:
+                watched.log_fd.close()
+            if returncode != 0:
+                g.log.error("IO Failed on %s with return code %s:\n%s",
+                            watched.name, returncode,
+                            '\n'.join(watched.tail))
+                self.failed.append(watched)
+            else:
+                g.log.info("IO Successful on %s", watched.name)
+
+    def kill(self):
+        """Kill all the processes still running."""
+        for watched in self.watched:
+            if watched.returncode is None and watched.proc.poll() is None:
+                g.log.info("Killing IO on %s", watched.name)
+                watched.proc.kill()
+                # Do not wait for the output of a killed process
+                watched.fds.clear()
+
+    def is_running(self):
+        """Check whether any process is still running."""
+        return any(watched.returncode is None for watched in self.watched)
+
+    def wait(self, timeout=None, fail_fast=False, poll_interval=1):
+        """Wait for the processes to complete.
+
+        Kwargs:
+            timeout (int): Time in seconds to wait, None to wait for ever.
+            fail_fast (bool): If True, return as soon as one process
+                fails. The other processes are killed if kill_on_failure
+                is set, otherwise they are left running.
+            poll_interval (float): Max time in seconds between two checks
+                of the exit status of the processes.
+
+        Returns:
+            bool: True if all the processes completed successfully within
+                timeout. False otherwise.
+        """
+        start_time = time.time()
+        while self.is_running():
+            self._read(poll_interval)
+            self._reap()
+            if self.failed:
+                if self.kill_on_failure:
+                    self.kill()
+                if fail_fast or self.kill_on_failure:
+                    break
+            if timeout is not None and time.time() - start_time > timeout:
+                g.log.error("IO is still running after %s seconds on %s",
+                            timeout, [watched.name for watched in self.watched
+                                      if watched.returncode is None])
+                return False
+        # Drain and reap the killed processes
+        if self.kill_on_failure and self.failed:
+            while self.is_running() and time.time() - start_time < 60:
+                self._read(0.1)
+                self._reap()
+        return not self.failed and not self.is_running()
+
+    def progress(self):
+        """Get the live progress of all the processes.
+
+        Returns:
+            list: A dict per process with 'name', 'running', 'returncode',
+                'elapsed', 'bytes', 'lines', 'ops' and 'ops_per_sec'.
+        """
+        progress = []
+        now = time.time()
+        for watched in self.watched:
+            elapsed = (watched.end_time or now) - watched.start_time
+            progress.append({
+                'name': watched.name,
+                'running': watched.returncode is None,
+                'returncode': watched.returncode,
+                'elapsed': elapsed,
+                'bytes': watched.bytes,
+                'lines': watched.lines,
+                'ops': watched.ops,
+                'ops_per_sec': watched.ops / elapsed if elapsed else 0.0,
+                'log_path': watched.log_path})
+        return progress
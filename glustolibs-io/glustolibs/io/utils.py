@@ -18,6 +18,7 @@
     Description: Helper library for io modules.
 """
 from multiprocessing import Pool
+import json
 import os
 import subprocess
 
@@ -25,6 +26,7 @@ from glusto.core import Glusto as g
 from glustolibs.gluster.glusterfile import file_exists
 from glustolibs.gluster.mount_ops import GlusterMount
 from glustolibs.gluster.volume_libs import get_subvols
+from glustolibs.io.io_supervisor import IOSupervisor
 from glustolibs.misc.misc_libs import upload_scripts
 
 
@@ -233,15 +235,28 @@ def view_snaps_from_mount(mounts, snaps):
     return _rc
 
 
-def validate_io_procs(all_mounts_procs, mounts):
+def validate_io_procs(all_mounts_procs, mounts, fail_fast=False,
+                      kill_on_failure=False, log_dir=None):
     """Validate whether IO was successful or not.
 
+    All the processes are watched concurrently by an IOSupervisor, so a
+    failure is reported as soon as it happens and the output of the
+    processes is not buffered in memory.
+
     Args:
         all_mounts_procs (list): List of open connection descriptor as
             returned by g.run_async method.
         mounts (list): List of all GlusterMount objs on which process were
             started.
 
+    Kwargs:
+        fail_fast (bool): If True, return False as soon as IO fails on
+            one of the mounts instead of waiting for all of them.
+        kill_on_failure (bool): If True, kill the IO on all the other
+            mounts as soon as IO fails on one of them.
+        log_dir (str): If set, the output of the IO of every mount is
+            streamed to a file in this local dir.
+
     Returns:
         bool: True if IO is successful on all mounts. False otherwise.
     """
@@ -251,26 +266,17 @@ def validate_io_procs(all_mounts_procs, mounts):
     if isinstance(mounts, GlusterMount):
         mounts = [mounts]
 
-    _rc = True
     g.log.info("Start validating IO procs")
-    for i, proc in enumerate(all_mounts_procs):
-        g.log.info("Validating IO on %s:%s", mounts[i].client_system,
-                   mounts[i].mountpoint)
-        ret, _, _ = proc.async_communicate()
-        if ret != 0:
-            g.log.error("IO Failed on %s:%s", mounts[i].client_system,
-                        mounts[i].mountpoint)
-            _rc = False
-        else:
-            g.log.info("IO Successful on %s:%s", mounts[i].client_system,
-                       mounts[i].mountpoint)
-    if _rc:
+    supervisor = IOSupervisor(all_mounts_procs, mounts, log_dir=log_dir,
+                              kill_on_failure=kill_on_failure)
+    if supervisor.wait(fail_fast=fail_fast):
         g.log.info("IO is successful on all mounts")
         return True
     return False
 
 
-def wait_for_io_to_complete(all_mounts_procs, mounts):
+def wait_for_io_to_complete(all_mounts_procs, mounts, fail_fast=False,
+                            kill_on_failure=False, log_dir=None):
     """Waits for IO to complete
 
     Args:
@@ -279,6 +285,14 @@ def wait_for_io_to_complete(all_mounts_procs, mounts):
         mounts (list): List of all GlusterMount objs on which process were
             started.
 
+    Kwargs:
+        fail_fast (bool): If True, return False as soon as IO fails on
+            one of the mounts instead of waiting for all of them.
+        kill_on_failure (bool): If True, kill the IO on all the other
+            mounts as soon as IO fails on one of them.
+        log_dir (str): If set, the output of the IO of every mount is
+            streamed to a file in this local dir.
+
     Returns:
         bool: True if IO is complete on all mounts. False otherwise.
     """
@@ -288,33 +302,42 @@ def wait_for_io_to_complete(all_mounts_procs, mounts):
     if isinstance(mounts, GlusterMount):
         mounts = [mounts]
 
-    _rc = True
-    for i, proc in enumerate(all_mounts_procs):
-        g.log.info("Waiting for IO to be complete on %s:%s",
-                   mounts[i].client_system, mounts[i].mountpoint)
-        ret, _, _ = proc.async_communicate()
-        if ret != 0:
-            g.log.error("IO Not complete on %s:%s", mounts[i].client_system,
-                        mounts[i].mountpoint)
-            _rc = False
-        else:
-            g.log.info("IO is complete on %s:%s", mounts[i].client_system,
-                       mounts[i].mountpoint)
-    return _rc
+    g.log.info("Waiting for IO to be complete on %s",
+               ["%s:%s" % (mount.client_system, mount.mountpoint)
+                for mount in mounts])
+    supervisor = IOSupervisor(all_mounts_procs, mounts, log_dir=log_dir,
+                              kill_on_failure=kill_on_failure)
+    return supervisor.wait(fail_fast=fail_fast)
 
 
-def cleanup_mounts(mounts):
+def cleanup_mounts(mounts, num_of_workers=32):
     """Removes all the data from all the mountpoints
 
+    The data is removed by parallel_rm.py, which deletes the tree bottom-up
+    with parallel workers and verifies that the mount is empty from its own
+    bookkeeping, so a single command is run per mount and all the mounts
+    are cleaned up concurrently.
+
     Args:
         mounts (list): List of all GlusterMount objs.
 
+    Kwargs:
+        num_of_workers (int): Number of parallel workers deleting the data
+            on each mount. Defaults to 32.
+
     Returns:
         bool: True if cleanup is successful on all mounts. False otherwise.
     """
     if isinstance(mounts, GlusterMount):
         mounts = [mounts]
 
+    script_path = "/usr/share/glustolibs/io/scripts/parallel_rm.py"
+    clients = list(set(mount_obj.client_system for mount_obj in mounts))
+    if not upload_scripts(clients, script_path):
+        g.log.error("Failed to upload %s to clients %s", script_path,
+                    clients)
+        return False
+
     g.log.info("Start cleanup mounts")
     all_mounts_procs = []
     valid_mounts = []
@@ -326,61 +349,36 @@ def cleanup_mounts(mounts):
             g.log.error("%s on %s is not a valid mount point",
                         mount_obj.mountpoint, mount_obj.client_system)
             continue
-        cmd = "rm -rf %s/*" % (mount_obj.mountpoint)
+        cmd = ("/usr/bin/env python %s -w %d %s"
+               % (script_path, num_of_workers, mount_obj.mountpoint))
         proc = g.run_async(mount_obj.client_system, cmd, user=mount_obj.user)
         all_mounts_procs.append(proc)
         valid_mounts.append(mount_obj)
-    g.log.info("rm -rf on all clients is complete. Validating deletion now...")
-
-    # Get cleanup status
-    _rc_rmdir = True
-    for i, proc in enumerate(all_mounts_procs):
-        ret, out, err = proc.async_communicate()
-        if ret != 0 or out or err:
-            g.log.error("Deleting files/dirs Failed on %s:%s",
-                        valid_mounts[i].client_system,
-                        valid_mounts[i].mountpoint)
-            _rc_rmdir = False
-        else:
-            g.log.info("Deleting files/dirs is successful on %s:%s",
-                       valid_mounts[i].client_system,
-                       valid_mounts[i].mountpoint)
-    if _rc_rmdir:
-        g.log.info("Successfully deleted files/dirs from all mounts")
-    else:
-        g.log.error("Deleting files/dirs failed on some of the mounts")
-
-    # Check if mount points are empty
-    ignore_dirs_list = [".trashcan"]
-    ignore_dirs = r"\|".join(ignore_dirs_list)
-    all_mounts_procs = []
-    for mount_obj in mounts:
-        cmd = ("find %s -mindepth 1 | grep -ve '%s'" %
-               (mount_obj.mountpoint, ignore_dirs))
-        proc = g.run_async(mount_obj.client_system, cmd, user=mount_obj.user)
-        all_mounts_procs.append(proc)
 
     # Get cleanup status
-    _rc_lookup = True
+    _rc = True
     for i, proc in enumerate(all_mounts_procs):
         ret, out, err = proc.async_communicate()
-        if ret == 0:
-            g.log.error("Mount %s on %s is still having entries:\n%s",
-                        mounts[i].mountpoint, mounts[i].client_system, out)
-            _rc_lookup = False
+        try:
+            summary = json.loads(out.strip().splitlines()[-1])
+        except (ValueError, IndexError):
+            summary = None
+        if ret != 0 or summary is None:
+            g.log.error("Mount %s on %s is still having entries: %s %s",
+                        valid_mounts[i].mountpoint,
+                        valid_mounts[i].client_system, out, err)
+            _rc = False
         else:
-            g.log.info("Mount %s on %s is cleaned up\n%s",
-                       mounts[i].mountpoint, mounts[i].client_system, out)
-    if _rc_lookup:
+            g.log.info("Mount %s on %s is cleaned up: deleted %d entries in "
+                       "%.2f seconds (%.1f entries/sec)",
+                       valid_mounts[i].mountpoint,
+                       valid_mounts[i].client_system, summary['deleted'],
+                       summary['elapsed'], summary['deleted_per_sec'])
+    if _rc:
         g.log.info("All the mounts are successfully cleaned up")
     else:
         g.log.error("Failed to cleanup all mounts")
-
-    # List mounts entries
-    g.log.info("Listing mounts entries:")
-    list_all_files_and_dirs_mounts(mounts)
-
-    return _rc_lookup
+    return _rc
 
 
 def run_bonnie(servers, directory_to_run, username="root"):
@@ -718,23 +716,29 @@ def compare_dir_structure_mount_with_brick(mnthost, mntloc, brick_list, type):
     if type == 2:
         statformat = '%A'
 
+    # Run the listing on the mount and on all the bricks concurrently
     command = "find %s -mindepth 1 -type d | xargs -r stat -c '%s'" % (
         mntloc, statformat)
-    rcode, rout, _ = g.run(mnthost, command)
-    all_dir_mnt_perm = rout.strip().split('\n')
-
+    mnt_proc = g.run_async(mnthost, command)
+    brick_procs = []
     for brick in brick_list:
         brick_node, brick_path = brick.split(":")
         command = ("find %s -mindepth 1 -type d | grep -ve \".glusterfs\" | "
                    "xargs -r stat -c '%s'" % (brick_path, statformat))
-        rcode, rout, _ = g.run(brick_node, command)
+        brick_procs.append(g.run_async(brick_node, command))
+
+    _, rout, _ = mnt_proc.async_communicate()
+    all_dir_mnt_perm = rout.strip().split('\n')
+    _rc = True
+    for brick, proc in zip(brick_list, brick_procs):
+        _, rout, _ = proc.async_communicate()
         all_brick_dir_perm = rout.strip().split('\n')
-        retval = (all_dir_mnt_perm > all_brick_dir_perm) - (
-            all_dir_mnt_perm < all_brick_dir_perm)
-        if retval != 0:
-            return False
+        if all_dir_mnt_perm != all_brick_dir_perm:
+            g.log.error("Dir structure of %s differs from the mount",
+                        brick)
+            _rc = False
 
-    return True
+    return _rc
 
 
 def check_arequal_bricks_replicated(mnode, volname):
@@ -757,37 +761,41 @@ def check_arequal_bricks_replicated(mnode, volname):
     num_subvols = len(subvols_dict['volume_subvols'])
     g.log.info("Number of subvolumes in volume %s:", num_subvols)
 
-    # Get arequals and compare
-    for i in range(0, num_subvols):
-        # Get arequal for first brick
-        subvol_brick_list = subvols_dict['volume_subvols'][i]
-        node, brick_path = subvol_brick_list[0].split(':')
-        command = ('arequal-checksum -p %s '
-                   '-i .glusterfs -i .landfill -i .trashcan' % brick_path)
-        ret, arequal, _ = g.run(node, command)
-        if ret != 0:
-            g.log.error("Failed to calculate arequal for first brick"
-                        "of subvol %s of volume %s", i, volname)
-            return False
-        first_brick_total = arequal.splitlines()[-1].split(':')[-1]
-
-        # Get arequal for every brick and compare with first brick
-        for brick in subvol_brick_list[1:]:
+    # Start arequal on all the bricks of all the subvols concurrently
+    all_procs = []
+    for subvol_brick_list in subvols_dict['volume_subvols']:
+        subvol_procs = []
+        for brick in subvol_brick_list:
             node, brick_path = brick.split(':')
             command = ('arequal-checksum -p %s '
                        '-i .glusterfs -i .landfill -i .trashcan' % brick_path)
-            ret, brick_arequal, _ = g.run(node, command)
+            subvol_procs.append((brick, g.run_async(node, command)))
+        all_procs.append(subvol_procs)
+
+    # Get arequals and compare every brick with first brick of its subvol
+    _rc = True
+    for i, subvol_procs in enumerate(all_procs):
+        first_brick_total = None
+        for brick, proc in subvol_procs:
+            ret, brick_arequal, _ = proc.async_communicate()
             if ret != 0:
-                g.log.error('Failed to get arequal on brick %s' % brick)
-                return False
+                g.log.error('Failed to get arequal on brick %s of subvol %s '
+                            'of volume %s', brick, i, volname)
+                _rc = False
+                continue
             g.log.info('Getting arequal for %s is successful', brick)
             brick_total = brick_arequal.splitlines()[-1].split(':')[-1]
+            if first_brick_total is None:
+                first_brick_total = brick_total
             # compare arequal of first brick of subvol with all brick other
             # bricks in subvol
-            if first_brick_total != brick_total:
+            elif first_brick_total != brick_total:
                 g.log.error('Arequals for subvol and %s are not equal' % brick)
-                return False
-            g.log.info('Arequals for subvol and %s are equal', brick)
+                _rc = False
+            else:
+                g.log.info('Arequals for subvol and %s are equal', brick)
+    if not _rc:
+        return False
     g.log.info('All arequals are equal for volume %s', volname)
     return True
 
@@ -1026,7 +1034,82 @@ def open_file_fd(mountpoint, time, client, start_range=0,
     return proc
 
 
-def run_linux_untar(clients, mountpoint, dirs=('.')):
+def run_open_fds_workload(client, dirpath, num_of_fds=1000,
+                          patterns='write:1', duration=60, num_of_files=0,
+                          file_size=1048576, chunk_size=4096):
+    """Keep many FDs open on a dir and run operations on them.
+
+    A single open_fds_workload.py process on the client opens all the FDs
+    and runs the operations of each FD at its own interval, scheduled with
+    a timer wheel instead of a sleep per FD.
+
+    Args:
+        client (str): The client from which the FDs are to be opened.
+        dirpath (str): Dir on the mount point in which the files are
+            opened.
+
+    Kwargs:
+        num_of_fds (int): Number of FDs to keep open. (Default: 1000)
+        patterns (str): Comma separated list of 'op:interval' assigned to
+            the FDs in turn, op being one of write, read, fsync, lock or
+            stat and interval in seconds. (Default: 'write:1')
+        duration (int): Time in seconds for which the FDs are kept open.
+            (Default: 60)
+        num_of_files (int): Number of files the FDs are opened on, FDs
+            share files if less than num_of_fds. 0 for one file per FD.
+            (Default: 0)
+        file_size (int): Size of the files in bytes. (Default: 1048576)
+        chunk_size (int): Size of each read, write and lock in bytes.
+            (Default: 4096)
+
+    Returns:
+        proc(object): Returns a process object, None if the script could
+            not be uploaded. The last line of the output of the process
+            starting with '{' is a json report, followed by the end time,
+            see get_open_fds_workload_report().
+
+    Example:
+        proc = run_open_fds_workload(client, "/mnt/glusterfs/dir",
+                                     num_of_fds=5000,
+                                     patterns="write:1,read:1,lock:5")
+        ret, out, _ = proc.async_communicate()
+        report = get_open_fds_workload_report(out)
+    """
+    script_path = "/usr/share/glustolibs/io/scripts/open_fds_workload.py"
+    if not upload_scripts(client, script_path):
+        return None
+    cmd = ("/usr/bin/env python {} -n {} -f {} -p '{}' -s {} -c {} -t {} {}"
+           .format(script_path, num_of_fds, num_of_files, patterns,
+                   file_size, chunk_size, duration, dirpath))
+    return g.run_async(client, cmd)
+
+
+def get_open_fds_workload_report(output):
+    """Parse the report of open_fds_workload.py from its output.
+
+    Args:
+        output (str): Output of the process returned by
+            run_open_fds_workload().
+
+    Returns:
+        dict: Dict with 'num_of_fds', 'duration' and 'operations', which
+            has for each operation run its 'count', 'errors', 'avg_usec',
+            'max_usec' and 'histogram', the list of the number of
+            operations whose latency in microseconds was in [2^i, 2^(i+1)).
+        NoneType: None if the output has no report.
+    """
+    for line in reversed(output.splitlines()):
+        if line.startswith('{'):
+            try:
+                return json.loads(line)
+            except ValueError:
+                break
+    g.log.error("No report found in the output of open_fds_workload.py")
+    return None
+
+
+def run_linux_untar(clients, mountpoint, dirs=('.'), synthetic=True,
+                    seed=0):
     """Run linux kernal untar on a given mount point
 
     Args:
@@ -1037,6 +1120,12 @@ def run_linux_untar(clients, mountpoint, dirs=('.')):
     Kwagrs:
        dirs(tuple): A tuple of dirs where untar has to
                     started. (Default:('.'))
+       synthetic(bool): If True, untar a synthetic tree with the shape
+                        of the linux kernel tree generated from seed by
+                        synthetic_tree.py and streamed straight onto the
+                        mount, instead of downloading the kernel tarball.
+                        (Default: True)
+       seed(int): Seed of the synthetic tree. (Default: 0)
     Returns:
        list: Returns a list of process object else None
     """
@@ -1045,6 +1134,19 @@ def run_linux_untar(clients, mountpoint, dirs=('.')):
         clients = [clients]
 
     list_of_procs = []
+    if synthetic:
+        script_path = "/usr/share/glustolibs/io/scripts/synthetic_tree.py"
+        if not upload_scripts(clients, script_path):
+            return None
+        for client in clients:
+            for directory in dirs:
+                cmd = ("set -o pipefail; /usr/bin/env python {} tar "
+                       "--seed {} | tar -xf - -C {}/{}"
+                       .format(script_path, seed, mountpoint, directory))
+                proc = g.run_async(client, cmd)
+                list_of_procs.append(proc)
+        return list_of_procs
+
     for client in clients:
         # Download linux untar to root, so that it can be
         # utilized in subsequent run_linux_untar() calls.
@@ -0,0 +1,262 @@
+#!/usr/bin/env python
+#  Copyright (C) 2021  Red Hat, Inc. <http://www.redhat.com>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License along
+#  with this program; if not, write to the Free Software Foundation, Inc.,
+#  51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+"""
+    Description: Keeps thousands of FDs open on a mount from a single
+        process and runs read/write/fsync/lock/stat operations on each FD
+        at its own interval, scheduled with a timer wheel. At the end a
+        json report with a latency histogram per operation is printed.
+"""
+
+from __future__ import print_function
+import argparse
+import datetime
+import fcntl
+import json
+import os
+import random
+import resource
+import sys
+import time
+
+OPERATIONS = ('write', 'read', 'fsync', 'lock', 'stat')
+# Latency histogram buckets are powers of 2 in microseconds
+NUM_OF_BUCKETS = 32
+
+
+def is_root(path):
+    """Check whether the given path is '/' or not
+
+    Args:
+        path (str):  Path of the dir to check
+
+    Returns:
+        True if path is '/' , False otherwise
+    """
+    if os.path.realpath(os.path.abspath(path)) == '/':
+        print("Directory '%s' is the root of filesystem. "
+              "Not performing any operations on the root of filesystem" % (
+                  os.path.abspath(path)))
+        return True
+    return False
+
+
+def parse_patterns(patterns):
+    """Parse 'op:interval,...' into a list of (op, interval) tuples."""
+    parsed = []
+    for pattern in filter(None, patterns.split(',')):
+        op, _, interval = pattern.partition(':')
+        if op not in OPERATIONS:
+            raise ValueError("Unknown operation '%s', must be one of %s"
+                             % (op, ', '.join(OPERATIONS)))
+        parsed.append((op, float(interval or 1)))
+    return parsed
+
+
+class TimerWheel(object):
+    """Hashed timer wheel with a fixed tick.
+
+    Timers are stored in the slot of their expiry tick modulo the number of
+    slots, along with the number of full rotations left, so scheduling and
+    expiring a timer are O(1) whatever the number of FDs.
+    """
+
+    def __init__(self, tick, num_of_slots):
+        self.tick = tick
+        self.slots = [[] for _ in range(num_of_slots)]
+        self.current = 0
+
+    def schedule(self, item, delay):
+        ticks = max(1, int(round(delay / self.tick)))
+        rounds, offset = divmod(ticks, len(self.slots))
+        slot = (self.current + offset) % len(self.slots)
+        self.slots[slot].append((rounds, item))
+
+    def advance(self):
+        """Move to the next tick and return the items expiring in it."""
+        self.current = (self.current + 1) % len(self.slots)
+        expired, pending = [], []
+        for rounds, item in self.slots[self.current]:
+            if rounds:
+                pending.append((rounds - 1, item))
+            else:
+                expired.append(item)
+        self.slots[self.current] = pending
+        return expired
+
+
+class OpenFd(object):
+    """An open FD and the operation run on it."""
+
+    def __init__(self, path, op, interval, file_size, chunk_size):
+        self.path = path
+        self.op = op
+        self.interval = interval
+        self.file_size = file_size
+        self.chunk_size = chunk_size
+        self.fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        if os.fstat(self.fd).st_size < file_size:
+            os.ftruncate(self.fd, file_size)
+
+    def run(self, data):
+        offset = random.randint(0, max(self.file_size - self.chunk_size, 0))
+        if self.op == 'write':
+            os.lseek(self.fd, offset, os.SEEK_SET)
+            os.write(self.fd, data[:self.chunk_size])
+        elif self.op == 'read':
+            os.lseek(self.fd, offset, os.SEEK_SET)
+            os.read(self.fd, self.chunk_size)
+        elif self.op == 'fsync':
+            os.lseek(self.fd, offset, os.SEEK_SET)
+            os.write(self.fd, data[:self.chunk_size])
+            os.fsync(self.fd)
+        elif self.op == 'lock':
+            fcntl.lockf(self.fd, fcntl.LOCK_EX, self.chunk_size, offset)
+            fcntl.lockf(self.fd, fcntl.LOCK_UN, self.chunk_size, offset)
+        else:
+            os.fstat(self.fd)
+
+
+def open_fds_workload(args):
+    dir_path = os.path.abspath(args.dir)
+    if is_root(dir_path):
+        return 1
+    if not os.path.isdir(dir_path):
+        os.makedirs(dir_path)
+
+    patterns = parse_patterns(args.patterns)
+    num_of_files = args.num_of_files or args.num_of_fds
+
+    # Raise the limit of open files to what is needed, if allowed
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    needed = args.num_of_fds + 64
+    if soft != resource.RLIM_INFINITY and soft < needed:
+        if hard != resource.RLIM_INFINITY and hard < needed:
+            print("Can not open %d FDs, hard limit of open files is %d"
+                  % (args.num_of_fds, hard))
+            return 1
+        resource.setrlimit(resource.RLIMIT_NOFILE, (needed, hard))
+
+    fds = []
+    for index in range(args.num_of_fds):
+        op, interval = patterns[index % len(patterns)]
+        path = os.path.join(dir_path, "%s_%d" % (args.base_file_name,
+                                                 index % num_of_files))
+        try:
+            fds.append(OpenFd(path, op, interval, args.file_size,
+                              args.chunk_size))
+        except OSError as err:
+            print("Unable to open %s: %s" % (path, err))
+            return 1
+    print("Opened %d FDs on %d files under %s"
+          % (len(fds), num_of_files, dir_path))
+    sys.stdout.flush()
+
+    max_interval = max(interval for _, interval in patterns)
+    wheel = TimerWheel(args.tick, int(max_interval / args.tick) + 2)
+    for open_fd in fds:
+        # Spread the first run of the FDs over their interval
+        wheel.schedule(open_fd, random.uniform(0, open_fd.interval))
+
+    data = os.urandom(args.chunk_size)
+    stats = dict((op, {'count': 0, 'errors': 0, 'total_usec': 0,
+                       'max_usec': 0, 'histogram': [0] * NUM_OF_BUCKETS})
+                 for op in OPERATIONS)
+    rc = 0
+    start_time = time.time()
+    next_tick = start_time
+    while time.time() - start_time < args.duration:
+        next_tick += args.tick
+        delay = next_tick - time.time()
+        if delay > 0:
+            time.sleep(delay)
+        for open_fd in wheel.advance():
+            op_stats = stats[open_fd.op]
+            op_start = time.time()
+            try:
+                open_fd.run(data)
+            except (IOError, OSError) as err:
+                op_stats['errors'] += 1
+                rc = 1
+                print("%s on %s failed: %s" % (open_fd.op, open_fd.path,
+                                               err))
+            usec = int((time.time() - op_start) * 1000000)
+            op_stats['count'] += 1
+            op_stats['total_usec'] += usec
+            op_stats['max_usec'] = max(op_stats['max_usec'], usec)
+            bucket = min(max(usec, 1).bit_length() - 1, NUM_OF_BUCKETS - 1)
+            op_stats['histogram'][bucket] += 1
+            wheel.schedule(open_fd, open_fd.interval)
+
+    for open_fd in fds:
+        os.close(open_fd.fd)
+
+    report = {'num_of_fds': len(fds), 'duration': time.time() - start_time,
+              'operations': {}}
+    for op, op_stats in stats.items():
+        if not op_stats['count']:
+            continue
+        op_stats['avg_usec'] = op_stats['total_usec'] / op_stats['count']
+        # Trim the empty buckets at the end of the histogram
+        histogram = op_stats['histogram']
+        while histogram and not histogram[-1]:
+            histogram.pop()
+        report['operations'][op] = op_stats
+    print(json.dumps(report, sort_keys=True))
+    return rc
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=("Keep many FDs open on a dir and run operations on "
+                     "them at their own interval for a given time."),
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+
+    parser.add_argument('-n', '--num-of-fds', type=int, default=1000,
+                        dest='num_of_fds', help="Number of FDs to open.")
+    parser.add_argument('-f', '--num-of-files', type=int, default=0,
+                        dest='num_of_files',
+                        help="Number of files the FDs are opened on, FDs "
+                        "share files if less than num_of_fds. 0 for one "
+                        "file per FD.")
+    parser.add_argument('-p', '--patterns', default='write:1',
+                        help="Comma separated list of 'op:interval' assigned "
+                        "to the FDs in turn. op is one of %s and interval "
+                        "is in seconds. Example: write:1,read:0.5,lock:5"
+                        % ', '.join(OPERATIONS))
+    parser.add_argument('-s', '--file-size', type=int, default=1024 * 1024,
+                        dest='file_size', help="Size of the files.")
+    parser.add_argument('-c', '--chunk-size', type=int, default=4096,
+                        dest='chunk_size',
+                        help="Size of each read/write/lock.")
+    parser.add_argument('-t', '--duration', type=float, default=60,
+                        help="Time in seconds to run the operations.")
+    parser.add_argument('--tick', type=float, default=0.01,
+                        help="Resolution of the timer wheel in seconds.")
+    parser.add_argument('-b', '--base-file-name', default='openfd',
+                        dest='base_file_name', help="Base File Name")
+    parser.add_argument('dir', metavar='DIR', type=str,
+                        help="Directory on which operations has "
+                        "to be performed")
+    parser.set_defaults(func=open_fds_workload)
+
+    print("Starting Script: %s" % ' '.join(sys.argv))
+    print("StarTime :'%s' " % datetime.datetime.now())
+    args = parser.parse_args()
+    rc = args.func(args)
+    print("EndTime :'%s' " % datetime.datetime.now())
+    sys.exit(rc)
@@ -0,0 +1,209 @@
+#!/usr/bin/env python
+#  Copyright (C) 2021  Red Hat, Inc. <http://www.redhat.com>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License along
+#  with this program; if not, write to the Free Software Foundation, Inc.,
+#  51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+"""
+    Description: Removes everything under a dir with parallel workers.
+
+    Each dir is listed by one worker, which unlinks its files and queues its
+    sub-dirs for the other workers. A dir is removed as soon as all of its
+    sub-dirs are removed, so the tree is deleted bottom-up without a second
+    walk. Emptiness is verified from this bookkeeping and a json summary
+    with the number of entries deleted per second is printed on stdout.
+"""
+
+from __future__ import print_function
+import argparse
+import json
+import os
+import stat
+import sys
+import threading
+import time
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+MAX_ERRORS_REPORTED = 20
+
+
+class _Dir(object):
+    """A dir being removed and the number of its pending sub-dirs."""
+
+    def __init__(self, path, parent):
+        self.path = path
+        self.parent = parent
+        # The listing of the dir itself is pending as well
+        self.pending = 1
+
+
+def _list_dir(path):
+    """List a dir as (path, is_dir) tuples without following symlinks."""
+    if hasattr(os, 'scandir'):
+        return [(entry.path, entry.is_dir(follow_symlinks=False))
+                for entry in os.scandir(path)]
+    entries = []
+    for name in os.listdir(path):
+        entry_path = os.path.join(path, name)
+        entries.append((entry_path,
+                        stat.S_ISDIR(os.lstat(entry_path).st_mode)))
+    return entries
+
+
+class ParallelRemover(object):
+    """Remove the contents of a dir with parallel workers."""
+
+    def __init__(self, root, num_of_workers, ignore):
+        self.root = os.path.abspath(root)
+        self.num_of_workers = num_of_workers
+        self.ignore = set(ignore)
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.done = threading.Event()
+        self.deleted = 0
+        self.num_of_errors = 0
+        self.errors = []
+
+    def _error(self, path, err):
+        with self.lock:
+            self.num_of_errors += 1
+            if len(self.errors) < MAX_ERRORS_REPORTED:
+                self.errors.append("%s: %s" % (path, err))
+
+    def _finish(self, node):
+        """Mark one pending item of node done, removing it when empty."""
+        while node is not None:
+            with self.lock:
+                node.pending -= 1
+                if node.pending:
+                    return
+            if node.parent is None:
+                self.done.set()
+                return
+            try:
+                os.rmdir(node.path)
+                with self.lock:
+                    self.deleted += 1
+            except Exception as err:
+                self._error(node.path, err)
+            node = node.parent
+
+    def _process(self, node):
+        """List a dir, unlink its files and queue its sub-dirs."""
+        entries = _list_dir(node.path)
+        deleted = 0
+        try:
+            for path, is_dir in entries:
+                if (node.parent is None and
+                        os.path.basename(path) in self.ignore):
+                    continue
+                if is_dir:
+                    with self.lock:
+                        node.pending += 1
+                    self.queue.put(_Dir(path, node))
+                    continue
+                try:
+                    os.unlink(path)
+                    deleted += 1
+                except Exception as err:
+                    self._error(path, err)
+        finally:
+            with self.lock:
+                self.deleted += deleted
+
+    def _worker(self):
+        while not self.done.is_set():
+            try:
+                node = self.queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            try:
+                self._process(node)
+            except Exception as err:
+                # Record it instead of killing the worker, the dir must
+                # still be marked done for the removal to complete
+                self._error(node.path, err)
+            self._finish(node)
+
+    def run(self):
+        """Remove everything under root except the ignored entries.
+
+        Returns:
+            dict: Summary of the removal.
+        """
+        start_time = time.time()
+        self.queue.put(_Dir(self.root, None))
+        workers = []
+        for _ in range(self.num_of_workers):
+            worker = threading.Thread(target=self._worker)
+            worker.daemon = True
+            worker.start()
+            workers.append(worker)
+        for worker in workers:
+            worker.join()
+        elapsed = time.time() - start_time
+
+        # Only the top-level dir is listed again, the rest of the tree is
+        # known to be gone from the bookkeeping
+        remaining = []
+        if self.num_of_errors:
+            remaining = sorted(name for name in os.listdir(self.root)
+                               if name not in self.ignore)
+        return {'dir': self.root,
+                'deleted': self.deleted,
+                'elapsed': round(elapsed, 3),
+                'deleted_per_sec': round(self.deleted / max(elapsed, 1e-6),
+                                         1),
+                'num_of_errors': self.num_of_errors,
+                'errors': self.errors,
+                'remaining': remaining}
+
+
+def parallel_rm(args):
+    """Remove everything under args.dir and print a json summary."""
+    if os.path.realpath(os.path.abspath(args.dir)) == '/':
+        print("Directory '%s' is the root of filesystem. Not performing "
+              "any operations on the root of filesystem" % args.dir,
+              file=sys.stderr)
+        return 1
+    if not os.path.isdir(args.dir):
+        print("Directory '%s' does not exist" % args.dir, file=sys.stderr)
+        return 1
+    summary = ParallelRemover(args.dir, args.workers, args.ignore).run()
+    print(json.dumps(summary))
+    if summary['num_of_errors'] or summary['remaining']:
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Remove everything under a dir with parallel workers.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('-w', '--workers', type=int, default=32,
+                        help="Number of parallel workers.")
+    parser.add_argument('-i', '--ignore', action='append',
+                        default=['.trashcan'],
+                        help="Top-level entries to leave in place.")
+    parser.add_argument('dir', metavar='DIR', type=str,
+                        help="Directory whose contents are removed.")
+    parser.set_defaults(func=parallel_rm)
+
+    args = parser.parse_args()
+    rc = args.func(args)
+    sys.exit(rc)
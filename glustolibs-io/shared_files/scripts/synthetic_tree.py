@@ -0,0 +1,274 @@
+#!/usr/bin/env python
+#  Copyright (C) 2021  Red Hat, Inc. <http://www.redhat.com>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License along
+#  with this program; if not, write to the Free Software Foundation, Inc.,
+#  51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+"""
+    Description: Generates a deterministic synthetic source tree with the
+        shape of a linux kernel tree (number of files and dirs, depth, file
+        size distribution, symlinks and hardlinks) from a seed. The tree is
+        either streamed as a tar archive to stdout or created directly
+        under a dir by parallel workers.
+"""
+
+from __future__ import print_function
+import argparse
+import datetime
+import io
+import math
+from multiprocessing import Process
+import os
+import random
+import sys
+import tarfile
+
+# Shape of linux-5.4: ~66k files in ~4.4k dirs, up to 10 levels deep,
+# median file size of ~6KB with a long tail.
+DEFAULT_NUM_OF_FILES = 70000
+DEFAULT_NUM_OF_DIRS = 4500
+DEFAULT_MAX_DEPTH = 10
+DEFAULT_NUM_OF_SYMLINKS = 60
+DEFAULT_NUM_OF_HARDLINKS = 60
+MEDIAN_FILE_SIZE = 6 * 1024
+FILE_SIZE_SIGMA = 1.3
+MAX_FILE_SIZE = 4 * 1024 * 1024
+FILE_EXTENSIONS = ('.c', '.c', '.c', '.h', '.h', '.S', '.txt', '.dts',
+                   '.rst', '')
+# Fixed mtime so that the generated archives are byte identical
+MTIME = 1577836800
+CONTENT_BLOCK_SIZE = 1024 * 1024
+
+
+def build_tree(seed, num_of_files, num_of_dirs, max_depth, num_of_symlinks,
+               num_of_hardlinks):
+    """Build the layout of the synthetic tree.
+
+    Args:
+        seed (int): Seed of the tree, the same seed gives the same tree.
+        num_of_files (int): Number of regular files.
+        num_of_dirs (int): Number of dirs.
+        max_depth (int): Maximum depth of the dirs.
+        num_of_symlinks (int): Number of symlinks to files.
+        num_of_hardlinks (int): Number of hardlinks to files.
+
+    Returns:
+        tuple: (dirs, files, symlinks, hardlinks) where dirs is a list of
+            relative dir paths in creation order, files a list of
+            (path, size, content offset), symlinks a list of
+            (path, relative target) and hardlinks a list of (path, target).
+    """
+    rand = random.Random(seed)
+    dirs = ['linux']
+    depths = [1]
+    # New dirs are attached to a random existing dir, which favours the
+    # wide and shallow top of the tree just like a kernel tree.
+    for index in range(1, num_of_dirs):
+        parent = rand.randrange(len(dirs))
+        while depths[parent] >= max_depth:
+            parent = rand.randrange(len(dirs))
+        dirs.append("%s/d%05d" % (dirs[parent], index))
+        depths.append(depths[parent] + 1)
+
+    files = []
+    mu = math.log(MEDIAN_FILE_SIZE)
+    for index in range(num_of_files):
+        parent = dirs[rand.randrange(len(dirs))]
+        size = min(int(rand.lognormvariate(mu, FILE_SIZE_SIGMA)),
+                   MAX_FILE_SIZE)
+        name = "f%06d%s" % (index, rand.choice(FILE_EXTENSIONS))
+        files.append(("%s/%s" % (parent, name), size,
+                      rand.randrange(CONTENT_BLOCK_SIZE)))
+
+    symlinks = []
+    for index in range(min(num_of_symlinks, num_of_files)):
+        target = files[rand.randrange(num_of_files)][0]
+        parent = dirs[rand.randrange(len(dirs))]
+        symlinks.append(("%s/s%05d" % (parent, index),
+                         os.path.relpath(target, parent)))
+
+    hardlinks = []
+    for index in range(min(num_of_hardlinks, num_of_files)):
+        target = files[rand.randrange(num_of_files)][0]
+        parent = dirs[rand.randrange(len(dirs))]
+        hardlinks.append(("%s/h%05d" % (parent, index), target))
+    return dirs, files, symlinks, hardlinks
+
+
+def get_content_block(seed):
+    """Get the block of text the file contents are sliced from.
+
+    Args:
+        seed (int): Seed of the tree.
+
+    Returns:
+        bytes: CONTENT_BLOCK_SIZE bytes of printable text.
+    """
+    rand = random.Random(seed)
+    line_chars = "abcdefghijklmnopqrstuvwxyz_(){};=*+-     \t"
+    block = []
+    size = 0
+    while size < CONTENT_BLOCK_SIZE:
+        line = ''.join(rand.choice(line_chars)
+                       for _ in range(rand.randint(8, 80))) + "\n"
+        block.append(line)
+        size += len(line)
+    return ''.join(block)[:CONTENT_BLOCK_SIZE].encode('ascii')
+
+
+def get_file_content(block, size, offset):
+    """Get the content of a file of size bytes starting at offset."""
+    content = (block[offset:] + block[:offset])
+    while len(content) < size:
+        content += block
+    return content[:size]
+
+
+def write_tar(args):
+    """Stream the synthetic tree as a tar archive to stdout."""
+    dirs, files, symlinks, hardlinks = build_tree(
+        args.seed, args.num_of_files, args.num_of_dirs, args.max_depth,
+        args.num_of_symlinks, args.num_of_hardlinks)
+    block = get_content_block(args.seed)
+    out = getattr(sys.stdout, 'buffer', sys.stdout)
+    total_bytes = 0
+    tar = tarfile.open(fileobj=out, mode='w|', format=tarfile.GNU_FORMAT)
+    for path in dirs:
+        info = tarfile.TarInfo(path)
+        info.type, info.mode, info.mtime = tarfile.DIRTYPE, 0o755, MTIME
+        tar.addfile(info)
+    for path, size, offset in files:
+        info = tarfile.TarInfo(path)
+        info.size, info.mode, info.mtime = size, 0o644, MTIME
+        tar.addfile(info, io.BytesIO(get_file_content(block, size, offset)))
+        total_bytes += size
+    for path, target in symlinks:
+        info = tarfile.TarInfo(path)
+        info.type, info.linkname = tarfile.SYMTYPE, target
+        info.mode, info.mtime = 0o777, MTIME
+        tar.addfile(info)
+    for path, target in hardlinks:
+        info = tarfile.TarInfo(path)
+        info.type, info.linkname = tarfile.LNKTYPE, target
+        info.mode, info.mtime = 0o644, MTIME
+        tar.addfile(info)
+    tar.close()
+    out.flush()
+    sys.stderr.write("Streamed %d dirs, %d files (%d bytes), %d symlinks, "
+                     "%d hardlinks\n" % (len(dirs), len(files), total_bytes,
+                                         len(symlinks), len(hardlinks)))
+    return 0
+
+
+def _create_files(dir_path, files, block):
+    """Create files under dir_path, run by each worker."""
+    for path, size, offset in files:
+        with open(os.path.join(dir_path, path), 'wb') as file_fd:
+            file_fd.write(get_file_content(block, size, offset))
+
+
+def create_tree(args):
+    """Create the synthetic tree under args.dir using parallel workers."""
+    dir_path = os.path.abspath(args.dir)
+    dirs, files, symlinks, hardlinks = build_tree(
+        args.seed, args.num_of_files, args.num_of_dirs, args.max_depth,
+        args.num_of_symlinks, args.num_of_hardlinks)
+    block = get_content_block(args.seed)
+
+    for path in dirs:
+        os.makedirs(os.path.join(dir_path, path))
+
+    num_of_workers = max(1, args.workers)
+    workers = []
+    for index in range(num_of_workers):
+        proc = Process(target=_create_files,
+                       args=(dir_path, files[index::num_of_workers], block))
+        proc.start()
+        workers.append(proc)
+    rc = 0
+    for proc in workers:
+        proc.join()
+        if proc.exitcode:
+            rc = 1
+
+    for path, target in symlinks:
+        os.symlink(target, os.path.join(dir_path, path))
+    for path, target in hardlinks:
+        os.link(os.path.join(dir_path, target), os.path.join(dir_path, path))
+
+    print("Created %d dirs, %d files, %d symlinks, %d hardlinks under %s"
+          % (len(dirs), len(files), len(symlinks), len(hardlinks), dir_path))
+    return rc
+
+
+if __name__ == "__main__":
+    print("Starting Script: %s" % ' '.join(sys.argv), file=sys.stderr)
+    test_start_time = datetime.datetime.now().replace(microsecond=0)
+
+    parser = argparse.ArgumentParser(
+        description=("Generate a deterministic synthetic tree with the shape "
+                     "of a linux kernel source tree."),
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    subparsers = parser.add_subparsers(title='Available sub commands',
+                                       help='sub-command help')
+
+    def add_shape_args(sub_parser):
+        sub_parser.add_argument('--seed', type=int, default=0,
+                                help="Seed of the tree.")
+        sub_parser.add_argument('--num-of-files', type=int,
+                                dest='num_of_files',
+                                default=DEFAULT_NUM_OF_FILES,
+                                help="Number of regular files.")
+        sub_parser.add_argument('--num-of-dirs', type=int,
+                                dest='num_of_dirs',
+                                default=DEFAULT_NUM_OF_DIRS,
+                                help="Number of dirs.")
+        sub_parser.add_argument('--max-depth', type=int, dest='max_depth',
+                                default=DEFAULT_MAX_DEPTH,
+                                help="Maximum depth of the dirs.")
+        sub_parser.add_argument('--num-of-symlinks', type=int,
+                                dest='num_of_symlinks',
+                                default=DEFAULT_NUM_OF_SYMLINKS,
+                                help="Number of symlinks.")
+        sub_parser.add_argument('--num-of-hardlinks', type=int,
+                                dest='num_of_hardlinks',
+                                default=DEFAULT_NUM_OF_HARDLINKS,
+                                help="Number of hardlinks.")
+
+    tar_parser = subparsers.add_parser(
+        'tar',
+        help=("Stream the tree as a tar archive to stdout."),
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    add_shape_args(tar_parser)
+    tar_parser.set_defaults(func=write_tar)
+
+    tree_parser = subparsers.add_parser(
+        'create_tree',
+        help=("Create the tree under 'dir' using parallel workers."),
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    add_shape_args(tree_parser)
+    tree_parser.add_argument('--workers', type=int, default=16,
+                             help="Number of parallel workers.")
+    tree_parser.add_argument('dir', metavar='DIR', type=str,
+                             help="Directory under which the tree is "
+                             "created.")
+    tree_parser.set_defaults(func=create_tree)
+
+    args = parser.parse_args()
+    rc = args.func(args)
+
+    test_end_time = datetime.datetime.now().replace(microsecond=0)
+    print("Execution time: %s" % (test_end_time - test_start_time),
+          file=sys.stderr)
+    sys.exit(rc)
@@ -0,0 +1,350 @@
+#  Copyright (C) 2021 Red Hat, Inc. <http://www.redhat.com>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License along
+#  with this program; if not, write to the Free Software Foundation, Inc.,
+#  51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+"""
+    Description: Opt-in per-call timing instrumentation of the public
+        functions of glustolibs.gluster, glustolibs.io and glustolibs.misc.
+
+    Profiling is enabled from the config file:
+        profiling:
+            enable: True
+            output_dir: /var/log/tests/profiles
+
+    When enabled, GlusterBaseClass profiles every test and for each
+    function call records the wall time, the number of remote commands,
+    the bytes transferred and the time spent sleeping. At the end of the
+    test a summary is logged and a json artifact and a folded stacks file
+    (usable with flamegraph.pl) are written to output_dir.
+
+    Each thread has its own stack of profiled calls. A thread started
+    during a test continues the stack of the call which started it, so
+    the calls made from worker threads are recorded under that call.
+"""
+
+import json
+import os
+import pkgutil
+import re
+import sys
+import threading
+import time
+from functools import wraps
+from importlib import import_module
+
+from glusto.core import Glusto as g
+
+PROFILED_PACKAGES = ('glustolibs.gluster', 'glustolibs.io', 'glustolibs.misc')
+
+_original_sleep = time.sleep
+_original_thread_start = threading.Thread.start
+_originals = {}
+_state = threading.local()
+# Guards the stats of _test_profile, updated from all the threads
+_lock = threading.Lock()
+_test_profile = {'test_id': None, 'stacks': {}, 'start_time': None}
+
+
+def is_call_profiling_enabled():
+    """Check whether call profiling is enabled in the config.
+
+    Returns:
+        bool: True if 'profiling: enable' is set in config, False otherwise.
+    """
+    return bool(g.config.get('profiling', {}).get('enable'))
+
+
+def _get_stack():
+    """Get the stack of profiled calls of the current thread.
+
+    The stack of a thread started during the test begins with the call
+    which started it.
+    """
+    if getattr(_state, 'test_id', None) != _test_profile['test_id']:
+        _state.test_id = _test_profile['test_id']
+        parent = getattr(threading.current_thread(), '_profile_parent',
+                         None)
+        _state.stack = [parent[1]] if (
+            parent and parent[0] == _state.test_id) else []
+    if not hasattr(_state, 'in_remote_call'):
+        _state.in_remote_call = False
+    return _state.stack
+
+
+def _profiled_thread_start(thread):
+    """threading.Thread.start replacement recording the profiled call
+    starting the thread."""
+    stack = _get_stack()
+    if stack:
+        thread._profile_parent = (_test_profile['test_id'], stack[-1])
+    return _original_thread_start(thread)
+
+
+def _account(key, value, frames=None):
+    """Add value to the counter 'key' of the innermost profiled call."""
+    if frames is None:
+        frames = _get_stack()
+    if not frames or _test_profile['test_id'] is None:
+        return
+    with _lock:
+        stats = _test_profile['stacks'].get(frames[-1])
+        if stats is not None:
+            stats[key] += value
+
+
+def _new_stats():
+    return {'calls': 0, 'wall_time': 0.0, 'remote_cmds': 0, 'bytes': 0,
+            'sleep_time': 0.0}
+
+
+def _profile_function(func, name):
+    """Wrap func so that its calls are recorded under name."""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        stack = _get_stack()
+        if _test_profile['test_id'] is None or not stack:
+            return func(*args, **kwargs)
+        path = "%s;%s" % (stack[-1], name)
+        with _lock:
+            stats = _test_profile['stacks'].setdefault(path, _new_stats())
+            stats['calls'] += 1
+        stack.append(path)
+        start_time = time.time()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            with _lock:
+                stats['wall_time'] += time.time() - start_time
+            stack.pop()
+    wrapper._profiled = True
+    return wrapper
+
+
+def _profile_remote_call(func, name):
+    """Wrap one of the remote calls of glusto to count commands and bytes.
+
+    Nested calls of glusto itself (e.g. run_parallel using run_async) are
+    not counted again.
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        _get_stack()
+        if _state.in_remote_call or _test_profile['test_id'] is None:
+            return func(*args, **kwargs)
+        _state.in_remote_call = True
+        try:
+            ret = func(*args, **kwargs)
+        finally:
+            _state.in_remote_call = False
+        frames = list(_get_stack())
+        if name == 'run':
+            _account('remote_cmds', 1, frames)
+            _account('bytes', len(ret[1] or '') + len(ret[2] or ''), frames)
+        elif name == 'run_parallel':
+            _account('remote_cmds', len(ret), frames)
+            for _, out, err in ret.values():
+                _account('bytes', len(out or '') + len(err or ''), frames)
+        elif name == 'run_async':
+            _account('remote_cmds', 1, frames)
+            communicate = ret.async_communicate
+
+            def async_communicate(*c_args, **c_kwargs):
+                result = communicate(*c_args, **c_kwargs)
+                _account('bytes', len(result[1] or '') + len(result[2] or ''),
+                         frames)
+                return result
+            ret.async_communicate = async_communicate
+        elif name in ('upload', 'download'):
+            _account('remote_cmds', 1, frames)
+            localpath = args[1] if name == 'upload' else args[2]
+            if os.path.isfile(localpath):
+                _account('bytes', os.path.getsize(localpath), frames)
+        return ret
+    return wrapper
+
+
+def _profiled_sleep(seconds):
+    """time.sleep replacement accounting the time slept."""
+    _account('sleep_time', seconds)
+    _original_sleep(seconds)
+
+
+def enable_call_profiling():
+    """Wrap the public functions of the profiled packages, the remote calls
+    of glusto, time.sleep and threading.Thread.start. Calling it again is a
+    no-op.
+
+    References to the wrapped functions held by already imported modules,
+    such as the test modules, are replaced as well.
+
+    Returns:
+        int: Number of functions wrapped.
+    """
+    if _originals:
+        return len(_originals)
+
+    # Import all the modules of the profiled packages
+    modules = []
+    for package_name in PROFILED_PACKAGES:
+        try:
+            package = import_module(package_name)
+        except ImportError:
+            continue
+        for _, module_name, _ in pkgutil.iter_modules(package.__path__):
+            full_name = "%s.%s" % (package_name, module_name)
+            try:
+                modules.append(import_module(full_name))
+            except Exception as err:
+                g.log.debug("Not profiling %s: %s", full_name, err)
+
+    for module in modules:
+        if module.__name__ == __name__:
+            continue
+        short_name = module.__name__.rsplit('.', 1)[-1]
+        for attr, obj in list(vars(module).items()):
+            if (attr.startswith('_') or not callable(obj) or
+                    getattr(obj, '__module__', None) != module.__name__ or
+                    isinstance(obj, type) or
+                    getattr(obj, '_profiled', False)):
+                continue
+            _originals[id(obj)] = _profile_function(
+                obj, "%s.%s" % (short_name, attr))
+    _originals[id(_original_sleep)] = _profiled_sleep
+
+    # Replace the references in all the loaded modules
+    for module in list(sys.modules.values()):
+        if module is None or module.__name__ == __name__:
+            continue
+        try:
+            items = list(vars(module).items())
+        except TypeError:
+            continue
+        for attr, obj in items:
+            wrapper = _originals.get(id(obj))
+            if wrapper is not None:
+                setattr(module, attr, wrapper)
+    time.sleep = _profiled_sleep
+    threading.Thread.start = _profiled_thread_start
+
+    for name in ('run', 'run_async', 'run_parallel', 'upload', 'download'):
+        setattr(g, name, staticmethod(_profile_remote_call(getattr(g, name),
+                                                           name)))
+    g.log.info("Call profiling enabled for %d functions", len(_originals))
+    return len(_originals)
+
+
+def start_test_profiling(test_id):
+    """Start recording the profiled calls of a test.
+
+    Args:
+        test_id (str): Id of the test, used as the root of the call stacks.
+    """
+    root = re.sub(r'[;\s]', '_', test_id)
+    _test_profile.update({'test_id': test_id, 'root': root,
+                          'stacks': {root: _new_stats()},
+                          'start_time': time.time()})
+    _test_profile['stacks'][root]['calls'] = 1
+    stack = _get_stack()
+    del stack[:]
+    stack.append(root)
+
+
+def stop_test_profiling(output_dir=None, top=15):
+    """Stop recording the profiled calls of the test, log a summary of the
+    most expensive functions and write the artifacts of the test.
+
+    Args:
+        output_dir (str): Dir in which '<test_id>.json' and
+            '<test_id>.folded' are written. Defaults to 'output_dir' of the
+            profiling config, artifacts are not written if unset.
+        top (int): Number of functions to show in the summary.
+
+    Returns:
+        dict: Dict with 'test_id', 'wall_time', 'stacks' (per call stack
+            stats) and 'functions' (stats per function, inclusive of the
+            calls it makes), or None if no test is being profiled.
+    """
+    test_id = _test_profile['test_id']
+    if test_id is None:
+        return None
+    root = _test_profile['root']
+    stacks = _test_profile['stacks']
+    stacks[root]['wall_time'] = time.time() - _test_profile['start_time']
+    _test_profile['test_id'] = None
+    del _get_stack()[:]
+
+    # Aggregate the counters of every stack into all its callers
+    inclusive = dict((path, dict(stats)) for path, stats in stacks.items())
+    for path, stats in stacks.items():
+        parts = path.split(';')
+        for depth in range(1, len(parts)):
+            caller = inclusive[';'.join(parts[:depth])]
+            for key in ('remote_cmds', 'bytes', 'sleep_time'):
+                caller[key] += stats[key]
+
+    functions = {}
+    for path, stats in inclusive.items():
+        parts = path.split(';')
+        name = parts[-1]
+        func_stats = functions.setdefault(name, _new_stats())
+        func_stats['calls'] += stats['calls']
+        # Recursive calls are already part of the outermost call
+        if name in parts[:-1]:
+            continue
+        for key in ('wall_time', 'remote_cmds', 'bytes', 'sleep_time'):
+            func_stats[key] += stats[key]
+
+    profile = {'test_id': test_id, 'wall_time': stacks[root]['wall_time'],
+               'stacks': stacks, 'functions': functions}
+
+    summary = ["Call profile of %s (%.2fs, %d remote cmds, %d bytes, "
+               "%.2fs sleeping):" % (
+                   test_id, profile['wall_time'],
+                   inclusive[root]['remote_cmds'], inclusive[root]['bytes'],
+                   inclusive[root]['sleep_time'])]
+    ordered = sorted((item for item in functions.items() if item[0] != root),
+                     key=lambda item: item[1]['wall_time'], reverse=True)
+    for name, stats in ordered[:top]:
+        summary.append("  %-60s %5d calls %9.2fs %6d cmds %10d bytes "
+                       "%8.2fs sleep" % (name, stats['calls'],
+                                         stats['wall_time'],
+                                         stats['remote_cmds'],
+                                         stats['bytes'],
+                                         stats['sleep_time']))
+    g.log.info("\n".join(summary))
+
+    if output_dir is None:
+        output_dir = g.config.get('profiling', {}).get('output_dir')
+    if output_dir:
+        try:
+            if not os.path.isdir(output_dir):
+                os.makedirs(output_dir)
+            base_path = os.path.join(output_dir, root)
+            with open(base_path + '.json', 'w') as json_fd:
+                json.dump(profile, json_fd, indent=2, sort_keys=True)
+            # Folded stacks of the self time in microseconds
+            with open(base_path + '.folded', 'w') as folded_fd:
+                for path, stats in sorted(stacks.items()):
+                    children = sum(
+                        child['wall_time']
+                        for child_path, child in stacks.items()
+                        if child_path.rsplit(';', 1)[0] == path and
+                        child_path != path)
+                    self_time = max(stats['wall_time'] - children, 0)
+                    folded_fd.write("%s %d\n" % (path, self_time * 1000000))
+        except (IOError, OSError) as err:
+            g.log.error("Failed to write the call profile of %s: %s",
+                        test_id, err)
+    return profile
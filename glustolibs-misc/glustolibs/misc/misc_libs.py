@@ -16,13 +16,21 @@
 
 """ Description: Helper module for misc libs. """
 
+import hashlib
+import json
 import os
+import socket
 import sys
+import threading
 import time
 
 from glusto.core import Glusto as g
 from glustolibs.gluster.lib_utils import is_rhel6, is_rhel7
 
+# Scripts uploaded in this run, keyed by (node, upload_dir, user) with a
+# dict of script name to sha256 checksum as value
+_UPLOADED_SCRIPTS = {}
+
 
 def create_dirs(list_of_nodes, list_of_dir_paths):
     """Create directories on nodes.
@@ -87,10 +95,34 @@ def path_exists(list_of_nodes, list_of_paths):
     return _rc
 
 
+def _get_local_sha256(path):
+    """Compute the sha256 checksum of a local file.
+
+    Args:
+        path (str): Absolute path of the local file.
+
+    Returns:
+        str: Hex digest of the file contents.
+    """
+    sha = hashlib.sha256()
+    with open(path, 'rb') as script_fd:
+        for chunk in iter(lambda: script_fd.read(65536), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
 def upload_scripts(list_of_nodes, list_of_scripts_abs_path,
-                   upload_dir="/usr/share/glustolibs/io/scripts/", user=None):
+                   upload_dir="/usr/share/glustolibs/io/scripts/", user=None,
+                   force=False):
     """Upload specified scripts to all the nodes.
 
+    A sha256 manifest of the local scripts is compared against the
+    scripts already present in the upload dir of every node (one command
+    per node, run on all nodes in parallel) and only the scripts which
+    are missing or changed are uploaded, to all nodes concurrently.
+    Scripts known to be in place from an earlier call in this run are
+    not checked again.
+
     Args:
         list_of_nodes (list): Nodes on which scripts have to be uploaded.
         list_of_scripts_abs_path (list): List of absolute path of all
@@ -98,6 +130,8 @@ def upload_scripts(list_of_nodes, list_of_scripts_abs_path,
         upload_dir (optional[str]): Name of the dir under which
             scripts will be uploaded on remote node.
         user (optional[str]): The user to use for the remote connection.
+        force (optional[bool]): If True, ignore the scripts recorded as
+            uploaded in this run and verify the remote manifest again.
 
     Returns:
         bool: True if uploading scripts is successful on all nodes.
@@ -113,43 +147,90 @@ def upload_scripts(list_of_nodes, list_of_scripts_abs_path,
     g.log.info("Scripts to upload: %s" % list_of_scripts_abs_path)
     g.log.info("Script upload dir: %s" % upload_dir)
 
-    # Create upload dir on each node
-    if not create_dirs(list_of_nodes, upload_dir):
-        return False
-
-    # Upload scrpts
-    _rc = True
+    # Build the local manifest of script name to checksum
+    manifest = {}
     for script_local_abs_path in list_of_scripts_abs_path:
         if not os.path.exists(script_local_abs_path):
             g.log.error("Script: %s doesn't exists" % script_local_abs_path)
-            _rc = False
-            break
-        for node in list_of_nodes:
-            script_name = os.path.basename(script_local_abs_path)
-            script_upload_path = os.path.join(upload_dir, script_name)
-            g.upload(node, script_local_abs_path, script_upload_path, user)
-    if not _rc:
+            g.log.error("Failed to upload scripts")
+            return False
+        script_name = os.path.basename(script_local_abs_path)
+        manifest[script_name] = (script_local_abs_path,
+                                 _get_local_sha256(script_local_abs_path))
+
+    # Skip the nodes on which this run has already uploaded these scripts
+    nodes_to_check = []
+    for node in list_of_nodes:
+        uploaded = _UPLOADED_SCRIPTS.get((node, upload_dir, user), {})
+        if force or any(uploaded.get(name) != sha
+                        for name, (_, sha) in manifest.items()):
+            nodes_to_check.append(node)
+    if not nodes_to_check:
+        g.log.info("Scripts are already uploaded to %s on nodes: %s"
+                   % (upload_dir, list_of_nodes))
+        return True
+
+    # Fetch the remote manifest, creating the upload dir if required
+    cmd = ("mkdir -p %s && cd %s && { sha256sum %s 2>/dev/null; true; }"
+           % (upload_dir, upload_dir, ' '.join(sorted(manifest))))
+    results = g.run_parallel(nodes_to_check, cmd, user=user)
+    to_upload = {}
+    for node in nodes_to_check:
+        ret, out, err = results[node]
+        if ret != 0:
+            g.log.error("Failed to create the dir: %s on node: %s - %s" %
+                        (upload_dir, node, err))
+            return False
+        remote_manifest = {}
+        for line in out.splitlines():
+            fields = line.split()
+            if len(fields) == 2:
+                remote_manifest[fields[1].lstrip('*')] = fields[0]
+        to_upload[node] = [name for name, (_, sha) in manifest.items()
+                           if remote_manifest.get(name) != sha]
+
+    # Upload the changed scripts to all the nodes concurrently
+    failed_nodes = []
+
+    def _upload_to_node(node):
+        try:
+            for script_name in to_upload[node]:
+                g.upload(node, manifest[script_name][0],
+                         os.path.join(upload_dir, script_name), user)
+        except Exception as err:
+            g.log.error("Failed to upload scripts to %s: %s", node, err)
+            failed_nodes.append(node)
+
+    threads = []
+    for node in nodes_to_check:
+        if not to_upload[node]:
+            g.log.info("Scripts are up to date in %s on %s"
+                       % (upload_dir, node))
+            continue
+        g.log.info("Uploading %s to %s" % (to_upload[node], node))
+        thread = threading.Thread(target=_upload_to_node, args=(node,))
+        thread.start()
+        threads.append(thread)
+    for thread in threads:
+        thread.join()
+    if failed_nodes:
         g.log.error("Failed to upload scripts")
         return False
 
-    # Recursively provide execute permissions to all scripts
-    for node in list_of_nodes:
-        ret, _, _ = g.run(node, "chmod -R +x %s" % upload_dir)
+    # Provide execute permissions to all scripts and list the upload dir
+    cmd = ("chmod -R +x %s && ls -l %s" % (upload_dir, upload_dir))
+    results = g.run_parallel(nodes_to_check, cmd, user=user)
+    for node in nodes_to_check:
+        ret, out, err = results[node]
         if ret != 0:
             g.log.error("Unable to provide execute permissions to upload dir "
-                        "'%s' on %s" % (upload_dir, node))
+                        "'%s' on %s - %s" % (upload_dir, node, err))
             return False
-        else:
-            g.log.info("Successfully provided execute permissions to upload "
-                       "dir '%s' on %s" % (upload_dir, node))
+        g.log.info("Listing dir: %s on node: %s - \n%s" %
+                   (upload_dir, node, out))
 
-        ret, out, err = g.run(node, "ls -l %s" % upload_dir)
-        if ret != 0:
-            g.log.error("Failed to list the dir: %s on node: %s - %s" %
-                        (upload_dir, node, err))
-        else:
-            g.log.info("Listing dir: %s on node: %s - \n%s" %
-                       (upload_dir, node, out))
+        uploaded = _UPLOADED_SCRIPTS.setdefault((node, upload_dir, user), {})
+        uploaded.update((name, sha) for name, (_, sha) in manifest.items())
 
     return True
 
@@ -378,12 +459,18 @@ def install_arequal(list_of_nodes):
     return _rc
 
 
-def are_nodes_online(nodes):
+def are_nodes_online(nodes, timeout=1):
     """Check whether nodes are online or not.
 
+    A node is online when its sshd port accepts connections. All the nodes
+    are probed concurrently.
+
     Args:
         nodes (str|list): Node(s) to check whether online or not.
 
+    Kwargs:
+        timeout (float): Connect timeout in seconds for each probe.
+
     Returns:
         tuple : Tuple containing two elements (ret, node_results).
         The first element ret is of type 'bool', True if all nodes
@@ -397,16 +484,14 @@ def are_nodes_online(nodes):
     if not isinstance(nodes, list):
         nodes = [nodes]
 
+    _, probes = are_ports_open(nodes, ports=(22,), timeout=timeout)
     node_results = {}
     for node in nodes:
-        cmd = "ping %s -c1" % node
-        ret, out, err = g.run_local(cmd)
-        if ret:
-            g.log.info("%s is offline" % node)
-            node_results[node] = False
-        else:
+        node_results[node] = probes[node][22]
+        if node_results[node]:
             g.log.info("%s is online" % node)
-            node_results[node] = True
+        else:
+            g.log.info("%s is offline" % node)
 
     ret = all(node_results.values())
 
@@ -427,21 +512,21 @@ def reboot_nodes(nodes):
 
     cmd = "reboot"
     _rc = False
+    # Fire the reboots on all nodes together instead of waiting for the
+    # ssh session of each node to drop before moving on to the next one
     for node in nodes:
         g.log.info("Executing cmd: %s on node %s", cmd, node)
         g.log.info("Rebooting the node %s", node)
-        ret = g.run(node, cmd)
+        g.run_async(node, cmd)
 
     halt = 120
-    counter = 0
+    end_time = time.time() + halt
 
     g.log.info("Wait for some seconds for the nodes to go offline")
-    while counter < halt:
-        ret, reboot_time = are_nodes_offline(nodes)
+    while time.time() < end_time:
+        ret, _ = are_nodes_offline(nodes, timeout=0.5)
         if not ret:
-            g.log.info("Nodes are online, Retry after 2 seconds .....")
-            time.sleep(2)
-            counter = counter + 2
+            time.sleep(0.5)
         else:
             _rc = True
             g.log.info("All nodes %s are offline", nodes)
@@ -455,6 +540,9 @@ def reboot_nodes(nodes):
 def reboot_nodes_and_wait_to_come_online(nodes, timeout=600):
     """Reboot node(s) and wait for it to become online.
 
+    The nodes are rebooted together and tracked with concurrent probes of
+    their sshd port, see reboot_nodes_and_record_boot_times().
+
     Args:
         nodes (str|list): Node(s) to reboot.
 
@@ -471,30 +559,17 @@ def reboot_nodes_and_wait_to_come_online(nodes, timeout=600):
         contains the node and corresponding result for reboot. If reboot is
         successful on node, then result contains True else False.
     """
-    _rc = reboot_nodes(nodes)
-    reboot_results = {}
-    if not _rc:
-        return _rc, reboot_results
-
-    counter = 0
-    g.log.info("Wait for some seconds for the nodes to come online"
-               " after reboot")
-
-    _rc = False
-    while counter < timeout:
-        ret, reboot_results = are_nodes_online(nodes)
-        if not ret:
-            g.log.info("Nodes are offline, Retry after 5 seconds ..... ")
-            time.sleep(5)
-            counter = counter + 5
-        else:
-            _rc = True
-            break
+    _rc, boot_times = reboot_nodes_and_record_boot_times(
+        nodes, timeout=timeout, wait_for_glusterd=False)
+    reboot_results = dict((node, times['sshd'] is not None)
+                          for node, times in boot_times.items())
 
     if not _rc:
         for node in reboot_results:
             if reboot_results[node]:
                 g.log.info("Node %s is online", node)
+            elif boot_times[node]['down'] is None:
+                g.log.error("Node %s did not go offline after reboot", node)
             else:
                 g.log.error("Node %s is offline even after "
                             "%d minutes", node, timeout / 60.0)
@@ -504,12 +579,18 @@ def reboot_nodes_and_wait_to_come_online(nodes, timeout=600):
     return _rc, reboot_results
 
 
-def are_nodes_offline(nodes):
+def are_nodes_offline(nodes, timeout=1):
     """Check whether nodes are offline or not.
 
+    A node is offline when its sshd port does not accept connections. All
+    the nodes are probed concurrently.
+
     Args:
         nodes (str|list): Node(s) to check whether offline or not.
 
+    Kwargs:
+        timeout (float): Connect timeout in seconds for each probe.
+
     Returns:
         tuple : Tuple containing two elements (ret, node_results).
         The first element ret is of type 'bool', True if all nodes
@@ -523,22 +604,219 @@ def are_nodes_offline(nodes):
     if not isinstance(nodes, list):
         nodes = [nodes]
 
+    _, probes = are_ports_open(nodes, ports=(22,), timeout=timeout)
     node_results = {}
     for node in nodes:
-        cmd = "ping %s -c1" % node
-        ret, out, err = g.run_local(cmd)
-        if ret:
+        node_results[node] = not probes[node][22]
+        if node_results[node]:
             g.log.info("%s is offline" % node)
-            node_results[node] = True
         else:
             g.log.info("%s is online" % node)
-            node_results[node] = False
 
     ret = all(node_results.values())
 
     return ret, node_results
 
 
+def _is_port_open(node, port, timeout=1):
+    """Check whether a TCP port on the node accepts connections.
+
+    Args:
+        node (str): Node to probe.
+        port (int): TCP port to probe.
+
+    Kwargs:
+        timeout (float): Connect timeout in seconds.
+
+    Returns:
+        bool: True if the port accepts connections, False otherwise.
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect((node, int(port)))
+    except (socket.error, socket.timeout):
+        return False
+    finally:
+        sock.close()
+    return True
+
+
+def are_ports_open(nodes, ports=(22, 24007), timeout=1):
+    """Probe TCP ports on all the nodes concurrently.
+
+    Args:
+        nodes (str|list): Node(s) to probe.
+
+    Kwargs:
+        ports (tuple|list): TCP ports to probe on every node.
+            Defaults to sshd (22) and glusterd (24007).
+        timeout (float): Connect timeout in seconds for each probe.
+
+    Returns:
+        tuple : Tuple containing two elements (ret, node_results).
+        The first element ret is of type 'bool', True if all ports
+        are open on all nodes. False otherwise.
+
+        The second element 'node_results' is of type dictonary and it
+        contains the node and a dict of port to its probe result.
+
+    Example:
+        >>> are_ports_open(["abc.com", "def.com"], ports=[22])
+        (True, {'abc.com': {22: True}, 'def.com': {22: True}})
+    """
+    if not isinstance(nodes, list):
+        nodes = [nodes]
+
+    node_results = dict((node, {}) for node in nodes)
+
+    def _probe(node, port):
+        node_results[node][port] = _is_port_open(node, port, timeout)
+
+    threads = []
+    for node in nodes:
+        for port in ports:
+            thread = threading.Thread(target=_probe, args=(node, port))
+            thread.daemon = True
+            thread.start()
+            threads.append(thread)
+    for thread in threads:
+        thread.join()
+
+    ret = all(all(results.values()) for results in node_results.values())
+    return ret, node_results
+
+
+def _get_brick_process_count(node):
+    """Get the number of brick processes running on the node.
+
+    Args:
+        node (str): Node on which brick processes have to be counted.
+
+    Returns:
+        int: Number of glusterfsd processes, 0 if none or on failure.
+    """
+    ret, out, _ = g.run(node, "pgrep -x glusterfsd | wc -l",
+                        log_level='DEBUG')
+    if ret:
+        return 0
+    try:
+        return int(out.strip())
+    except ValueError:
+        return 0
+
+
+def reboot_nodes_and_record_boot_times(nodes, timeout=600,
+                                       poll_interval=0.5,
+                                       wait_for_glusterd=True,
+                                       wait_for_bricks=True,
+                                       record_file=None):
+    """Reboot the nodes concurrently and record per-node boot timings.
+
+    All the nodes are rebooted together and their state is then tracked
+    with concurrent TCP probes of sshd (22) and glusterd (24007). Once
+    glusterd is reachable, the node is considered fully up when as many
+    brick processes are running as there were before the reboot.
+
+    Args:
+        nodes (str|list): Node(s) to reboot.
+
+    Kwargs:
+        timeout (int): Time in seconds to wait for all the nodes to come
+            back online.
+        poll_interval (float): Time in seconds between two probes.
+        wait_for_glusterd (bool): If True, wait for glusterd to be
+            reachable. If False, a node is up once sshd is reachable and
+            the bricks are not waited for. Defaults to True.
+        wait_for_bricks (bool): If True, wait for the brick processes
+            running before the reboot to come back. Defaults to True.
+        record_file (str): If set, the timings of every node are
+            appended to this local file as one json line per node so
+            that boot times can be tracked across runs.
+
+    Returns:
+        tuple : Tuple containing two elements (_rc, boot_times).
+        The first element '_rc' is of type 'bool', True if all nodes
+        went down and came back online within timeout. False otherwise.
+
+        The second element 'boot_times' is of type dictonary and it
+        contains the node and a dict with the seconds elapsed since the
+        reboot was issued until the node went down ('down'), sshd was
+        reachable ('sshd'), glusterd was reachable ('glusterd') and the
+        bricks were online ('bricks_online'). Stages not reached within
+        timeout are None.
+
+    Example:
+        >>> reboot_nodes_and_record_boot_times(["abc.com", "def.com"])
+    """
+    if not isinstance(nodes, list):
+        nodes = [nodes]
+
+    stages = ('down', 'sshd', 'glusterd', 'bricks_online')
+    boot_times = dict((node, dict.fromkeys(stages)) for node in nodes)
+    wait_for_bricks = wait_for_glusterd and wait_for_bricks
+    brick_count = {}
+    for node in nodes:
+        brick_count[node] = (_get_brick_process_count(node)
+                             if wait_for_bricks else 0)
+
+    start_time = time.time()
+    for node in nodes:
+        g.log.info("Rebooting the node %s", node)
+        g.run_async(node, "reboot")
+
+    pending = list(nodes)
+    while pending and time.time() - start_time < timeout:
+        _, probes = are_ports_open(pending, ports=(22, 24007),
+                                   timeout=poll_interval)
+        now = time.time() - start_time
+        for node in list(pending):
+            times = boot_times[node]
+            sshd_up, glusterd_up = probes[node][22], probes[node][24007]
+            if times['down'] is None:
+                if not sshd_up:
+                    times['down'] = now
+                    g.log.info("Node %s went down after %.1f seconds",
+                               node, now)
+                continue
+            if times['sshd'] is None and sshd_up:
+                times['sshd'] = now
+            if times['glusterd'] is None and glusterd_up:
+                times['glusterd'] = now
+            if not wait_for_glusterd:
+                if times['sshd'] is not None:
+                    g.log.info("Node %s is back online: %s", node, times)
+                    pending.remove(node)
+                continue
+            if times['glusterd'] is None:
+                continue
+            if (times['sshd'] is not None and
+                    (not wait_for_bricks or
+                     _get_brick_process_count(node) >= brick_count[node])):
+                times['bricks_online'] = time.time() - start_time
+                g.log.info("Node %s is back online: %s", node, times)
+                pending.remove(node)
+        if pending:
+            time.sleep(poll_interval)
+
+    for node in pending:
+        g.log.error("Node %s did not come back online within %d seconds: "
+                    "%s", node, timeout, boot_times[node])
+
+    if record_file:
+        try:
+            with open(record_file, 'a') as record_fd:
+                for node in nodes:
+                    record = {'node': node, 'start_time': start_time}
+                    record.update(boot_times[node])
+                    record_fd.write(json.dumps(record) + "\n")
+        except IOError as err:
+            g.log.error("Failed to record boot times in %s: %s",
+                        record_file, err)
+
+    return not pending, boot_times
+
+
 def drop_caches(hosts):
     """Drop Kernel Cache on a list of hosts
        (in order to run reads/renames etc on a cold cache).
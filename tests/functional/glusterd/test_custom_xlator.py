@@ -26,6 +26,7 @@ from glustolibs.gluster.heal_libs import monitor_heal_completion
 from glustolibs.gluster.lib_utils import is_rhel7
 from glustolibs.gluster.rebalance_ops import (rebalance_start,
                                               wait_for_rebalance_to_complete)
+from glustolibs.gluster.volfile_libs import get_volfile_graphs
 from glustolibs.gluster.volume_libs import (
     expand_volume, get_subvols, log_volume_info_and_status,
     replace_brick_from_volume, wait_for_volume_process_to_be_online)
@@ -126,36 +127,46 @@ class TestCustomXlator(GlusterBaseClass):
         bricks'''
         subvols = get_subvols(self.mnode, self.volname)['volume_subvols']
         # 'xlator' type to be verified in volfile
-        usr_vol = 'type {0}/{1}'.format(xtype, xlator)
+        usr_vol = '{0}/{1}'.format(xtype, xlator)
         # 'parent xlator' position to be verified
-        parent_vol = 'subvolumes {0}-{1}'.format(self.volname, parent)
-        for subvol in subvols:
-            for brick in subvol:
-                # Don't mutate while iterating, so take a ref to list
-                if brick not in self.verified_bricks[:]:
-                    host = brick[:brick.find(':')]
-
-                    # Construct volfile name using available info
-                    volfile = '/var/lib/glusterd/vols/{0}/{0}.{1}.vol'.format(
-                        self.volname,
-                        brick.replace(':/', '.').replace('/', '-'))
-
-                    # Get 'subgraph' wrt 'xlator' in volfile
-                    cmd = ("sed -n '/^volume %s-%s/,${p;/^end-volume/q}' %s" %
-                           (self.volname, xlator, volfile))
-                    ret, out, _ = g.run(host, cmd)
-                    self.assertEqual(
-                        ret, 0, 'Unable to query vol file for {0} '
-                        'xlator in {1}'.format(xtype, volfile))
-                    self.assertIn(
-                        usr_vol, out,
-                        'Unable to find {0} in {1}'.format(usr_vol, volfile))
-                    self.assertIn(
-                        parent_vol, out, 'Parent for {0} should be {1} '
-                        'in {2}'.format(usr_vol, parent_vol, volfile))
-                    # No need to verify on bricks which are already verfied
-                    # Useful in add and replace brick ops
-                    self.verified_bricks.append(brick)
+        parent_vol = '{0}-{1}'.format(self.volname, parent)
+        bricks = [brick for subvol in subvols for brick in subvol
+                  if brick not in self.verified_bricks]
+        if not bricks:
+            return
+
+        # Fetch the volfiles of all the hosts at once
+        hosts = list(set(brick[:brick.find(':')] for brick in bricks))
+        graphs = get_volfile_graphs(hosts, self.volname)
+        for brick in bricks:
+            host = brick[:brick.find(':')]
+            self.assertIsNotNone(
+                graphs[host], 'Unable to fetch vol files from {0}'.format(
+                    host))
+
+            # Construct volfile name using available info
+            volfile = '/var/lib/glusterd/vols/{0}/{0}.{1}.vol'.format(
+                self.volname,
+                brick.replace(':/', '.').replace('/', '-'))
+            self.assertIn(volfile, graphs[host],
+                          'Unable to query vol file {0}'.format(volfile))
+
+            # Get 'xlator' node of the volfile graph
+            usr_xlator = graphs[host][volfile].get_xlator(
+                '{0}-{1}'.format(self.volname, xlator))
+            self.assertIsNotNone(
+                usr_xlator, 'Unable to find {0} in {1}'.format(
+                    usr_vol, volfile))
+            self.assertEqual(
+                usr_xlator['type'], usr_vol,
+                'Unable to find {0} in {1}'.format(usr_vol, volfile))
+            self.assertIn(
+                parent_vol, usr_xlator['subvolumes'],
+                'Parent for {0} should be {1} in {2}'.format(
+                    usr_vol, parent_vol, volfile))
+            # No need to verify on bricks which are already verfied
+            # Useful in add and replace brick ops
+            self.verified_bricks.append(brick)
 
     def _set_and_assert_volume_option(self, key, value, xfail=False):
         '''Set and assert volume option'''
@@ -14,7 +14,6 @@
 #  with this program; if not, write to the Free Software Foundation, Inc.,
 #  51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
 
-from time import sleep
 from glusto.core import Glusto as g
 from glustolibs.gluster.exceptions import ExecutionError
 from glustolibs.gluster.gluster_base_class import GlusterBaseClass, runs_on
@@ -27,6 +26,7 @@ from glustolibs.gluster.snap_ops import (
     set_snap_config,
     get_snap_list,
     snap_delete_all)
+from glustolibs.gluster.snap_libs import SnapshotManager
 
 
 @runs_on([['distributed', 'replicated', 'distributed-replicated', 'dispersed',
@@ -127,13 +127,14 @@ class TestValidateSnaps256(GlusterBaseClass):
                    "snap-max-hard-limit to 256")
 
         # Create 256 snapshots
-        for snapname in self.snapshots:
-            ret, _, _ = snap_create(self.mnode, self.volname, snapname)
-            self.assertEqual(ret, 0, ("Failed to create snapshot %s for %s"
-                                      % (snapname, self.volname)))
-            sleep(1)
-        g.log.info("Snapshots created successfully for volume %s",
-                   self.volname)
+        snap_manager = SnapshotManager(self.mnode)
+        ret, results = snap_manager.bulk_create(self.volname, self.snapshots)
+        self.assertTrue(ret, ("Failed to create snapshots %s for %s"
+                              % ([snapname for snapname in self.snapshots
+                                  if results.get(snapname)], self.volname)))
+        g.log.info("Snapshots created successfully for volume %s, creation "
+                   "time: %s", self.volname,
+                   snap_manager.timing_summary('create'))
 
         # Validate snapshot list for 256 snapshots
         snap_list = get_snap_list(self.mnode)
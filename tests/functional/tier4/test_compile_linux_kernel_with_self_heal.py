@@ -59,9 +59,11 @@ class TestCompileLinuxKernelWithSelfHeal(GlusterBaseClass):
                     '{}/{}'.format(self.mountpoint, 'test_self_heal'))
         self.assertTrue(ret, "Failed to create dir test_self_heal")
 
-        # Start linux untar on dir linuxuntar
+        # Start linux untar on dir linuxuntar, the real kernel tree is
+        # needed as it is compiled later
         proc = run_linux_untar(self.clients[0], self.mounts[0].mountpoint,
-                               dirs=tuple(['test_self_heal']))[0]
+                               dirs=tuple(['test_self_heal']),
+                               synthetic=False)[0]
         try:
             ret, _, _ = proc.async_communicate()
             if not ret:
@@ -17,9 +17,15 @@
 # Imports needed by the script.
 import argparse
 import os
+import subprocess
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from yaml import safe_load
 
+GLUSTER_LOG_PATH = '/var/log/glusterfs'
+GLUSTERD_WORKDIR = '/var/lib/glusterd'
+STATEDUMP_PATH = '/var/run/gluster'
+
 
 def read_config_file(config_file):
     """
@@ -34,62 +40,132 @@ def read_config_file(config_file):
     return safe_load(open(config_file, 'r'))
 
 
-def remove_previous_sosreports(server):
+def _stream_from_server(server, remote_cmd, directory, compress_level):
     """
-    A function to remove old sosreports.
+    A function to run a command producing a tar stream on a server
+    and extract the stream into a local dir over the same connection.
 
     Args:
-        server: hostname/IP server from which sosreport
-                has to be removed.
+    server: hostname/IP of server for passwordless ssh
+            has to be configured.
+    remote_cmd: Command writing a tar archive to its stdout.
+    directory: Directory to be used to extract the archive.
+    compress_level: gzip level (1-9) of the stream, 0 disables
+                    compression.
 
     Returns:
         bool: True if successful else false.
     """
-    cmd = ("ssh root@{} \"rm -rf /var/tmp/sosreport-*\""
-           .format(server))
-    ret = os.system(cmd)
-    if ret:
-        return False
-    return True
-
-
-def collect_new_sosreports(server):
+    if compress_level:
+        remote_cmd = "{} | gzip -{}".format(remote_cmd, compress_level)
+    remote_cmd = "set -o pipefail; {}".format(remote_cmd)
+    ssh_proc = subprocess.Popen(["ssh", "root@{}".format(server),
+                                 remote_cmd], stdout=subprocess.PIPE)
+    tar_opts = "-xzf" if compress_level else "-xf"
+    tar_proc = subprocess.Popen(["tar", tar_opts, "-", "-C", directory],
+                                stdin=ssh_proc.stdout)
+    # Let ssh get SIGPIPE if the local tar exits early.
+    ssh_proc.stdout.close()
+    tar_ret = tar_proc.wait()
+    ssh_ret = ssh_proc.wait()
+    return not (tar_ret or ssh_ret)
+
+
+def collect_sosreport(server, directory, compress_level=0):
     """
-    A function to generate sosreports.
+    A function to remove old sosreports, generate a new one and
+    stream it back to the local dir.
 
     Args:
-    server: hostname/IP server from which sosreport
-            has to be collected.
+    server: hostname/IP of server for passwordless ssh
+            has to be configured.
+    directory: Directory to be used to store sosreports.
+
+    Kwargs:
+    compress_level: gzip level (1-9) of the stream, 0 disables
+                    compression as sosreports are already compressed.
 
     Returns:
         bool: True if successful else false.
     """
-    cmd = ("ssh root@{} \"sosreport --batch --name=$HOSTNAME\""
-           .format(server))
-    ret = os.system(cmd)
-    if ret:
-        return False
-    return True
+    cmd = ("rm -rf /var/tmp/sosreport-* && "
+           "sosreport --batch --name=$HOSTNAME >&2 && "
+           "cd /var/tmp && tar -cf - sosreport-*")
+    return _stream_from_server(server, cmd, directory, compress_level)
 
 
-def copy_sosreports_to_dir(server, directory):
+def collect_gluster_logs(server, directory, since=None, until=None,
+                         compress_level=6):
     """
-    A function to copy sosreports to local dir.
+    A function to collect only the gluster logs, glusterd working dir
+    and statedumps of a server instead of a full sosreport.
 
     Args:
     server: hostname/IP of server for passwordless ssh
             has to be configured.
-    directory: Directory to be used to store sosreports.
+    directory: Directory to be used to store the logs. The files are
+               stored under a sub-dir named after the server.
+
+    Kwargs:
+    since: If set, only the logs and statedumps modified after this
+           time (anything understood by `date -d`) are collected. The
+           glusterd working dir is always collected whole.
+    until: If set, statedumps taken after this time are skipped.
+           Logs are always collected whole as they span the window.
+    compress_level: gzip level (1-9) of the stream, 0 disables
+                    compression.
 
     Returns:
         bool: True if successful else false.
     """
-    cmd = ("scp root@{}:/var/tmp/sosreport-* {}"
-           .format(server, directory))
-    ret = os.system(cmd)
-    if ret:
+    server_dir = os.path.join(directory, server)
+    if not check_and_create_dir_if_not_present(server_dir):
         return False
-    return True
+
+    find_filter = ""
+    if since:
+        find_filter += " -newermt '{}'".format(since)
+    dump_filter = find_filter
+    if until:
+        dump_filter += " ! -newermt '{}'".format(until)
+    # Paths are made relative to / to keep tar from warning about them
+    cmd = ("cd / && {{ find {} -type f{} -print0; "
+           "find {} -type f -print0; "
+           "find {} -type f -name '*.dump.*'{} -print0; true; }} "
+           "2>/dev/null | tar --null --ignore-failed-read -T - -cf -"
+           .format(GLUSTER_LOG_PATH.lstrip('/'), find_filter,
+                   GLUSTERD_WORKDIR.lstrip('/'),
+                   STATEDUMP_PATH.lstrip('/'), dump_filter))
+    return _stream_from_server(server, cmd, server_dir, compress_level)
+
+
+def collect_from_server(server, directory, logs_only=False, since=None,
+                        until=None, compress_level=None):
+    """
+    A function to collect sosreport or gluster logs from a server.
+
+    Args:
+    server: hostname/IP of server for passwordless ssh
+            has to be configured.
+    directory: Directory to be used to store the reports.
+
+    Kwargs:
+    logs_only: If True collect only gluster logs instead of sosreport.
+    since: Start of the time window for logs_only mode.
+    until: End of the time window for logs_only mode.
+    compress_level: gzip level of the stream, None for the default of
+                    the mode.
+
+    Returns:
+        tuple: (server, bool) bool is True if successful else false.
+    """
+    if logs_only:
+        level = 6 if compress_level is None else compress_level
+        ret = collect_gluster_logs(server, directory, since, until, level)
+    else:
+        level = 0 if compress_level is None else compress_level
+        ret = collect_sosreport(server, directory, level)
+    return server, ret
 
 
 def check_and_create_dir_if_not_present(directory):
@@ -112,6 +188,27 @@ def check_and_create_dir_if_not_present(directory):
     return True
 
 
+def non_negative_int(value):
+    """
+    An argparse type accepting integers greater than or equal to 0.
+
+    Args:
+    value: Value given on the command line.
+
+    Returns:
+        int: The value as an integer.
+    """
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError("invalid int value: '{}'"
+                                         .format(value))
+    if number < 0:
+        raise argparse.ArgumentTypeError("must be 0 or more: '{}'"
+                                         .format(value))
+    return number
+
+
 def main():
     """
     Main function of the tool.
@@ -133,6 +230,29 @@ def main():
                         dest="directory",
                         help=("Directory where reports are to be stored."
                               "(Default:.)"))
+    parser.add_argument("-p", "--parallel", type=non_negative_int,
+                        default=0,
+                        dest="parallel",
+                        help=("Number of servers to collect reports from "
+                              "concurrently.(Default: all servers)"))
+    parser.add_argument("-c", "--compress-level", type=int, default=None,
+                        choices=range(0, 10), dest="compress_level",
+                        help=("gzip level of the stream sent over ssh, "
+                              "0 disables compression.(Default: 0 for "
+                              "sosreports, 6 for --logs-only)"))
+    parser.add_argument("-l", "--logs-only", action="store_true",
+                        dest="logs_only",
+                        help=("Collect only /var/log/glusterfs, "
+                              "/var/lib/glusterd and statedumps instead "
+                              "of a full sosreport."))
+    parser.add_argument("--since", type=str, default=None, dest="since",
+                        help=("With --logs-only, collect only logs and "
+                              "statedumps modified after this time, e.g. "
+                              "'2020-10-01 10:00:00'. /var/lib/glusterd is "
+                              "always collected whole."))
+    parser.add_argument("--until", type=str, default=None, dest="until",
+                        help=("With --logs-only, skip statedumps taken "
+                              "after this time."))
     args = parser.parse_args()
 
     # Getting list of hostname/IP.
@@ -155,31 +275,26 @@ def main():
         sys.exit("[ERROR]:Unable to create dir for storing sosreports.")
 
     try:
-        for server in servers:
-
-            # Removing old sosreports from the server.
-            ret = remove_previous_sosreports(server)
-            if not ret:
-                sys.exit("[ERROR]:Unable to remove old sosreports on {}!"
-                         .format(server))
-            print("[INFO]:Successfully removed old sosreports on {}."
-                  .format(server))
-
-            # Collecting sosreport on the server.
-            ret = collect_new_sosreports(server)
-            if not ret:
-                sys.exit("[ERROR]:Unable to collect sosreport on {}!"
-                         .format(server))
-            print("[INFO]:Successfully collected sosreport on {}."
-                  .format(server))
-
-            # Downloading sosreport to local machine.
-            ret = copy_sosreports_to_dir(server, directory)
-            if not ret:
-                sys.exit("[ERROR]:Unable download sosreport from {}."
-                         .format(server))
-            print("[INFO]:Successfully copied sosreports from {}."
-                  .format(server))
+        workers = args.parallel or len(servers)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(collect_from_server, server,
+                                       directory, args.logs_only,
+                                       args.since, args.until,
+                                       args.compress_level)
+                       for server in servers]
+            failed = []
+            for future in futures:
+                server, ret = future.result()
+                if ret:
+                    print("[INFO]:Successfully collected reports from {}."
+                          .format(server))
+                else:
+                    print("[ERROR]:Unable to collect reports from {}!"
+                          .format(server))
+                    failed.append(server)
+        if failed:
+            sys.exit("[ERROR]:Failed to collect reports from {}."
+                     .format(', '.join(failed)))
 
     # If servers aren't provided.
     except UnboundLocalError:
@@ -0,0 +1,326 @@
+#  Copyright (C) 2020 Red Hat, Inc. <http://www.redhat.com>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 3 of the License, or
+#  any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY :or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License along
+#  with this program; if not, write to the Free Software Foundation, Inc.,
+#  51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+# Imports needed by the script.
+import argparse
+import heapq
+import json
+import os
+import shlex
+import subprocess
+import sys
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+
+# Duration assumed for test classes without any history.
+DEFAULT_CLASS_DURATION = 600.0
+
+
+def check_and_create_dir_if_not_present(directory):
+    """
+    A function to check and create directory if not present
+
+    Args:
+        directory(str): Directory to be created if not present
+
+    Retuns:
+        bool: True if successful else False
+    """
+    if not os.path.isdir(directory):
+        try:
+            os.makedirs(directory)
+        except OSError:
+            return False
+    return True
+
+
+def collect_test_classes(config, test_paths, pytest_args=''):
+    """
+    A function to collect the test classes, as expanded by runs_on,
+    using the given config.
+
+    Args:
+        config(str): glusto-tests config file used for collection.
+        test_paths(list): Test files/dirs to collect.
+
+    Kwargs:
+        pytest_args(str): Extra arguments to pass to pytest, like '-m bvt'.
+
+    Returns:
+        list: Test class ids of the form 'path::Class' in collection
+              order, None on failure.
+    """
+    pytest_opts = "--collect-only -q {} {}".format(pytest_args,
+                                                   ' '.join(test_paths))
+    result = subprocess.run(["glusto", "-c", config,
+                             "--pytest={}".format(pytest_opts)],
+                            stdout=subprocess.PIPE,
+                            universal_newlines=True)
+    if result.returncode != 0:
+        print(result.stdout)
+        return None
+
+    test_classes = []
+    for line in result.stdout.splitlines():
+        parts = line.strip().split("::")
+        if len(parts) < 3:
+            continue
+        class_id = "::".join(parts[:2])
+        if class_id not in test_classes:
+            test_classes.append(class_id)
+    return test_classes
+
+
+def junit_classname(class_id):
+    """
+    A function to convert a test class id to the classname used for it
+    in junit xml reports.
+
+    Args:
+        class_id(str): Test class id of the form 'path::Class'.
+
+    Returns:
+        str: Classname of the form 'dotted.module.Class'.
+    """
+    path, class_name = class_id.split("::")
+    module = os.path.splitext(os.path.normpath(path))[0]
+    return "{}.{}".format(module.replace(os.sep, "."), class_name)
+
+
+def load_durations(durations_file):
+    """
+    A function to load historical per-class durations.
+
+    Args:
+        durations_file(str): Json file mapping test class id to seconds.
+
+    Returns:
+        dict: Test class id to duration in seconds, empty if the file
+              is missing or unreadable.
+    """
+    if not durations_file or not os.path.isfile(durations_file):
+        return {}
+    try:
+        with open(durations_file, 'r') as durations_fd:
+            return json.load(durations_fd)
+    except ValueError:
+        print("[WARNING]: Ignoring unreadable durations file {}"
+              .format(durations_file))
+        return {}
+
+
+def distribute_test_classes(test_classes, durations, num_clusters):
+    """
+    A function to distribute test classes across clusters using
+    longest-processing-time-first bin packing.
+
+    Args:
+        test_classes(list): Test class ids to distribute.
+        durations(dict): Test class id to duration in seconds. Classes
+                         without history get the median of the known
+                         durations.
+        num_clusters(int): Number of clusters to distribute to.
+
+    Returns:
+        list: A (estimated_seconds, [test class ids]) tuple per cluster.
+
+    Example:
+        >>> distribute_test_classes(['a::A', 'b::B', 'c::C'],
+        ...                         {'a::A': 30, 'b::B': 20, 'c::C': 10}, 2)
+        [(30, ['a::A']), (30, ['b::B', 'c::C'])]
+    """
+    known = sorted(durations[test] for test in test_classes
+                   if test in durations)
+    default = known[len(known) // 2] if known else DEFAULT_CLASS_DURATION
+
+    ordered = sorted(test_classes,
+                     key=lambda test: durations.get(test, default),
+                     reverse=True)
+    shards = [[0, []] for _ in range(num_clusters)]
+    heap = [(0, index) for index in range(num_clusters)]
+    for test in ordered:
+        load, index = heapq.heappop(heap)
+        load += durations.get(test, default)
+        shards[index][0] = load
+        shards[index][1].append(test)
+        heapq.heappush(heap, (load, index))
+    return [tuple(shard) for shard in shards]
+
+
+def run_shard(config, test_classes, shard_dir, pytest_args=''):
+    """
+    A function to run a set of test classes on a cluster.
+
+    Args:
+        config(str): glusto-tests config file of the cluster.
+        test_classes(list): Test class ids to run.
+        shard_dir(str): Dir to store the log and junit report of the run.
+
+    Kwargs:
+        pytest_args(str): Extra arguments to pass to pytest.
+
+    Returns:
+        tuple: (return code of glusto, run time in seconds)
+    """
+    log_file = os.path.join(shard_dir, "glusto_tests.log")
+    junit_file = os.path.join(shard_dir, "results.xml")
+    pytest_opts = "-v --junitxml={} {} {}".format(
+        junit_file, pytest_args,
+        ' '.join(shlex.quote(test) for test in test_classes))
+    cmd = ["glusto", "-c", config, "-l", log_file,
+           "--pytest={}".format(pytest_opts)]
+    start_time = time.time()
+    with open(os.path.join(shard_dir, "stdout.log"), 'w') as out_fd:
+        ret = subprocess.call(cmd, stdout=out_fd, stderr=subprocess.STDOUT)
+    return ret, time.time() - start_time
+
+
+def merge_results(shard_dirs, configs, destination_dir):
+    """
+    A function to merge the junit reports and logs of all clusters.
+
+    Args:
+        shard_dirs(list): Dirs of the runs on the clusters.
+        configs(list): Config files of the clusters, in the same order.
+        destination_dir(str): Dir to store the merged report and log.
+
+    Returns:
+        dict: junit classname to the sum of its testcase times.
+    """
+    merged = ET.Element("testsuites")
+    class_times = {}
+    for shard_dir, config in zip(shard_dirs, configs):
+        junit_file = os.path.join(shard_dir, "results.xml")
+        if not os.path.isfile(junit_file):
+            continue
+        root = ET.parse(junit_file).getroot()
+        suites = [root] if root.tag == "testsuite" else list(root)
+        for suite in suites:
+            suite.set("hostname", config)
+            merged.append(suite)
+            for testcase in suite.iter("testcase"):
+                name = testcase.get("classname")
+                class_times[name] = (class_times.get(name, 0.0) +
+                                     float(testcase.get("time", 0)))
+    ET.ElementTree(merged).write(
+        os.path.join(destination_dir, "results.xml"), encoding="utf-8",
+        xml_declaration=True)
+
+    with open(os.path.join(destination_dir, "glusto_tests.log"),
+              'w') as merged_fd:
+        for shard_dir, config in zip(shard_dirs, configs):
+            log_file = os.path.join(shard_dir, "glusto_tests.log")
+            if not os.path.isfile(log_file):
+                continue
+            merged_fd.write("{0} Cluster: {1} {0}\n"
+                            .format("=" * 20, config))
+            with open(log_file, 'r', encoding="ISO-8859-1") as log_fd:
+                for line in log_fd:
+                    merged_fd.write(line)
+    return class_times
+
+
+def main():
+    """
+    Main function of the tool.
+    """
+    # Setting up command line arguments.
+    parser = argparse.ArgumentParser(
+        description="Tool to distribute glusto-tests across clusters.")
+    parser.add_argument(
+        '-c', '--configs', type=str, nargs='+', dest='configs',
+        required=True,
+        help="glusto-tests config files, one per cluster.")
+    parser.add_argument(
+        '-t', '--tests', type=str, nargs='+', dest='tests', required=True,
+        help="Test files/dirs to run.")
+    parser.add_argument(
+        '-p', '--pytest-args', type=str, default='', dest='pytest_args',
+        help="Extra arguments to pass to pytest, e.g. '-m bvt'.")
+    parser.add_argument(
+        '-D', '--durations', type=str, default='durations.json',
+        dest='durations',
+        help=("Json file with historical per-class durations. It is "
+              "updated with the durations of this run. "
+              "(Default: durations.json)"))
+    parser.add_argument(
+        '-d', '--dist-dir', type=str, default=".", dest="destination_dir",
+        help="Path where logs and reports are to be stored.")
+    parser.add_argument(
+        '-n', '--dry-run', action='store_true', dest='dry_run',
+        help="Only print the distribution of the test classes.")
+    args = parser.parse_args()
+
+    if not check_and_create_dir_if_not_present(args.destination_dir):
+        sys.exit("[ERROR]: Unable to create dir")
+
+    # Collecting the test classes as expanded by runs_on.
+    test_classes = collect_test_classes(args.configs[0], args.tests,
+                                        args.pytest_args)
+    if not test_classes:
+        sys.exit("[ERROR]: Unable to collect any test class")
+
+    durations = load_durations(args.durations)
+    shards = distribute_test_classes(test_classes, durations,
+                                     len(args.configs))
+    for config, (estimate, shard) in zip(args.configs, shards):
+        print("[INFO]: {}: {} test classes, estimated {:.0f}s"
+              .format(config, len(shard), estimate))
+        for test in shard:
+            print("\t{}".format(test))
+    if args.dry_run:
+        return
+
+    # Running the shards on all clusters concurrently.
+    shard_dirs = []
+    for index in range(len(args.configs)):
+        shard_dir = os.path.join(args.destination_dir,
+                                 "cluster_{}".format(index))
+        if not check_and_create_dir_if_not_present(shard_dir):
+            sys.exit("[ERROR]: Unable to create dir")
+        shard_dirs.append(shard_dir)
+
+    with ThreadPoolExecutor(max_workers=len(args.configs)) as executor:
+        futures = [(config, executor.submit(run_shard, config, shard,
+                                            shard_dir, args.pytest_args))
+                   for config, (_, shard), shard_dir
+                   in zip(args.configs, shards, shard_dirs) if shard]
+        results = [(config, future.result()) for config, future in futures]
+
+    # Merging the reports and updating the durations.
+    class_times = merge_results(shard_dirs, args.configs,
+                                args.destination_dir)
+    for test in test_classes:
+        if junit_classname(test) in class_times:
+            durations[test] = class_times[junit_classname(test)]
+    if args.durations:
+        with open(args.durations, 'w') as durations_fd:
+            json.dump(durations, durations_fd, indent=2, sort_keys=True)
+
+    failed = False
+    for config, (ret, run_time) in results:
+        print("[INFO]: {}: finished in {:.0f}s with return code {}"
+              .format(config, run_time, ret))
+        failed = failed or bool(ret)
+    print("[INFO]: Merged report and log stored in {}"
+          .format(args.destination_dir))
+    if failed:
+        sys.exit("[ERROR]: Some tests failed")
+
+
+if __name__ == "__main__":
+    main()